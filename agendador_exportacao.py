@@ -0,0 +1,82 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+def _executar_medindo(funcao, tabela):
+    """Executa a exportação de uma tabela e mede o tempo (roda no worker)"""
+    inicio = time.perf_counter()
+    registros = funcao(tabela)
+    return {'registros': registros, 'segundos': time.perf_counter() - inicio}
+
+def workers_padrao():
+    """Número de workers padrão: um por núcleo, no máximo 8"""
+    return min(8, os.cpu_count() or 1)
+
+class AgendadorExportacao:
+    """Exporta tabelas em paralelo em um pool de threads (ou processos)
+
+    `funcao(tabela)` exporta uma tabela e retorna o número de registros;
+    cada chamada abre sua própria conexão de leitura, então cada tabela sai
+    de uma leitura consistente. Uma tabela que já está na fila não é
+    agendada de novo: quem pedir recebe o mesmo Future. Com processos=True
+    `funcao` precisa ser serializável com pickle (função de módulo ou
+    método de um objeto simples).
+    """
+
+    def __init__(self, funcao, workers=None, processos=False):
+        self.funcao = funcao
+        self.workers = workers or workers_padrao()
+        classe = ProcessPoolExecutor if processos else ThreadPoolExecutor
+        self._executor = classe(max_workers=self.workers)
+        self._enfileiradas = {}
+        self._lock = threading.Lock()
+        self.tempos = {}  # último tempo de cada tabela
+        self.ultima_duracao = None
+
+    def _concluir(self, tabela, future):
+        with self._lock:
+            if self._enfileiradas.get(tabela) is future:
+                del self._enfileiradas[tabela]
+            if not future.cancelled() and future.exception() is None:
+                self.tempos[tabela] = future.result()['segundos']
+
+    def agendar(self, tabela):
+        """Coloca a tabela na fila (ou devolve o Future já enfileirado)"""
+        with self._lock:
+            future = self._enfileiradas.get(tabela)
+            if future is not None and not future.running() and not future.done():
+                return future
+            future = self._executor.submit(_executar_medindo, self.funcao, tabela)
+            self._enfileiradas[tabela] = future
+        future.add_done_callback(lambda f: self._concluir(tabela, f))
+        return future
+
+    def exportar(self, tabelas):
+        """Exporta as tabelas e espera todas: {tabela: {'registros', 'segundos'}}"""
+        inicio = time.perf_counter()
+        futures = {tabela: self.agendar(tabela) for tabela in dict.fromkeys(tabelas)}
+
+        resultados = {}
+        for tabela, future in futures.items():
+            try:
+                resultados[tabela] = future.result()
+            except Exception as e:
+                print(f"❌ Erro ao exportar {tabela}: {e}")
+                resultados[tabela] = {'registros': 0, 'segundos': 0.0, 'erro': str(e)}
+
+        self.ultima_duracao = time.perf_counter() - inicio
+        return resultados
+
+    def encerrar(self):
+        """Espera os trabalhos em andamento e libera os workers"""
+        self._executor.shutdown(wait=True)
+
+def mostrar_tempos(resultados, duracao=None):
+    """Imprime o tempo de cada tabela (e o total da exportação)"""
+    for tabela, resultado in sorted(resultados.items(), key=lambda item: -item[1]['segundos']):
+        print(f"   ⏱️ {tabela:<18} {resultado['registros']:>8} registros  "
+              f"{resultado['segundos'] * 1000:8.1f} ms")
+    if duracao is not None:
+        soma = sum(r['segundos'] for r in resultados.values())
+        print(f"   ⏱️ total: {duracao * 1000:.1f} ms (soma das tabelas: {soma * 1000:.1f} ms)")
@@ -1,21 +1,103 @@
-from flask import Flask, render_template, jsonify, request, send_file
+from flask import Flask, render_template, jsonify, request, send_file, g, Response
 import sqlite3
 import json
 import os
 from datetime import datetime
+from banco_dados import (SQLiteConnectionPool, SondaVersaoDados, PRAGMAS_LEITURA, configurar_wal,
+                         obter_escritor, sql_exportacao)
+from cache_respostas import ResponseCache
+from compressao import CompressaoRespostas
+from versoes_tabelas import condicional, TABELAS_VERSIONADAS
+from migracoes import aplicar_migracoes
+from paginacao import buscar_pagina, normalizar_page_size, CursorInvalidoError
+from serializacao import JsonProviderRapido
+from busca import INDICES_BUSCA, expressao_busca, consulta_busca
+from listagens import montar_consulta, estatisticas_compilacao, ParametroInvalidoError
+from series_vendas import consultar_series, SerieInvalidaError
+from lote_vendas import ler_lote, gravar_lote, LoteInvalidoError
 
 app = Flask(__name__)
+app.json = JsonProviderRapido(app)  # orjson quando instalado (JSON_BACKEND=stdlib para desativar)
+app.config.setdefault('DB_PATH', os.environ.get('DB_PATH', 'empresa.db'))
+app.config.setdefault('DB_POOL_SIZE', int(os.environ.get('DB_POOL_SIZE', 5)))
+app.config.setdefault('CACHE_SIZE', int(os.environ.get('CACHE_SIZE', 256)))
+app.config.setdefault('CACHE_TTL', int(os.environ.get('CACHE_TTL', 60)))
+
+if os.path.exists(app.config['DB_PATH']):
+    configurar_wal(app.config['DB_PATH'])
+    aplicar_migracoes(app.config['DB_PATH'], verbose=False)
+
+# As rotas da API só leem: conexões `mode=ro` não disputam o lock de escrita
+pool = SQLiteConnectionPool(app.config['DB_PATH'], tamanho=app.config['DB_POOL_SIZE'],
+                            pragmas=PRAGMAS_LEITURA, somente_leitura=True)
+
+# Respostas das rotas GET ficam em memória até o banco mudar (PRAGMA data_version)
+sonda_versao = SondaVersaoDados(app.config['DB_PATH'])
+cache = ResponseCache(sonda_versao.versao, tamanho_maximo=app.config['CACHE_SIZE'],
+                      ttl=app.config['CACHE_TTL'])
+
+# gzip/br/zstd conforme Accept-Encoding; respostas pequenas seguem sem compressão
+app.config.setdefault('COMPRESS_MIN_SIZE', int(os.environ.get('COMPRESS_MIN_SIZE', 1024)))
+compressao = CompressaoRespostas(app, limiar=app.config['COMPRESS_MIN_SIZE'], cache=cache)
 
 def get_db_connection():
-    """Conecta ao banco de dados SQLite"""
-    conn = sqlite3.connect('empresa.db')
-    conn.row_factory = sqlite3.Row  # Para acessar colunas por nome
-    return conn
+    """Obtém a conexão do pool associada à requisição atual"""
+    if 'db_conn' not in g:
+        g.db_conn = pool.acquire()
+    return g.db_conn
+
+@app.teardown_appcontext
+def release_db_connection(exception=None):
+    """Devolve a conexão da requisição ao pool"""
+    conn = g.pop('db_conn', None)
+    if conn is not None:
+        pool.release(conn)
 
 def dict_from_row(row):
     """Converte uma linha do SQLite em dicionário"""
     return dict(zip(row.keys(), row))
 
+def pagina_solicitada():
+    """Indica se o cliente pediu a listagem paginada (?after= ou ?page_size=)"""
+    return 'after' in request.args or 'page_size' in request.args
+
+def listar_paginado(conn, consulta, ordem, chaves=None, descendente=False, params=(),
+                    where='', projetar=dict_from_row):
+    """Responde uma página da listagem com o cursor da próxima página"""
+    page_size = normalizar_page_size(request.args.get('page_size', type=int))
+    try:
+        rows, proximo = buscar_pagina(
+            conn, consulta, ordem, chaves or ordem, where=where, params=params,
+            after=request.args.get('after'), page_size=page_size,
+            descendente=descendente
+        )
+    except CursorInvalidoError as e:
+        return jsonify({"error": str(e)}), 400
+
+    return jsonify({
+        'items': [projetar(r) for r in rows],
+        'next_cursor': proximo,
+        'page_size': page_size
+    })
+
+def responder_listagem(conn, nome, limite=None):
+    """Lista `nome` (LISTAGENS) com ?filter[...]=, ?sort= e ?fields= aplicados no SQL"""
+    try:
+        consulta, params = montar_consulta(nome, request.args)
+    except ParametroInvalidoError as e:
+        return jsonify({"error": str(e)}), 400
+
+    if pagina_solicitada():
+        return listar_paginado(conn, consulta.select, consulta.ordem, consulta.chaves,
+                               descendente=consulta.direcoes, params=params,
+                               where=consulta.where, projetar=consulta.projetar)
+
+    if limite is None:
+        rows = conn.execute(consulta.sql(), params)
+    else:
+        rows = conn.execute(consulta.sql(limitar=True), params + [limite])
+    return jsonify([consulta.projetar(r) for r in rows])
+
 @app.route('/')
 def index():
     """Página inicial - serve o arquivo HTML da pasta raiz"""
@@ -33,6 +115,7 @@ def index():
                     "produtos": "/api/produtos",
                     "clientes": "/api/clientes",
                     "vendas": "/api/vendas",
+                    "busca": "/api/search?q=",
                     "export_completo": "/api/export/json"
                 }
             })
@@ -40,6 +123,8 @@ def index():
         return jsonify({"error": f"Erro ao carregar página: {str(e)}"}), 500
 
 @app.route('/api/stats')
+@condicional(get_db_connection, *TABELAS_VERSIONADAS)
+@cache.cached()
 def api_stats():
     """Retorna estatísticas em formato JSON"""
     try:
@@ -52,19 +137,19 @@ def api_stats():
         stats['funcionarios'] = conn.execute('SELECT COUNT(*) FROM funcionarios').fetchone()[0]
         stats['produtos'] = conn.execute('SELECT COUNT(*) FROM produtos').fetchone()[0]
         stats['clientes'] = conn.execute('SELECT COUNT(*) FROM clientes').fetchone()[0]
-        stats['vendas'] = conn.execute('SELECT COUNT(*) FROM vendas').fetchone()[0]
         
-        # Receita total
-        receita = conn.execute('SELECT SUM(total) FROM vendas').fetchone()[0]
+        # Vendas e receita total vêm do resumo mantido pelos triggers (resumos.py)
+        geral = conn.execute('SELECT total_vendas, receita FROM resumo_vendas_geral').fetchone()
+        stats['vendas'] = geral['total_vendas'] if geral else 0
+        receita = geral['receita'] if geral else None
         stats['receita_total'] = f"R$ {receita:,.2f}" if receita else "R$ 0,00"
         
         # Top vendedor
         top_vendedor = conn.execute('''
-            SELECT f.nome, SUM(v.total) as receita
-            FROM vendas v
-            JOIN funcionarios f ON v.funcionario_id = f.id
-            GROUP BY f.id, f.nome
-            ORDER BY receita DESC
+            SELECT f.nome, r.receita
+            FROM resumo_vendas_funcionario r
+            JOIN funcionarios f ON r.funcionario_id = f.id
+            ORDER BY r.receita DESC
             LIMIT 1
         ''').fetchone()
         
@@ -73,83 +158,109 @@ def api_stats():
         else:
             stats['top_vendedor'] = "Nenhum"
         
-        conn.close()
         return jsonify(stats)
         
     except Exception as e:
         return jsonify({"error": f"Erro ao obter estatísticas: {str(e)}"}), 500
 
 @app.route('/api/funcionarios')
+@condicional(get_db_connection, 'funcionarios')
+@cache.cached()
 def api_funcionarios():
     """API para listar funcionários"""
     try:
         conn = get_db_connection()
-        funcionarios = conn.execute('''
-            SELECT id, nome, email, departamento, cargo, salario, ativo
-            FROM funcionarios
-            ORDER BY nome
-        ''').fetchall()
-        conn.close()
-        
-        return jsonify([dict_from_row(f) for f in funcionarios])
+        return responder_listagem(conn, 'funcionarios')
     except Exception as e:
         return jsonify({"error": f"Erro ao obter funcionários: {str(e)}"}), 500
 
 @app.route('/api/produtos')
+@condicional(get_db_connection, 'produtos')
+@cache.cached()
 def api_produtos():
     """API para listar produtos"""
     try:
         conn = get_db_connection()
-        produtos = conn.execute('''
-            SELECT id, nome, categoria, preco, estoque, ativo
-            FROM produtos
-            ORDER BY nome
-        ''').fetchall()
-        conn.close()
-        
-        return jsonify([dict_from_row(p) for p in produtos])
+        return responder_listagem(conn, 'produtos')
     except Exception as e:
         return jsonify({"error": f"Erro ao obter produtos: {str(e)}"}), 500
 
 @app.route('/api/clientes')
+@condicional(get_db_connection, 'clientes')
+@cache.cached()
 def api_clientes():
     """API para listar clientes"""
     try:
         conn = get_db_connection()
-        clientes = conn.execute('''
-            SELECT id, nome, email, telefone, cidade, ativo
-            FROM clientes
-            ORDER BY nome
-        ''').fetchall()
-        conn.close()
-        
-        return jsonify([dict_from_row(c) for c in clientes])
+        return responder_listagem(conn, 'clientes')
     except Exception as e:
         return jsonify({"error": f"Erro ao obter clientes: {str(e)}"}), 500
 
 @app.route('/api/vendas')
+@condicional(get_db_connection, 'vendas', 'funcionarios', 'produtos')
+@cache.cached()
 def api_vendas():
     """API para listar vendas"""
     try:
         limit = request.args.get('limit', 50, type=int)
         
         conn = get_db_connection()
-        vendas = conn.execute('''
-            SELECT v.id, f.nome as funcionario, p.nome as produto,
-                   v.quantidade, v.total, v.data_venda, v.metodo_pagamento
-            FROM vendas v
-            JOIN funcionarios f ON v.funcionario_id = f.id
-            JOIN produtos p ON v.produto_id = p.id
-            ORDER BY v.data_venda DESC
-            LIMIT ?
-        ''', (limit,)).fetchall()
-        conn.close()
-        
-        return jsonify([dict_from_row(v) for v in vendas])
+        return responder_listagem(conn, 'vendas', limite=limit)
     except Exception as e:
         return jsonify({"error": f"Erro ao obter vendas: {str(e)}"}), 500
 
+@app.route('/api/vendas/series')
+@condicional(get_db_connection, 'vendas', 'funcionarios', 'produtos')
+@cache.cached()
+def api_vendas_series():
+    """Série temporal das vendas (?from=&to=&bucket=hour|day|week|month&group_by=)"""
+    bucket = request.args.get('bucket', 'day')
+    group_by = request.args.get('group_by') or None
+    inicio = request.args.get('from') or None
+    fim = request.args.get('to') or None
+    try:
+        conn = get_db_connection()
+        pontos = consultar_series(conn, bucket, group_by, inicio, fim)
+    except SerieInvalidaError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": f"Erro ao obter série de vendas: {str(e)}"}), 500
+
+    return jsonify({
+        'bucket': bucket,
+        'group_by': group_by,
+        'from': inicio,
+        'to': fim,
+        'series': pontos
+    })
+
+@app.route('/api/vendas/batch', methods=['POST'])
+def api_vendas_batch():
+    """Insere um lote de vendas (array JSON ou NDJSON) em uma única transação"""
+    ndjson = request.mimetype in ('application/x-ndjson', 'application/jsonl')
+    atomico = request.args.get('atomic', 'false').lower() in ('1', 'true')
+    try:
+        vendas = ler_lote(request.get_data(cache=False), ndjson=ndjson)
+    except LoteInvalidoError as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        resultados, inseridas = gravar_lote(obter_escritor(app.config['DB_PATH']), vendas,
+                                            atomico=atomico)
+    except sqlite3.Error as e:
+        return jsonify({"error": f"Erro ao gravar vendas: {str(e)}"}), 500
+
+    # 201: todas gravadas; 207: gravação parcial; 422: nenhuma venda gravada
+    status = 201 if inseridas == len(vendas) else 207 if inseridas else 422
+    return jsonify({
+        'inseridas': inseridas,
+        'rejeitadas': len(vendas) - inseridas,
+        'resultados': resultados
+    }), status
+
 @app.route('/api/estatisticas')
+@condicional(get_db_connection, 'vendas', 'funcionarios', 'produtos')
+@cache.cached()
 def api_estatisticas():
     """API para estatísticas avançadas"""
     try:
@@ -157,38 +268,30 @@ def api_estatisticas():
         
         # Vendas por departamento
         vendas_dept = conn.execute('''
-            SELECT f.departamento, COUNT(v.id) as total_vendas, 
-                   ROUND(SUM(v.total), 2) as receita_total
-            FROM vendas v
-            JOIN funcionarios f ON v.funcionario_id = f.id
-            GROUP BY f.departamento
+            SELECT departamento, total_vendas,
+                   ROUND(receita, 2) as receita_total
+            FROM resumo_vendas_departamento
             ORDER BY receita_total DESC
         ''').fetchall()
         
         # Vendas por mês
         vendas_mes = conn.execute('''
-            SELECT strftime('%Y-%m', data_venda) as mes,
-                   COUNT(*) as total_vendas,
-                   ROUND(SUM(total), 2) as receita
-            FROM vendas
-            GROUP BY strftime('%Y-%m', data_venda)
+            SELECT mes, total_vendas, ROUND(receita, 2) as receita
+            FROM resumo_vendas_mes
             ORDER BY mes DESC
             LIMIT 6
         ''').fetchall()
         
         # Top produtos
         top_produtos = conn.execute('''
-            SELECT p.nome, SUM(v.quantidade) as quantidade_total,
-                   ROUND(SUM(v.total), 2) as receita_total
-            FROM vendas v
-            JOIN produtos p ON v.produto_id = p.id
-            GROUP BY p.id, p.nome
+            SELECT p.nome, r.quantidade as quantidade_total,
+                   ROUND(r.receita, 2) as receita_total
+            FROM resumo_vendas_produto r
+            JOIN produtos p ON r.produto_id = p.id
             ORDER BY quantidade_total DESC
             LIMIT 5
         ''').fetchall()
-        
-        conn.close()
-        
+
         return jsonify({
             'vendas_por_departamento': [dict_from_row(r) for r in vendas_dept],
             'vendas_por_mes': [dict_from_row(r) for r in vendas_mes],
@@ -197,6 +300,39 @@ def api_estatisticas():
     except Exception as e:
         return jsonify({"error": f"Erro ao obter estatísticas: {str(e)}"}), 500
 
+@app.route('/api/search')
+@condicional(get_db_connection, *INDICES_BUSCA)
+@cache.cached()
+def api_search():
+    """Busca textual (FTS5) por relevância, com prefixo e sem acentos"""
+    expressao = expressao_busca(request.args.get('q', ''))
+    if expressao is None:
+        return jsonify({"error": "Informe o termo de busca em ?q="}), 400
+
+    tipos = [t for t in request.args.get('tipo', '').split(',') if t] or list(INDICES_BUSCA)
+    invalidos = [t for t in tipos if t not in INDICES_BUSCA]
+    if invalidos:
+        return jsonify({"error": f"Tipo inválido: {', '.join(invalidos)} "
+                                 f"(use {', '.join(INDICES_BUSCA)})"}), 400
+
+    try:
+        conn = get_db_connection()
+        # Paginação por cursor sobre (rank, tipo, id): a ordem por relevância é estável
+        return listar_paginado(conn, consulta_busca(tipos), ('rank', 'tipo', 'id'),
+                               params=[expressao] * len(tipos))
+    except Exception as e:
+        return jsonify({"error": f"Erro na busca: {str(e)}"}), 500
+
+@app.route('/api/pool/stats')
+def api_pool_stats():
+    """Estatísticas do pool de conexões"""
+    return jsonify(pool.stats())
+
+@app.route('/api/cache/stats')
+def api_cache_stats():
+    """Estatísticas do cache de respostas e do cache de consultas compiladas"""
+    return jsonify({**cache.stats(), 'consultas_compiladas': estatisticas_compilacao()})
+
 @app.route('/funcionarios')
 def funcionarios():
     """Página de funcionários"""
@@ -237,45 +373,81 @@ def estatisticas():
     except:
         return jsonify({"message": "Use /api/estatisticas para acessar os dados"}), 200
 
+# Tabelas incluídas na exportação completa, na ordem em que são escritas
+TABELAS_EXPORTACAO = ('funcionarios', 'produtos', 'clientes', 'vendas')
+TAMANHO_LOTE_EXPORTACAO = 500
+
+def iterar_lotes(conn, tabela, tamanho=TAMANHO_LOTE_EXPORTACAO):
+    """Percorre a tabela em lotes de linhas com fetchmany"""
+    cursor = conn.execute(sql_exportacao(conn, tabela))
+    while True:
+        rows = cursor.fetchmany(tamanho)
+        if not rows:
+            break
+        yield [dict_from_row(r) for r in rows]
+
+def metadados_exportacao(totais):
+    """Metadados gravados ao final da exportação"""
+    return {
+        'exported_at': datetime.now().isoformat(),
+        'total_records': totais
+    }
+
+def gerar_export_json(conn):
+    """Gera o documento JSON da exportação em pedaços, lote a lote"""
+    dumps = app.json.dumps
+    totais = {}
+    yield '{'
+    for tabela in TABELAS_EXPORTACAO:
+        yield f'{dumps(tabela)}:['
+        totais[tabela] = 0
+        for lote in iterar_lotes(conn, tabela):
+            separador = ',' if totais[tabela] else ''
+            yield separador + ','.join(dumps(row) for row in lote)
+            totais[tabela] += len(lote)
+        yield '],'
+    yield f'"metadata":{dumps(metadados_exportacao(totais))}}}'
+
+def gerar_export_ndjson(conn):
+    """Gera uma linha JSON por registro, no formato {"table": ..., "row": ...}"""
+    dumps = app.json.dumps
+    totais = {}
+    for tabela in TABELAS_EXPORTACAO:
+        totais[tabela] = 0
+        for lote in iterar_lotes(conn, tabela):
+            yield ''.join(dumps({'table': tabela, 'row': row}) + '\n' for row in lote)
+            totais[tabela] += len(lote)
+    yield dumps({'metadata': metadados_exportacao(totais)}) + '\n'
+
+def transmitir_exportacao(gerador):
+    """Executa o gerador em uma conexão própria, devolvida ao pool no fim
+
+    A conexão não vem de `g` porque a resposta continua sendo gerada depois
+    do teardown da requisição. Uma única transação de leitura garante que
+    todas as tabelas saiam do mesmo instante do banco.
+    """
+    conn = pool.acquire()
+    try:
+        conn.execute('BEGIN')
+        yield from gerador(conn)
+    finally:
+        pool.release(conn)
+
 @app.route('/api/export/json')
+@condicional(get_db_connection, *TABELAS_EXPORTACAO)
 def export_json():
-    """Exporta todos os dados em JSON"""
+    """Exporta todos os dados em JSON (ou NDJSON com ?format=ndjson) via streaming"""
+    formato = request.args.get('format', 'json')
+    geradores = {
+        'json': (gerar_export_json, 'application/json'),
+        'ndjson': (gerar_export_ndjson, 'application/x-ndjson'),
+    }
+    if formato not in geradores:
+        return jsonify({"error": f"Formato inválido: {formato} (use json ou ndjson)"}), 400
+
     try:
-        conn = get_db_connection()
-        
-        # Exportar todas as tabelas
-        data = {}
-        
-        # Funcionários
-        funcionarios = conn.execute('SELECT * FROM funcionarios').fetchall()
-        data['funcionarios'] = [dict_from_row(f) for f in funcionarios]
-        
-        # Produtos
-        produtos = conn.execute('SELECT * FROM produtos').fetchall()
-        data['produtos'] = [dict_from_row(p) for p in produtos]
-        
-        # Clientes
-        clientes = conn.execute('SELECT * FROM clientes').fetchall()
-        data['clientes'] = [dict_from_row(c) for c in clientes]
-        
-        # Vendas
-        vendas = conn.execute('SELECT * FROM vendas').fetchall()
-        data['vendas'] = [dict_from_row(v) for v in vendas]
-        
-        # Metadata
-        data['metadata'] = {
-            'exported_at': datetime.now().isoformat(),
-            'total_records': {
-                'funcionarios': len(data['funcionarios']),
-                'produtos': len(data['produtos']),
-                'clientes': len(data['clientes']),
-                'vendas': len(data['vendas'])
-            }
-        }
-        
-        conn.close()
-        
-        return jsonify(data)
+        gerador, mimetype = geradores[formato]
+        return Response(transmitir_exportacao(gerador), mimetype=mimetype)
     except Exception as e:
         return jsonify({"error": f"Erro ao exportar dados: {str(e)}"}), 500
 
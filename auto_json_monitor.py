@@ -6,17 +6,59 @@ import threading
 from datetime import datetime
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
+from banco_dados import conectar_leitura, listar_tabelas, configurar_wal, obter_escritor, SondaVersaoDados, iterar_linhas, sql_exportacao
+from serializacao import salvar_json, salvar_json_stream
+from migracoes import aplicar_migracoes
+from cdc import ConsumidorCDC, resumir_mudancas, descrever_contagem, mudancas_confirmaveis
+from snapshots import SnapshotStore
+from agendador_exportacao import AgendadorExportacao, mostrar_tempos
 
 class DatabaseMonitor(FileSystemEventHandler):
     """Monitor que detecta mudanças no banco de dados"""
     
-    def __init__(self, db_path='empresa.db', json_dir='dados_json_auto'):
+    def __init__(self, db_path='empresa.db', json_dir='dados_json_auto', compacto=False,
+                 janela_silencio=1.0, intervalo_sonda=5.0, espera_maxima=10.0, workers=None):
         self.db_path = db_path
         self.json_dir = json_dir
+        self.compacto = compacto  # JSON sem indentação, para consumo por máquinas
         self.last_check = datetime.now()
+        
+        # Eventos do watchdog são agrupados em rajadas: a verificação só roda
+        # depois de `janela_silencio` segundos sem eventos novos, ou no máximo
+        # `espera_maxima` segundos após o primeiro evento (escritas contínuas)
+        self.janela_silencio = janela_silencio
+        self.espera_maxima = espera_maxima
+        self.intervalo_sonda = intervalo_sonda  # sondagem periódica, mesmo sem eventos
+        self.sonda = SondaVersaoDados(db_path)
+        self._ultima_versao = None
+        self._ultimo_evento = None
+        self._primeiro_evento = None  # primeiro evento da rajada em andamento
+        self._evento = threading.Event()
+        self._parar = threading.Event()
+        self._lock = threading.Lock()
+        self._lock_exportacao = threading.Lock()
+        self._worker = None
+        self.metricas = {
+            'eventos_recebidos': 0,
+            'eventos_ignorados': 0,
+            'rajadas': 0,
+            'rajadas_forcadas': 0,
+            'sem_mudanca': 0,
+            'verificacoes': 0,
+            'exportacoes': 0,
+            'tabelas_exportadas': 0,
+            'ultima_exportacao_ms': None,
+        }
         self.ensure_json_directory()
+        self.snapshots = SnapshotStore(os.path.join(json_dir, '_snapshots'))
+        self.agendador = AgendadorExportacao(self.export_table_to_json, workers)
+        # Mudanças vêm do changelog; as contagens só alimentam o log
+        self.consumidor = ConsumidorCDC(db_path, 'auto_json_monitor')
+        if os.path.exists(self.db_path):
+            configurar_wal(self.db_path)
+            aplicar_migracoes(self.db_path, verbose=False)  # changelog (CDC)
+            self.consumidor.registrar()
         
-        # Armazenar contadores de registros para detectar mudanças
         self.table_counts = self.get_table_counts()
         
     def ensure_json_directory(self):
@@ -30,17 +72,15 @@ class DatabaseMonitor(FileSystemEventHandler):
         if not os.path.exists(self.db_path):
             return {}
             
-        conn = sqlite3.connect(self.db_path)
+        conn = conectar_leitura(self.db_path, row_factory=False)
         cursor = conn.cursor()
         counts = {}
         
         try:
             # Obter lista de tabelas
-            cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
-            tables = cursor.fetchall()
+            tables = listar_tabelas(conn)
             
-            for table in tables:
-                table_name = table[0]
+            for table_name in tables:
                 cursor.execute(f"SELECT COUNT(*) FROM {table_name}")
                 counts[table_name] = cursor.fetchone()[0]
                 
@@ -52,65 +92,142 @@ class DatabaseMonitor(FileSystemEventHandler):
         return counts
     
     def on_modified(self, event):
-        """Executado quando o arquivo do banco é modificado"""
-        if event.src_path.endswith('empresa.db') and not event.is_directory:
-            print(f"🔔 Mudança detectada no banco: {datetime.now().strftime('%H:%M:%S')}")
-            self.check_for_changes()
+        """Executado quando o arquivo do banco é modificado (só registra o evento)"""
+        # Em modo WAL os commits gravam primeiro no arquivo -wal
+        db_name = os.path.basename(self.db_path)
+        with self._lock:
+            self.metricas['eventos_recebidos'] += 1
+            if event.is_directory or not event.src_path.endswith((db_name, f"{db_name}-wal")):
+                self.metricas['eventos_ignorados'] += 1
+                return
+            self._ultimo_evento = time.monotonic()
+            if self._primeiro_evento is None:
+                self._primeiro_evento = self._ultimo_evento
+            # Sob o lock: o worker não pode ver o evento de uma rajada já encerrada
+            self._evento.set()
+    
+    def iniciar(self):
+        """Inicia a thread que agrupa os eventos e dispara as verificações"""
+        if self._worker is not None:
+            return
+        self._ultima_versao = self.sonda.versao()
+        self._parar.clear()
+        self._worker = threading.Thread(target=self._processar_eventos, daemon=True)
+        self._worker.start()
+    
+    def parar(self):
+        """Para a thread de eventos e fecha a sonda"""
+        self._parar.set()
+        self._evento.set()
+        if self._worker is not None:
+            self._worker.join()
+            self._worker = None
+        self.sonda.close()
+    
+    def _processar_eventos(self):
+        while not self._parar.is_set():
+            recebeu_evento = self._evento.wait(timeout=self.intervalo_sonda)
+            if self._parar.is_set():
+                break
+            
+            if recebeu_evento:
+                # Espera a rajada terminar (`janela_silencio` sem eventos novos),
+                # mas não mais que `espera_maxima` desde o primeiro evento
+                rajada = forcada = False
+                while not self._parar.is_set():
+                    with self._lock:
+                        if self._primeiro_evento is None:
+                            # Nenhuma rajada pendente (ex.: acordado por parar())
+                            self._evento.clear()
+                            break
+                        silencio = self._ultimo_evento + self.janela_silencio
+                        limite = self._primeiro_evento + self.espera_maxima
+                        restante = min(silencio, limite) - time.monotonic()
+                        if restante <= 0:
+                            rajada, forcada = True, limite < silencio
+                            self._primeiro_evento = None
+                            self._evento.clear()
+                            break
+                    time.sleep(restante)
+                with self._lock:
+                    self.metricas['rajadas'] += rajada
+                    if forcada:
+                        self.metricas['rajadas_forcadas'] += 1
+            
+            self._verificar_versao()
+    
+    def _verificar_versao(self):
+        """Só verifica o changelog se o PRAGMA data_version mudou"""
+        versao = self.sonda.versao()
+        if versao is not None and versao == self._ultima_versao:
+            with self._lock:
+                self.metricas['sem_mudanca'] += 1
+            return
+        self._ultima_versao = versao
+        if self.check_for_changes() is False:
+            # Alguma tabela falhou: a próxima sonda verifica de novo mesmo sem escrita nova
+            self._ultima_versao = None
+    
+    def obter_metricas(self):
+        """Eventos recebidos x verificações e exportações realizadas"""
+        with self._lock:
+            return dict(self.metricas)
     
     def check_for_changes(self):
-        """Verifica se houve mudanças nos dados e exporta para JSON"""
-        new_counts = self.get_table_counts()
-        changes_detected = False
-        
-        for table_name, new_count in new_counts.items():
-            old_count = self.table_counts.get(table_name, 0)
+        """Verifica se houve mudanças nos dados (changelog) e exporta para JSON
+
+        Retorna False se alguma tabela falhou e ficou pendente no changelog.
+        """
+        with self._lock_exportacao:
+            with self._lock:
+                self.metricas['verificacoes'] += 1
+            mudancas = self.consumidor.pendentes()
+            if not mudancas:
+                return
             
-            if new_count != old_count:
-                changes_detected = True
-                difference = new_count - old_count
-                
-                if difference > 0:
-                    print(f"➕ {table_name}: +{difference} registros (total: {new_count})")
-                else:
-                    print(f"➖ {table_name}: {difference} registros (total: {new_count})")
-                
-                # Exportar tabela alterada para JSON
-                self.export_table_to_json(table_name)
-        
-        if changes_detected:
-            self.table_counts = new_counts
+            print(f"🔔 Mudança detectada no banco: {datetime.now().strftime('%H:%M:%S')}")
+            inicio = time.perf_counter()
+            resumo = resumir_mudancas(mudancas)
+            for table_name, contagem in resumo.items():
+                print(f"🔄 {table_name}: {descrever_contagem(contagem)}")
+            
+            # Exportar as tabelas alteradas para JSON, em paralelo
+            resultados = self.agendador.exportar(resumo)
+            falhas = {table_name for table_name, resultado in resultados.items() if 'erro' in resultado}
+            for table_name, resultado in resultados.items():
+                if table_name not in falhas:
+                    self.table_counts[table_name] = resultado['registros']
+            mostrar_tempos(resultados)
+            
+            # Tabelas com erro continuam pendentes no changelog
+            confirmadas = mudancas_confirmaveis(mudancas, falhas)
+            self.consumidor.confirmar(confirmadas)
             self.create_change_log()
+            with self._lock:
+                self.metricas['exportacoes'] += 1
+                self.metricas['tabelas_exportadas'] += len(resumo)
+                self.metricas['ultima_exportacao_ms'] = round((time.perf_counter() - inicio) * 1000, 1)
+            if falhas:
+                print(f"⚠️ Exportação pendente para: {', '.join(sorted(falhas))} (nova tentativa na próxima verificação)")
+                return False
             print("✅ Dados automaticamente convertidos para JSON")
+            return True
         
     def export_table_to_json(self, table_name):
-        """Exporta uma tabela específica para JSON"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
+        """Exporta uma tabela específica para JSON e retorna o total de registros"""
+        conn = conectar_leitura(self.db_path)
         
         try:
-            cursor.execute(f"SELECT * FROM {table_name}")
-            rows = cursor.fetchall()
-            
-            # Converter para lista de dicionários
-            data = [dict(row) for row in rows]
-            
-            # Salvar em arquivo JSON
+            # Uma leitura em streaming alimenta o arquivo JSON e o histórico
+            # (snapshot deduplicado, só os blocos alterados ocupam disco)
+            linhas = iterar_linhas(conn.execute(f"{sql_exportacao(conn, table_name)} ORDER BY rowid"))
+            gravacao = self.snapshots.iniciar(table_name)
             filename = os.path.join(self.json_dir, f"{table_name}.json")
-            with open(filename, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False, default=str)
-            
-            # Salvar com timestamp
-            timestamp_filename = os.path.join(
-                self.json_dir, 
-                f"{table_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-            )
-            with open(timestamp_filename, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False, default=str)
-            
-        except sqlite3.Error as e:
-            print(f"❌ Erro ao exportar {table_name}: {e}")
+            total = salvar_json_stream(filename, gravacao.acompanhar(linhas), self.compacto)
+            self.snapshots.concluir(gravacao)
+            return total
         finally:
+            # Erros sobem para o agendador: a tabela fica pendente no changelog
             conn.close()
     
     def create_change_log(self):
@@ -136,15 +253,14 @@ class DatabaseMonitor(FileSystemEventHandler):
         if len(log_data["changes"]) > 100:
             log_data["changes"] = log_data["changes"][-100:]
         
-        with open(log_file, 'w', encoding='utf-8') as f:
-            json.dump(log_data, f, indent=2, ensure_ascii=False, default=str)
+        salvar_json(log_file, log_data)
 
 class AutoJsonExporter:
     """Sistema de exportação automática para JSON"""
     
-    def __init__(self, db_path='empresa.db'):
+    def __init__(self, db_path='empresa.db', compacto=False):
         self.db_path = db_path
-        self.monitor = DatabaseMonitor(db_path)
+        self.monitor = DatabaseMonitor(db_path, compacto=compacto)
         self.observer = Observer()
         self.is_monitoring = False
         
@@ -159,6 +275,7 @@ class AutoJsonExporter:
         self.observer.schedule(self.monitor, db_dir, recursive=False)
         
         # Iniciar monitoramento
+        self.monitor.iniciar()
         self.observer.start()
         self.is_monitoring = True
         
@@ -173,8 +290,14 @@ class AutoJsonExporter:
         if self.is_monitoring:
             self.observer.stop()
             self.observer.join()
+            self.monitor.parar()
+            self.monitor.agendador.encerrar()
             self.is_monitoring = False
             print("⏹️ Monitoramento parado")
+            metricas = self.monitor.obter_metricas()
+            print(f"📈 {metricas['eventos_recebidos']} eventos recebidos → "
+                  f"{metricas['rajadas']} rajadas, {metricas['verificacoes']} verificações, "
+                  f"{metricas['exportacoes']} exportações")
     
     def manual_export(self):
         """Executa exportação manual de todos os dados"""
@@ -209,48 +332,45 @@ def test_automation():
     print("=" * 30)
     
     # Inserir alguns dados de teste
-    conn = sqlite3.connect('empresa.db')
-    cursor = conn.cursor()
-    
     try:
-        # Inserir cliente teste
-        cursor.execute('''
-            INSERT INTO clientes (nome, email, telefone, cidade, data_cadastro, ativo)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (
-            'Cliente Teste Automação',
-            'teste@automacao.com',
-            '(11) 99999-9999',
-            'São Paulo',
-            datetime.now().strftime('%Y-%m-%d'),
-            1
-        ))
-        
-        # Inserir produto teste
-        cursor.execute('''
-            INSERT INTO produtos (nome, categoria, preco, custo, estoque, 
-                                codigo_barras, fornecedor, data_cadastro, ativo)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            'Produto Teste Automação',
-            'Teste',
-            99.99,
-            50.00,
-            100,
-            '1234567890123',
-            'Fornecedor Teste',
-            datetime.now().strftime('%Y-%m-%d'),
-            1
-        ))
+        with obter_escritor('empresa.db').transacao() as conn:
+            cursor = conn.cursor()
+            
+            # Inserir cliente teste
+            cursor.execute('''
+                INSERT INTO clientes (nome, email, telefone, cidade, data_cadastro, ativo)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', (
+                'Cliente Teste Automação',
+                'teste@automacao.com',
+                '(11) 99999-9999',
+                'São Paulo',
+                datetime.now().strftime('%Y-%m-%d'),
+                1
+            ))
+            
+            # Inserir produto teste
+            cursor.execute('''
+                INSERT INTO produtos (nome, categoria, preco, custo, estoque, 
+                                    codigo_barras, fornecedor, data_cadastro, ativo)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (
+                'Produto Teste Automação',
+                'Teste',
+                99.99,
+                50.00,
+                100,
+                '1234567890123',
+                'Fornecedor Teste',
+                datetime.now().strftime('%Y-%m-%d'),
+                1
+            ))
         
-        conn.commit()
         print("✅ Dados de teste inseridos no banco")
         print("🔍 Verifique se os arquivos JSON foram atualizados automaticamente")
         
     except sqlite3.Error as e:
         print(f"❌ Erro ao inserir dados de teste: {e}")
-    finally:
-        conn.close()
 
 if __name__ == "__main__":
     import sys
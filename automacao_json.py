@@ -1,21 +1,38 @@
 import sqlite3
-import json
 import os
+import sys
 import time
 import threading
 from datetime import datetime
+from banco_dados import conectar_leitura, listar_tabelas, configurar_wal, obter_escritor, iterar_linhas, sql_exportacao
+from serializacao import salvar_json, salvar_json_stream
+from migracoes import aplicar_migracoes
+from cdc import ConsumidorCDC, resumir_mudancas, descrever_contagem, mudancas_confirmaveis
+from exportacao_incremental import ExportadorIncremental
+from snapshots import SnapshotStore
+from agendador_exportacao import AgendadorExportacao, mostrar_tempos
 
 class SimpleJsonAutoExporter:
     """Sistema simples de automação para exportar dados para JSON"""
     
-    def __init__(self, db_path='empresa.db', json_dir='dados_json_auto', check_interval=5):
+    def __init__(self, db_path='empresa.db', json_dir='dados_json_auto', check_interval=5,
+                 compacto=False, incremental=False, workers=None):
         self.db_path = db_path
         self.json_dir = json_dir
         self.check_interval = check_interval  # segundos
+        self.compacto = compacto  # JSON sem indentação, para consumo por máquinas
         self.is_running = False
         self.table_counts = {}
+        self.consumidor = ConsumidorCDC(db_path, 'automacao_json')
         
         self.ensure_json_directory()
+        self.snapshots = SnapshotStore(os.path.join(json_dir, '_snapshots'))
+        # Tabelas alteradas são exportadas em paralelo
+        self.agendador = AgendadorExportacao(self.export_table_data, workers)
+        # Modo incremental: só as linhas alteradas vão para o journal de cada tabela
+        self.incremental = None
+        if incremental:
+            self.incremental = ExportadorIncremental(db_path, json_dir, compacto)
         self.initialize_counts()
     
     def ensure_json_directory(self):
@@ -27,6 +44,9 @@ class SimpleJsonAutoExporter:
     def initialize_counts(self):
         """Inicializa contadores das tabelas"""
         if os.path.exists(self.db_path):
+            configurar_wal(self.db_path)
+            aplicar_migracoes(self.db_path, verbose=False)  # changelog (CDC)
+            self.consumidor.registrar()
             self.table_counts = self.get_current_counts()
             print(f"📊 Contadores inicializados: {self.table_counts}")
     
@@ -34,15 +54,13 @@ class SimpleJsonAutoExporter:
         """Obtém contagem atual de registros"""
         counts = {}
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = conectar_leitura(self.db_path, row_factory=False)
             cursor = conn.cursor()
             
             # Obter tabelas
-            cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
-            tables = cursor.fetchall()
+            tables = listar_tabelas(conn)
             
-            for table in tables:
-                table_name = table[0]
+            for table_name in tables:
                 cursor.execute(f"SELECT COUNT(*) FROM {table_name}")
                 counts[table_name] = cursor.fetchone()[0]
             
@@ -53,72 +71,64 @@ class SimpleJsonAutoExporter:
         return counts
     
     def export_table_data(self, table_name):
-        """Exporta dados de uma tabela para JSON"""
+        """Exporta dados de uma tabela para JSON
+
+        Erros sobem para o agendador, que marca a tabela com 'erro' e deixa
+        suas mudanças pendentes no changelog.
+        """
+        conn = conectar_leitura(self.db_path)
+        
         try:
-            conn = sqlite3.connect(self.db_path)
-            conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
-            
-            cursor.execute(f"SELECT * FROM {table_name}")
-            rows = cursor.fetchall()
-            
-            # Converter para lista de dicionários
-            data = []
-            for row in rows:
-                row_dict = {}
-                for key in row.keys():
-                    row_dict[key] = row[key]
-                data.append(row_dict)
-            
-            # Salvar arquivo principal
+            # Uma leitura alimenta o arquivo principal e o histórico (snapshot
+            # deduplicado), em streaming: a tabela não fica inteira na memória
+            linhas = iterar_linhas(conn.execute(f"{sql_exportacao(conn, table_name)} ORDER BY rowid"))
+            gravacao = self.snapshots.iniciar(table_name)
             main_file = os.path.join(self.json_dir, f"{table_name}.json")
-            with open(main_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False, default=str)
-            
-            # Salvar com timestamp (histórico)
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            history_file = os.path.join(self.json_dir, f"{table_name}_history_{timestamp}.json")
-            with open(history_file, 'w', encoding='utf-8') as f:
-                json.dump({
-                    "timestamp": datetime.now().isoformat(),
-                    "table": table_name,
-                    "total_records": len(data),
-                    "data": data
-                }, f, indent=2, ensure_ascii=False, default=str)
-            
+            total = salvar_json_stream(main_file, gravacao.acompanhar(linhas), self.compacto)
+            self.snapshots.concluir(gravacao)
+        finally:
             conn.close()
-            return len(data)
-            
-        except Exception as e:
-            print(f"❌ Erro ao exportar {table_name}: {e}")
-            return 0
+        return total
     
     def check_and_export_changes(self):
-        """Verifica mudanças e exporta se necessário"""
+        """Verifica mudanças (changelog) e exporta as tabelas alteradas"""
         if not os.path.exists(self.db_path):
             return
         
-        current_counts = self.get_current_counts()
-        changes_detected = False
+        mudancas = self.consumidor.pendentes()
+        if not mudancas:
+            return False
         
-        for table_name, current_count in current_counts.items():
-            previous_count = self.table_counts.get(table_name, 0)
-            
-            if current_count != previous_count:
-                changes_detected = True
-                difference = current_count - previous_count
-                
-                print(f"🔄 [{datetime.now().strftime('%H:%M:%S')}] Mudança em '{table_name}': {previous_count} → {current_count} ({difference:+d})")
-                
-                # Exportar tabela
-                exported_count = self.export_table_data(table_name)
-                print(f"✅ {table_name}: {exported_count} registros exportados para JSON")
+        resumo = resumir_mudancas(mudancas)
+        for table_name, contagem in resumo.items():
+            print(f"🔄 [{datetime.now().strftime('%H:%M:%S')}] Mudança em '{table_name}': {descrever_contagem(contagem)}")
         
-        if changes_detected:
-            self.table_counts = current_counts
-            self.create_summary_report()
+        falhas = set()
+        if self.incremental:
+            for table_name, (destino, linhas) in self.incremental.aplicar_mudancas(mudancas).items():
+                if destino == 'erro':
+                    falhas.add(table_name)
+                elif destino == 'base':
+                    self.table_counts[table_name] = linhas
+                    print(f"✅ {table_name}: {linhas} registros exportados para a base JSON")
+                else:
+                    contagem = resumo[table_name]
+                    self.table_counts[table_name] += contagem['I'] - contagem['D']
+                    print(f"📝 {table_name}: {linhas} linhas gravadas no journal")
+        else:
+            resultados = self.agendador.exportar(resumo)
+            for table_name, resultado in resultados.items():
+                if 'erro' in resultado:
+                    falhas.add(table_name)
+                    continue
+                self.table_counts[table_name] = resultado['registros']
+                print(f"✅ {table_name}: {resultado['registros']} registros exportados para JSON "
+                      f"({resultado['segundos'] * 1000:.0f} ms)")
         
-        return changes_detected
+        # Tabelas com erro continuam pendentes e são exportadas de novo na próxima verificação
+        self.consumidor.confirmar(mudancas_confirmaveis(mudancas, falhas))
+        self.create_summary_report()
+        return True
     
     def create_summary_report(self):
         """Cria relatório resumo da automação"""
@@ -131,8 +141,15 @@ class SimpleJsonAutoExporter:
         }
         
         report_file = os.path.join(self.json_dir, "_automation_report.json")
-        with open(report_file, 'w', encoding='utf-8') as f:
-            json.dump(report, f, indent=2, ensure_ascii=False, default=str)
+        salvar_json(report_file, report)
+    
+    def _verificar_com_seguranca(self):
+        """Verificação do loop de monitoramento: um erro não encerra o loop"""
+        try:
+            self.check_and_export_changes()
+        except (sqlite3.Error, OSError) as e:
+            # Nada foi confirmado no changelog: a próxima verificação tenta de novo
+            print(f"❌ Erro na verificação: {e}")
     
     def start_monitoring(self):
         """Inicia monitoramento automático"""
@@ -149,12 +166,12 @@ class SimpleJsonAutoExporter:
         
         # Exportação inicial
         print("🔄 Executando exportação inicial...")
-        self.check_and_export_changes()
+        self._verificar_com_seguranca()
         
         try:
             while self.is_running:
                 time.sleep(self.check_interval)
-                self.check_and_export_changes()
+                self._verificar_com_seguranca()
                 
         except KeyboardInterrupt:
             print("\n🛑 Parando automação...")
@@ -176,19 +193,21 @@ class SimpleJsonAutoExporter:
             return
         
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
-            tables = cursor.fetchall()
+            conn = conectar_leitura(self.db_path, row_factory=False)
+            tables = listar_tabelas(conn)
             conn.close()
             
-            for table in tables:
-                table_name = table[0]
-                count = self.export_table_data(table_name)
-                print(f"✅ {table_name}: {count} registros exportados")
+            if self.incremental:
+                for table_name in tables:
+                    count = self.incremental.exportar_base(table_name)
+                    self.table_counts[table_name] = count
+                    print(f"✅ {table_name}: {count} registros exportados")
+            else:
+                resultados = self.agendador.exportar(tables)
+                for table_name, resultado in resultados.items():
+                    self.table_counts[table_name] = resultado['registros']
+                mostrar_tempos(resultados, self.agendador.ultima_duracao)
             
-            self.table_counts = self.get_current_counts()
             self.create_summary_report()
             print("✅ Exportação completa finalizada!")
             
@@ -198,41 +217,38 @@ class SimpleJsonAutoExporter:
 def insert_test_data():
     """Insere dados de teste para demonstrar a automação"""
     try:
-        conn = sqlite3.connect('empresa.db')
-        cursor = conn.cursor()
-        
-        # Cliente teste
-        cursor.execute('''
-            INSERT INTO clientes (nome, email, telefone, cidade, data_cadastro, ativo)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (
-            f'Cliente Auto {datetime.now().strftime("%H:%M:%S")}',
-            f'auto{int(time.time())}@teste.com',
-            '(11) 99999-0000',
-            'São Paulo',
-            datetime.now().strftime('%Y-%m-%d'),
-            1
-        ))
-        
-        # Produto teste
-        cursor.execute('''
-            INSERT INTO produtos (nome, categoria, preco, custo, estoque, 
-                                codigo_barras, fornecedor, data_cadastro, ativo)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            f'Produto Auto {datetime.now().strftime("%H:%M:%S")}',
-            'Automação',
-            99.99,
-            50.00,
-            50,
-            str(int(time.time())),
-            'Fornecedor Auto',
-            datetime.now().strftime('%Y-%m-%d'),
-            1
-        ))
-        
-        conn.commit()
-        conn.close()
+        with obter_escritor('empresa.db').transacao() as conn:
+            cursor = conn.cursor()
+            
+            # Cliente teste
+            cursor.execute('''
+                INSERT INTO clientes (nome, email, telefone, cidade, data_cadastro, ativo)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', (
+                f'Cliente Auto {datetime.now().strftime("%H:%M:%S")}',
+                f'auto{int(time.time())}@teste.com',
+                '(11) 99999-0000',
+                'São Paulo',
+                datetime.now().strftime('%Y-%m-%d'),
+                1
+            ))
+            
+            # Produto teste
+            cursor.execute('''
+                INSERT INTO produtos (nome, categoria, preco, custo, estoque, 
+                                    codigo_barras, fornecedor, data_cadastro, ativo)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (
+                f'Produto Auto {datetime.now().strftime("%H:%M:%S")}',
+                'Automação',
+                99.99,
+                50.00,
+                50,
+                str(int(time.time())),
+                'Fornecedor Auto',
+                datetime.now().strftime('%Y-%m-%d'),
+                1
+            ))
         
         print(f"✅ Dados de teste inseridos às {datetime.now().strftime('%H:%M:%S')}")
         return True
@@ -246,7 +262,8 @@ def main():
     print("🤖 AUTOMAÇÃO BANCO → JSON")
     print("=" * 40)
     
-    exporter = SimpleJsonAutoExporter()
+    # --incremental: journal com as linhas alteradas em vez de regravar a tabela
+    exporter = SimpleJsonAutoExporter(incremental='--incremental' in sys.argv)
     
     while True:
         print("\nEscolha uma opção:")
@@ -0,0 +1,328 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from queue import Queue, Empty
+from urllib.parse import quote
+
+# PRAGMAs aplicados em toda conexão nova, antes de ela entrar no pool
+PRAGMAS_PADRAO = (
+    "PRAGMA foreign_keys = ON",
+    "PRAGMA busy_timeout = 5000",
+)
+
+# Conexões de leitura: cache de páginas maior, leitura via mmap e temporários em memória
+PRAGMAS_LEITURA = (
+    "PRAGMA busy_timeout = 5000",
+    "PRAGMA cache_size = -16000",
+    "PRAGMA mmap_size = 268435456",
+    "PRAGMA temp_store = MEMORY",
+)
+
+# Conexão de escrita: em WAL, synchronous=NORMAL só sincroniza no checkpoint
+PRAGMAS_ESCRITA = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA foreign_keys = ON",
+    "PRAGMA busy_timeout = 5000",
+    "PRAGMA cache_size = -16000",
+    "PRAGMA temp_store = MEMORY",
+)
+
+# Tabelas de controle e derivadas que não fazem parte dos dados exportados
+TABELAS_INTERNAS = {'schema_migrations', 'versoes_tabelas', 'changelog', 'cdc_posicoes'}
+PREFIXOS_INTERNOS = ('resumo_', 'busca_')
+
+def listar_tabelas(conn):
+    """Lista as tabelas de dados do banco, sem as tabelas de controle nem as do SQLite"""
+    rows = conn.execute(
+        "SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite\\_%' ESCAPE '\\'"
+    ).fetchall()
+    return [row[0] for row in rows
+            if row[0] not in TABELAS_INTERNAS and not row[0].startswith(PREFIXOS_INTERNOS)]
+
+def colunas_exportadas(conn, tabela):
+    """Colunas de dados da tabela, sem as geradas/ocultas (hidden != 0 no PRAGMA table_xinfo)"""
+    return [row[1] for row in conn.execute(f"PRAGMA table_xinfo({tabela})") if row[6] == 0]
+
+def sql_exportacao(conn, tabela):
+    """SELECT das colunas de dados da tabela (sem WHERE/ORDER BY)
+
+    As exportações listam as colunas em vez de usar SELECT *: colunas
+    geradas, como as de data das vendas (migração 8), são derivadas e não
+    fazem parte do formato exportado.
+    """
+    return f"SELECT {', '.join(colunas_exportadas(conn, tabela))} FROM {tabela}"
+
+def uri_somente_leitura(db_path):
+    """Monta a URI `mode=ro` para abrir o banco apenas para leitura"""
+    return f"file:{quote(os.path.abspath(db_path))}?mode=ro"
+
+def conectar_leitura(db_path='empresa.db', row_factory=True):
+    """Abre uma conexão somente leitura com os PRAGMAs de leitura"""
+    conn = sqlite3.connect(uri_somente_leitura(db_path), uri=True, check_same_thread=False)
+    if row_factory:
+        conn.row_factory = sqlite3.Row
+    for pragma in PRAGMAS_LEITURA:
+        conn.execute(pragma)
+    return conn
+
+def iterar_linhas(cursor, tamanho_lote=500):
+    """Percorre o resultado do cursor com fetchmany, como dicionários"""
+    colunas = [descricao[0] for descricao in cursor.description]
+    while True:
+        lote = cursor.fetchmany(tamanho_lote)
+        if not lote:
+            break
+        for row in lote:
+            yield dict(zip(colunas, row))
+
+@contextmanager
+def imagem_temporaria(db_path='empresa.db'):
+    """Copia o banco para um arquivo temporário com a API de backup
+
+    A cópia é feita em uma única leitura, então a imagem é um retrato
+    consistente do banco; o arquivo é removido ao sair do bloco.
+    """
+    descritor, caminho = tempfile.mkstemp(prefix='snapshot_', suffix='.db')
+    os.close(descritor)
+    origem = conectar_leitura(db_path, row_factory=False)
+    destino = sqlite3.connect(caminho)
+    try:
+        origem.backup(destino)
+        # A cópia herda o modo WAL do original; a imagem não recebe escritas
+        destino.execute("PRAGMA journal_mode = DELETE")
+    finally:
+        destino.close()
+        origem.close()
+
+    try:
+        yield caminho
+    finally:
+        for arquivo in (caminho, f"{caminho}-journal", f"{caminho}-wal", f"{caminho}-shm"):
+            if os.path.exists(arquivo):
+                os.remove(arquivo)
+
+def configurar_wal(db_path='empresa.db'):
+    """Coloca o banco em modo WAL (a configuração fica gravada no arquivo)"""
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute("PRAGMA journal_mode = WAL").fetchone()[0]
+    finally:
+        conn.close()
+
+class PoolEsgotadoError(Exception):
+    """Nenhuma conexão ficou livre dentro do tempo de espera"""
+
+class SQLiteConnectionPool:
+    """Pool de conexões SQLite reutilizadas entre as requisições"""
+
+    def __init__(self, db_path='empresa.db', tamanho=5, timeout=10,
+                 pragmas=PRAGMAS_PADRAO, verificar_apos=30, somente_leitura=False):
+        self.db_path = db_path
+        self.somente_leitura = somente_leitura
+        self.tamanho = tamanho
+        self.timeout = timeout  # segundos aguardando uma conexão livre
+        self.pragmas = pragmas
+        self.verificar_apos = verificar_apos  # segundos ociosa antes do health check
+
+        self._livres = Queue()
+        self._abertas = 0
+        self._lock = threading.Lock()
+        self._stats = {
+            'aberturas': 0,
+            'reutilizacoes': 0,
+            'esperas': 0,
+            'timeouts': 0,
+            'descartadas': 0,
+        }
+
+    def _abrir_conexao(self):
+        """Abre uma conexão nova já com row_factory e PRAGMAs configurados"""
+        if self.somente_leitura:
+            conn = sqlite3.connect(uri_somente_leitura(self.db_path), uri=True,
+                                   check_same_thread=False)
+        else:
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        conn.row_factory = sqlite3.Row  # Para acessar colunas por nome
+        for pragma in self.pragmas:
+            conn.execute(pragma)
+        return conn
+
+    def _conexao_saudavel(self, conn):
+        """Executa uma consulta trivial para confirmar que a conexão responde"""
+        try:
+            conn.execute('SELECT 1').fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def _contar(self, chave):
+        with self._lock:
+            self._stats[chave] += 1
+
+    def acquire(self):
+        """Obtém uma conexão do pool, abrindo uma nova se houver espaço"""
+        try:
+            conn, devolvida_em = self._livres.get_nowait()
+        except Empty:
+            with self._lock:
+                pode_abrir = self._abertas < self.tamanho
+                if pode_abrir:
+                    self._abertas += 1
+
+            if pode_abrir:
+                try:
+                    conn = self._abrir_conexao()
+                except Exception:
+                    with self._lock:
+                        self._abertas -= 1
+                    raise
+                self._contar('aberturas')
+                return conn
+
+            # Pool cheio: aguardar uma conexão ser devolvida
+            self._contar('esperas')
+            try:
+                conn, devolvida_em = self._livres.get(timeout=self.timeout)
+            except Empty:
+                self._contar('timeouts')
+                raise PoolEsgotadoError(
+                    f"Nenhuma conexão livre em {self.timeout}s (tamanho do pool: {self.tamanho})"
+                )
+
+        if time.monotonic() - devolvida_em > self.verificar_apos and not self._conexao_saudavel(conn):
+            self._descartar(conn)
+            return self.acquire()
+
+        self._contar('reutilizacoes')
+        return conn
+
+    def release(self, conn):
+        """Devolve a conexão ao pool, desfazendo transações pendentes"""
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            self._descartar(conn)
+            return
+
+        self._livres.put((conn, time.monotonic()))
+
+    def _descartar(self, conn):
+        """Fecha uma conexão com problema e libera a vaga no pool"""
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+        with self._lock:
+            self._abertas -= 1
+            self._stats['descartadas'] += 1
+
+    def close_all(self):
+        """Fecha todas as conexões ociosas do pool"""
+        while True:
+            try:
+                conn, _ = self._livres.get_nowait()
+            except Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._abertas -= 1
+
+    def stats(self):
+        """Retorna as estatísticas de uso do pool"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['abertas'] = self._abertas
+        stats['ociosas'] = self._livres.qsize()
+        stats['tamanho'] = self.tamanho
+        return stats
+
+class DatabaseWriter:
+    """Escritor dedicado: todas as escritas do processo passam por uma única conexão"""
+
+    def __init__(self, db_path='empresa.db', pragmas=PRAGMAS_ESCRITA):
+        self.db_path = db_path
+        self.pragmas = pragmas
+        self._conn = None
+        self._lock = threading.RLock()
+
+    def _conexao(self):
+        if self._conn is None:
+            # isolation_level=None: as transações são controladas explicitamente
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False,
+                                         isolation_level=None)
+            self._conn.row_factory = sqlite3.Row
+            for pragma in self.pragmas:
+                self._conn.execute(pragma)
+        return self._conn
+
+    @contextmanager
+    def transacao(self):
+        """Executa o bloco em uma transação exclusiva do escritor"""
+        with self._lock:
+            conn = self._conexao()
+            if conn.in_transaction:
+                # Transação aninhada na mesma thread: reaproveita a externa
+                yield conn
+                return
+
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            else:
+                conn.execute("COMMIT")
+
+    def close(self):
+        """Fecha a conexão de escrita"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+_escritores = {}
+_escritores_lock = threading.Lock()
+
+def obter_escritor(db_path='empresa.db'):
+    """Retorna o escritor único do processo para o banco informado"""
+    chave = os.path.abspath(db_path)
+    with _escritores_lock:
+        if chave not in _escritores:
+            _escritores[chave] = DatabaseWriter(db_path)
+        return _escritores[chave]
+
+class SondaVersaoDados:
+    """Conexão mantida aberta para consultar PRAGMA data_version
+
+    O valor muda sempre que outra conexão (de qualquer processo) confirma
+    uma escrita no banco, então serve como token barato de "o banco mudou".
+    """
+
+    def __init__(self, db_path='empresa.db'):
+        self.db_path = db_path
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def versao(self):
+        """Retorna o data_version atual (ou None se o banco não puder ser lido)"""
+        with self._lock:
+            try:
+                if self._conn is None:
+                    self._conn = conectar_leitura(self.db_path, row_factory=False)
+                return self._conn.execute("PRAGMA data_version").fetchone()[0]
+            except sqlite3.Error:
+                self._conn = None
+                return None
+
+    def close(self):
+        """Fecha a conexão da sonda"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -0,0 +1,331 @@
+import os
+import sys
+import time
+
+# Endpoints com payload grande usados nas medições da API
+ENDPOINTS_GRANDES = [
+    '/api/export/json',
+    '/api/export/json?format=ndjson',
+    '/api/funcionarios',
+    '/api/produtos',
+    '/api/clientes',
+    '/api/vendas?limit=1000',
+]
+
+def _formatar_bytes(tamanho):
+    for unidade in ('B', 'KB', 'MB'):
+        if tamanho < 1024:
+            return f"{tamanho:.1f} {unidade}"
+        tamanho /= 1024
+    return f"{tamanho:.1f} GB"
+
+def _medir(funcao, repeticoes):
+    """Executa `funcao` `repeticoes` vezes e retorna (segundos por execução, último resultado)"""
+    resultado = None
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        resultado = funcao()
+    return (time.perf_counter() - inicio) / repeticoes, resultado
+
+def benchmark_compressao(db_path='empresa.db', repeticoes=20):
+    """Compara tamanho e vazão das respostas da API com e sem compressão"""
+    os.environ['DB_PATH'] = db_path
+    from app import app
+    from compressao import codificadores_disponiveis
+
+    codificacoes = ['identity'] + list(codificadores_disponiveis())
+    cliente = app.test_client()
+    resultados = []
+
+    print("🗜️ BENCHMARK DE COMPRESSÃO")
+    print(f"   Codificações: {', '.join(codificacoes)} | {repeticoes} repetições")
+    print("=" * 78)
+
+    for endpoint in ENDPOINTS_GRANDES:
+        print(f"\n📍 {endpoint}")
+        base = None
+        for codificacao in codificacoes:
+            cabecalhos = {'Accept-Encoding': codificacao}
+
+            def requisitar():
+                return cliente.get(endpoint, headers=cabecalhos).get_data()
+
+            requisitar()  # aquece o cache de respostas
+            segundos, corpo = _medir(requisitar, repeticoes)
+            tamanho = len(corpo)
+            if base is None:
+                base = tamanho
+
+            resultados.append({
+                'endpoint': endpoint,
+                'codificacao': codificacao,
+                'bytes': tamanho,
+                'razao': tamanho / base if base else 1,
+                'ms': segundos * 1000,
+                'req_s': 1 / segundos if segundos else 0,
+            })
+            print(f"   {codificacao:<9} {_formatar_bytes(tamanho):>10} "
+                  f"({tamanho / base:6.1%})  {segundos * 1000:8.2f} ms  "
+                  f"{1 / segundos:8.1f} req/s")
+
+    return resultados
+
+def _linhas_vendas(db_path, quantidade):
+    """Lista com `quantidade` linhas de vendas (as linhas do banco repetidas em ciclo)"""
+    from banco_dados import conectar_leitura
+    conn = conectar_leitura(db_path)
+    try:
+        modelo = [dict(row) for row in conn.execute("SELECT * FROM vendas")]
+    finally:
+        conn.close()
+    if not modelo:
+        raise ValueError("A tabela vendas está vazia")
+    # Referências repetidas: 1M de linhas sem 1M de dicionários na memória
+    return [modelo[i % len(modelo)] for i in range(quantidade)]
+
+def benchmark_serializacao(db_path='empresa.db', tamanhos=(10_000, 100_000, 1_000_000)):
+    """Compara vazão e tamanho da saída dos backends JSON na tabela vendas"""
+    from serializacao import SERIALIZADORES
+
+    resultados = []
+    print("🧾 BENCHMARK DE SERIALIZAÇÃO JSON (vendas)")
+    print(f"   Backends: {', '.join(SERIALIZADORES)}")
+    print("=" * 78)
+
+    for quantidade in tamanhos:
+        linhas = _linhas_vendas(db_path, int(quantidade))
+        print(f"\n📍 {int(quantidade):,} linhas")
+        base = None
+        for nome, classe in SERIALIZADORES.items():
+            serializador = classe()
+            for compacto in (False, True):
+                segundos, saida = _medir(lambda: serializador.dumps_bytes(linhas, compacto), 1)
+                if base is None:
+                    base = segundos
+                modo = 'compacto' if compacto else 'indent=2'
+                resultados.append({
+                    'linhas': int(quantidade),
+                    'backend': nome,
+                    'modo': modo,
+                    'bytes': len(saida),
+                    'segundos': segundos,
+                    'mb_s': len(saida) / segundos / 1024 / 1024 if segundos else 0,
+                })
+                print(f"   {nome:<7} {modo:<9} {_formatar_bytes(len(saida)):>10}  "
+                      f"{segundos:8.3f} s  {len(saida) / segundos / 1024 / 1024:8.1f} MB/s  "
+                      f"({base / segundos:5.1f}x)")
+                del saida
+
+    return resultados
+
+def _banco_vendas(db_path, quantidade, destino):
+    """Cria em `destino` um banco só com a tabela vendas, repetindo as linhas até `quantidade`"""
+    import sqlite3
+    conn = sqlite3.connect(destino)
+    try:
+        conn.execute("ATTACH DATABASE ? AS origem", (db_path,))
+        conn.execute(conn.execute(
+            "SELECT sql FROM origem.sqlite_master WHERE name = 'vendas'").fetchone()[0])
+        colunas = ', '.join(row[1] for row in conn.execute("PRAGMA origem.table_info(vendas)")
+                            if row[1] != 'id')
+        conn.execute(f"INSERT INTO vendas ({colunas}) SELECT {colunas} FROM origem.vendas")
+        while conn.execute("SELECT MAX(id) FROM vendas").fetchone()[0] < quantidade:
+            conn.execute(f"INSERT INTO vendas ({colunas}) SELECT {colunas} FROM vendas")
+        conn.execute("DELETE FROM vendas WHERE id > ?", (quantidade,))
+        conn.commit()
+    finally:
+        conn.close()
+
+def benchmark_formatos(db_path='empresa.db', tamanhos=(100_000, 1_000_000)):
+    """Compara tamanho, tempo de escrita e de leitura de JSON, CSV, Parquet e Feather (vendas)"""
+    import tempfile
+    from banco_dados import conectar_leitura, iterar_linhas
+    from serializacao import serializador, salvar_json_stream
+    from formatos_exportacao import FORMATOS, exportar_tabela
+
+    def ler_json(caminho):
+        with open(caminho, 'rb') as f:
+            return serializador.loads(f.read())
+
+    resultados = []
+    print("📦 BENCHMARK DE FORMATOS DE EXPORTAÇÃO (vendas)")
+    print(f"   Formatos: json, {', '.join(FORMATOS)}")
+    print("=" * 78)
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        for quantidade in tamanhos:
+            banco = os.path.join(diretorio, f"vendas_{int(quantidade)}.db")
+            _banco_vendas(db_path, int(quantidade), banco)
+            conn = conectar_leitura(banco)
+
+            casos = []
+            for compacto in (False, True):
+                casos.append((
+                    'json' if not compacto else 'json compacto', 'json', ler_json,
+                    lambda caminho, compacto=compacto: salvar_json_stream(
+                        caminho, iterar_linhas(conn.execute("SELECT * FROM vendas")), compacto),
+                ))
+            for nome, classe in FORMATOS.items():
+                casos.append((nome, classe.extensao, classe.ler,
+                              lambda caminho, nome=nome: exportar_tabela(conn, 'vendas', caminho, nome)))
+
+            print(f"\n📍 {int(quantidade):,} linhas")
+            base = None
+            for nome, extensao, ler, escrever in casos:
+                caminho = os.path.join(diretorio, f"vendas.{extensao}")
+                escrita, _ = _medir(lambda: escrever(caminho), 1)
+                leitura, _ = _medir(lambda: ler(caminho), 1)
+                tamanho = os.path.getsize(caminho)
+                if base is None:
+                    base = tamanho
+                resultados.append({
+                    'linhas': int(quantidade),
+                    'formato': nome,
+                    'bytes': tamanho,
+                    'escrita_s': escrita,
+                    'leitura_s': leitura,
+                })
+                print(f"   {nome:<13} {_formatar_bytes(tamanho):>10} ({tamanho / base:6.1%})  "
+                      f"escrita {escrita:7.3f} s  leitura {leitura:7.3f} s")
+                os.remove(caminho)
+            conn.close()
+
+    return resultados
+
+def benchmark_relatorio_mensal(db_path='empresa.db', quantidade=1_000_000, repeticoes=3):
+    """Relatórios por mês/dia com strftime() sobre data_venda × colunas da migração 8"""
+    import math
+    import sqlite3
+    import tempfile
+    from migracoes import MIGRACOES, criar_colunas_data_venda
+
+    consultas = {
+        'vendas por mês': (
+            "SELECT strftime('%Y-%m', data_venda) AS mes, COUNT(*), SUM(total) FROM vendas "
+            "GROUP BY strftime('%Y-%m', data_venda) ORDER BY mes",
+            "SELECT mes_venda AS mes, COUNT(*), SUM(total) FROM vendas "
+            "GROUP BY mes_venda ORDER BY mes",
+        ),
+        'últimos 6 meses': (
+            "SELECT strftime('%Y-%m', data_venda) AS mes, COUNT(*), SUM(total) FROM vendas "
+            "WHERE date(data_venda) >= date(:fim, '-6 months') "
+            "GROUP BY strftime('%Y-%m', data_venda)",
+            "SELECT mes_venda AS mes, COUNT(*), SUM(total) FROM vendas "
+            "WHERE mes_venda >= strftime('%Y-%m', date(:fim, '-6 months')) "
+            "AND data_venda_epoch >= CAST(strftime('%s', date(:fim, '-6 months')) AS INTEGER) "
+            "GROUP BY mes_venda",
+        ),
+        'últimos 10 dias': (
+            "SELECT DATE(data_venda) AS data, COUNT(*), SUM(total) FROM vendas "
+            "GROUP BY DATE(data_venda) ORDER BY data DESC LIMIT 10",
+            "SELECT dia_venda AS data, COUNT(*), SUM(total) FROM vendas "
+            "GROUP BY dia_venda ORDER BY data DESC LIMIT 10",
+        ),
+    }
+    indices_data = [passo for versao, _, passos in MIGRACOES if versao == 8
+                    for passo in passos if isinstance(passo, str) and 'CREATE INDEX' in passo]
+
+    resultados = []
+    print(f"📅 BENCHMARK DOS RELATÓRIOS POR DATA ({quantidade:,} vendas)")
+    print("=" * 78)
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        banco = os.path.join(diretorio, 'vendas.db')
+        _banco_vendas(db_path, int(quantidade), banco)
+        conn = sqlite3.connect(banco)
+        try:
+            fim = conn.execute("SELECT MAX(data_venda) FROM vendas").fetchone()[0]
+            antes = {}
+            for nome, (sql, _) in consultas.items():
+                antes[nome], esperado = _medir(lambda: conn.execute(sql, {'fim': fim}).fetchall(),
+                                               repeticoes)
+                antes[nome] = (antes[nome], esperado)
+
+            inicio = time.perf_counter()
+            criar_colunas_data_venda(conn)
+            for sql in indices_data:
+                conn.execute(sql)
+            conn.commit()
+            print(f"🔧 Colunas e índices criados em {time.perf_counter() - inicio:.1f} s")
+
+            for nome, (_, sql) in consultas.items():
+                depois, obtido = _medir(lambda: conn.execute(sql, {'fim': fim}).fetchall(),
+                                        repeticoes)
+                tempo_antes, esperado = antes[nome]
+                # Somas de REAL em outra ordem diferem nas últimas casas
+                iguais = len(obtido) == len(esperado) and all(
+                    a == b or math.isclose(a, b, rel_tol=1e-9)
+                    for linha_a, linha_b in zip(obtido, esperado) for a, b in zip(linha_a, linha_b))
+                resultados.append({'consulta': nome, 'antes_s': tempo_antes, 'depois_s': depois,
+                                   'mesmo_resultado': iguais})
+                print(f"   {nome:<17} strftime {tempo_antes * 1000:8.1f} ms → "
+                      f"colunas {depois * 1000:7.1f} ms ({tempo_antes / depois:5.1f}x)"
+                      f"{'' if iguais else '  ⚠️ resultados diferentes'}")
+        finally:
+            conn.close()
+
+    return resultados
+
+def benchmark_lote_vendas(db_path='empresa.db', quantidade=5000):
+    """Vendas gravadas uma a uma (um COMMIT por venda) × lote de /api/vendas/batch"""
+    import random
+    import sqlite3
+    from banco_dados import DatabaseWriter, PRAGMAS_ESCRITA, imagem_temporaria
+    from lote_vendas import gravar_lote, validar_vendas, COLUNAS_VENDA
+
+    conn = sqlite3.connect(db_path)
+    funcionarios = [row[0] for row in conn.execute("SELECT id FROM funcionarios WHERE ativo = 1")]
+    produtos = [row[0] for row in conn.execute("SELECT id FROM produtos WHERE ativo = 1")]
+    conn.close()
+    rng = random.Random(42)
+    vendas = [{'funcionario_id': rng.choice(funcionarios), 'produto_id': rng.choice(produtos),
+               'quantidade': rng.randint(1, 10), 'metodo_pagamento': 'PIX'}
+              for _ in range(int(quantidade))]
+
+    print(f"🧾 BENCHMARK DA INSERÇÃO DE VENDAS ({len(vendas):,} vendas)")
+    print("=" * 78)
+    tempos = {}
+
+    with imagem_temporaria(db_path) as banco:
+        conn = sqlite3.connect(banco, isolation_level=None)
+        for pragma in PRAGMAS_ESCRITA:
+            conn.execute(pragma)
+        inicio = time.perf_counter()
+        for venda in vendas:
+            # Caminho de hoje: consulta o cadastro e grava cada venda em sua transação
+            conn.execute("BEGIN IMMEDIATE")
+            _, linhas = validar_vendas(conn, [venda])
+            conn.execute(f"INSERT INTO vendas ({', '.join(COLUNAS_VENDA)}) "
+                         f"VALUES ({', '.join(':' + c for c in COLUNAS_VENDA)})", linhas[0][1])
+            conn.execute("COMMIT")
+        tempos['uma a uma'] = time.perf_counter() - inicio
+        conn.close()
+
+    with imagem_temporaria(db_path) as banco:
+        escritor = DatabaseWriter(banco)
+        inicio = time.perf_counter()
+        _, inseridas = gravar_lote(escritor, vendas)
+        tempos['lote'] = time.perf_counter() - inicio
+        escritor.close()
+        assert inseridas == len(vendas)
+
+    for nome, segundos in tempos.items():
+        print(f"   {nome:<10} {segundos * 1000:9.1f} ms  ({len(vendas) / segundos:10,.0f} vendas/s)")
+    print(f"⚡ Lote {tempos['uma a uma'] / tempos['lote']:.1f}x mais rápido")
+    return tempos
+
+BENCHMARKS = {
+    'compressao': benchmark_compressao,
+    'serializacao': benchmark_serializacao,
+    'formatos': benchmark_formatos,
+    'relatorio_mensal': benchmark_relatorio_mensal,
+    'lote_vendas': benchmark_lote_vendas,
+}
+
+if __name__ == "__main__":
+    nome = sys.argv[1] if len(sys.argv) > 1 else None
+    if nome not in BENCHMARKS:
+        print(f"Uso: python benchmark.py <{'|'.join(BENCHMARKS)}> [db]")
+        sys.exit(1)
+
+    BENCHMARKS[nome](*sys.argv[2:3])
@@ -0,0 +1,163 @@
+import re
+import sys
+from banco_dados import conectar_leitura, obter_escritor
+
+# Índices de busca textual (FTS5) de cada tabela: colunas indexadas e a
+# coluna mostrada como descrição no resultado. As tabelas virtuais são de
+# conteúdo externo (content=<tabela>): guardam só o índice invertido e leem
+# o texto da própria tabela, mantidas em sincronia pelos triggers abaixo.
+INDICES_BUSCA = {
+    'funcionarios': {
+        'colunas': ('nome', 'email', 'cargo', 'departamento'),
+        'descricao': 'cargo',
+    },
+    'clientes': {
+        'colunas': ('nome', 'email', 'cidade'),
+        'descricao': 'cidade',
+    },
+    'produtos': {
+        'colunas': ('nome', 'categoria', 'fornecedor'),
+        'descricao': 'categoria',
+    },
+}
+
+# unicode61 com remove_diacritics 2: "fabio" encontra "Fábio" e "monica" encontra "Mônica";
+# prefix='2 3' mantém índices de prefixo para as buscas digitadas (ex.: "jo*")
+TOKENIZADOR = "unicode61 remove_diacritics 2"
+PREFIXOS_INDEXADOS = '2 3'
+
+# Peso de cada coluna no bm25: o nome pesa mais que os demais campos
+PESO_NOME = 10.0
+PESO_OUTRAS = 1.0
+
+MAXIMO_TERMOS = 10
+
+def tabela_busca(tabela):
+    """Nome da tabela FTS5 de `tabela` (prefixo busca_, fora das exportações)"""
+    return f"busca_{tabela}"
+
+def _sql_tabela_fts(tabela):
+    colunas = ', '.join(INDICES_BUSCA[tabela]['colunas'])
+    return f'''
+        CREATE VIRTUAL TABLE IF NOT EXISTS {tabela_busca(tabela)} USING fts5(
+            {colunas},
+            content='{tabela}', content_rowid='id',
+            tokenize='{TOKENIZADOR}', prefix='{PREFIXOS_INDEXADOS}'
+        )
+    '''
+
+def _sql_comandos_fts(tabela, ref, remover):
+    """INSERT no índice da linha `ref` (NEW/OLD); com `remover`, o comando 'delete'"""
+    fts = tabela_busca(tabela)
+    colunas = INDICES_BUSCA[tabela]['colunas']
+    valores = ', '.join(f"{ref}.{coluna}" for coluna in colunas)
+    if remover:
+        return (f"INSERT INTO {fts} ({fts}, rowid, {', '.join(colunas)}) "
+                f"VALUES ('delete', {ref}.id, {valores});")
+    return f"INSERT INTO {fts} (rowid, {', '.join(colunas)}) VALUES ({ref}.id, {valores});"
+
+def _sql_triggers_fts(tabela):
+    colunas = ', '.join(INDICES_BUSCA[tabela]['colunas'])
+    fts = tabela_busca(tabela)
+    return [
+        f'''
+        CREATE TRIGGER IF NOT EXISTS trg_{fts}_insert AFTER INSERT ON {tabela}
+        BEGIN
+            {_sql_comandos_fts(tabela, 'NEW', False)}
+        END
+        ''',
+        f'''
+        CREATE TRIGGER IF NOT EXISTS trg_{fts}_delete AFTER DELETE ON {tabela}
+        BEGIN
+            {_sql_comandos_fts(tabela, 'OLD', True)}
+        END
+        ''',
+        # Só alterações nas colunas indexadas (ou no id) tocam o índice
+        f'''
+        CREATE TRIGGER IF NOT EXISTS trg_{fts}_update AFTER UPDATE OF id, {colunas} ON {tabela}
+        BEGIN
+            {_sql_comandos_fts(tabela, 'OLD', True)}
+            {_sql_comandos_fts(tabela, 'NEW', False)}
+        END
+        ''',
+    ]
+
+def criar_busca(conn):
+    """Cria as tabelas FTS5, os triggers e indexa as linhas existentes"""
+    for tabela in INDICES_BUSCA:
+        conn.execute(_sql_tabela_fts(tabela))
+        for sql in _sql_triggers_fts(tabela):
+            conn.execute(sql)
+    reconstruir_busca(conn)
+
+def reconstruir_busca(conn, tabelas=None):
+    """Reindexa as tabelas a partir do conteúdo atual e compacta o índice"""
+    for tabela in tabelas or INDICES_BUSCA:
+        fts = tabela_busca(tabela)
+        conn.execute(f"INSERT INTO {fts} ({fts}) VALUES ('rebuild')")
+        conn.execute(f"INSERT INTO {fts} ({fts}) VALUES ('optimize')")
+
+def expressao_busca(texto, coluna=None):
+    """Converte o texto digitado em uma expressão MATCH segura
+
+    Cada palavra vira uma frase entre aspas com busca por prefixo ("jo"*),
+    e todas precisam aparecer (AND). Operadores e aspas do texto são
+    descartados, então a entrada do usuário nunca quebra a sintaxe do FTS5.
+    Com `coluna`, só essa coluna é pesquisada. Retorna None se não houver
+    nenhuma palavra.
+    """
+    termos = re.findall(r'\w+', texto or '')[:MAXIMO_TERMOS]
+    if not termos:
+        return None
+    expressao = ' '.join(f'"{termo}"*' for termo in termos)
+    return f"{coluna} : ({expressao})" if coluna else expressao
+
+def consulta_busca(tipos):
+    """SELECT com os resultados de `tipos` (uma subconsulta por tabela) e o rank bm25
+
+    A expressão MATCH é um parâmetro por tipo; o resultado tem as colunas
+    tipo, id, nome, descricao e rank (menor é mais relevante).
+    """
+    partes = []
+    for tabela in tipos:
+        indice = INDICES_BUSCA[tabela]
+        fts = tabela_busca(tabela)
+        pesos = ', '.join(str(PESO_NOME if coluna == 'nome' else PESO_OUTRAS)
+                          for coluna in indice['colunas'])
+        partes.append(f'''
+            SELECT '{tabela}' AS tipo, t.id, t.nome, t.{indice['descricao']} AS descricao,
+                   bm25({fts}, {pesos}) AS rank
+            FROM {fts} JOIN {tabela} t ON t.id = {fts}.rowid
+            WHERE {fts} MATCH ?
+        ''')
+    return f"SELECT * FROM ({' UNION ALL '.join(partes)})"
+
+def buscar(conn, texto, tipos=None, limite=20):
+    """Resultados mais relevantes para `texto`: [(tipo, id, nome, descricao, rank)]"""
+    expressao = expressao_busca(texto)
+    if expressao is None:
+        return []
+    tipos = tipos or list(INDICES_BUSCA)
+    sql = consulta_busca(tipos) + " ORDER BY rank, tipo, id LIMIT ?"
+    return [tuple(row) for row in conn.execute(sql, [expressao] * len(tipos) + [limite])]
+
+if __name__ == "__main__":
+    argumentos = [a for a in sys.argv[1:] if not a.startswith('--')]
+    comando = argumentos[0] if argumentos else 'reconstruir'
+
+    if comando == 'buscar':
+        texto = ' '.join(argumentos[1:])
+        conn = conectar_leitura(row_factory=False)
+        try:
+            resultados = buscar(conn, texto)
+        finally:
+            conn.close()
+        print(f"🔍 {len(resultados)} resultado(s) para '{texto}'")
+        for tipo, id_, nome, descricao, _ in resultados:
+            print(f"  {tipo:<12} #{id_:<6} {nome} ({descricao})")
+    else:
+        db_path = argumentos[1] if len(argumentos) > 1 else 'empresa.db'
+        print("🔄 Reconstruindo índices de busca (FTS5)...")
+        with obter_escritor(db_path).transacao() as conn:
+            reconstruir_busca(conn)
+        print(f"✅ Índices reconstruídos: {', '.join(map(tabela_busca, INDICES_BUSCA))}")
@@ -0,0 +1,127 @@
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from flask import request, make_response
+
+class ResponseCache:
+    """Cache LRU em memória para respostas das rotas somente leitura
+
+    Cada entrada guarda o token de versão do banco de quando foi gerada;
+    se o token atual for diferente, a entrada é descartada. Assim o cache
+    nunca serve dados anteriores a uma escrita, e o TTL limita o resto.
+    """
+
+    def __init__(self, token_func, tamanho_maximo=256, ttl=60):
+        self.token_func = token_func
+        self.tamanho_maximo = tamanho_maximo
+        self.ttl = ttl  # segundos
+
+        self._entradas = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {
+            'hits': 0,
+            'misses': 0,
+            'invalidacoes': 0,
+            'expiradas': 0,
+            'removidas_lru': 0,
+        }
+
+    def get(self, chave, token):
+        """Retorna a entrada válida para a chave, ou None"""
+        with self._lock:
+            entrada = self._entradas.get(chave)
+            if entrada is None:
+                self._stats['misses'] += 1
+                return None
+
+            if entrada['token'] != token:
+                motivo = 'invalidacoes'
+            elif time.monotonic() > entrada['expira_em']:
+                motivo = 'expiradas'
+            else:
+                self._entradas.move_to_end(chave)
+                self._stats['hits'] += 1
+                return entrada
+
+            del self._entradas[chave]
+            self._stats[motivo] += 1
+            self._stats['misses'] += 1
+            return None
+
+    def set(self, chave, token, dados, ttl=None):
+        """Guarda uma entrada, removendo as menos usadas se necessário"""
+        entrada = dict(dados, token=token, variantes={},
+                       expira_em=time.monotonic() + (ttl or self.ttl))
+        with self._lock:
+            self._entradas[chave] = entrada
+            self._entradas.move_to_end(chave)
+            while len(self._entradas) > self.tamanho_maximo:
+                self._entradas.popitem(last=False)
+                self._stats['removidas_lru'] += 1
+
+    def get_variante(self, chave, token, codificacao):
+        """Corpo já comprimido com `codificacao` para a entrada, se existir"""
+        with self._lock:
+            entrada = self._entradas.get(chave)
+            if entrada is None or entrada['token'] != token:
+                return None
+            return entrada['variantes'].get(codificacao)
+
+    def set_variante(self, chave, token, codificacao, corpo):
+        """Guarda a versão comprimida do corpo junto da entrada"""
+        with self._lock:
+            entrada = self._entradas.get(chave)
+            if entrada is not None and entrada['token'] == token:
+                entrada['variantes'][codificacao] = corpo
+
+    def clear(self):
+        """Esvazia o cache"""
+        with self._lock:
+            self._entradas.clear()
+
+    def stats(self):
+        """Contadores de uso do cache"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entradas'] = len(self._entradas)
+        stats['tamanho_maximo'] = self.tamanho_maximo
+        stats['ttl'] = self.ttl
+        consultas = stats['hits'] + stats['misses']
+        stats['taxa_acerto'] = round(stats['hits'] / consultas, 3) if consultas else 0.0
+        return stats
+
+    def chave_requisicao(self):
+        """Chave do cache: rota + parâmetros da query string em ordem estável"""
+        args = sorted(request.args.items(multi=True))
+        return request.path + '?' + '&'.join(f"{k}={v}" for k, v in args)
+
+    def cached(self, ttl=None):
+        """Decorator que serve a rota do cache enquanto o banco não mudar"""
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                chave = self.chave_requisicao()
+                token = self.token_func()
+                if token is not None:
+                    entrada = self.get(chave, token)
+                    if entrada is not None:
+                        resposta = make_response(entrada['corpo'], entrada['status'])
+                        resposta.mimetype = entrada['mimetype']
+                        resposta.headers['X-Cache'] = 'HIT'
+                        resposta.chave_cache = (chave, token)
+                        return resposta
+
+                resposta = make_response(view(*args, **kwargs))
+                # Só respostas completas de sucesso entram no cache
+                if token is not None and resposta.status_code == 200 and not resposta.is_streamed:
+                    self.set(chave, token, {
+                        'corpo': resposta.get_data(),
+                        'status': resposta.status_code,
+                        'mimetype': resposta.mimetype,
+                    }, ttl)
+                    resposta.headers['X-Cache'] = 'MISS'
+                    resposta.chave_cache = (chave, token)
+                return resposta
+            return wrapper
+        return decorator
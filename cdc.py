@@ -0,0 +1,202 @@
+import sys
+import sqlite3
+from datetime import datetime
+from banco_dados import conectar_leitura, obter_escritor
+
+# Tabelas de dados cujas alterações são registradas no changelog
+TABELAS_CDC = ('funcionarios', 'produtos', 'clientes', 'vendas')
+
+OPERACOES = {'I': 'inseridos', 'U': 'alterados', 'D': 'removidos'}
+
+# Entradas mantidas por `python cdc.py podar` enquanto não há consumidor registrado
+RETENCAO_SEM_CONSUMIDOR = 100_000
+
+def _sql_trigger_cdc(tabela, evento):
+    if evento == 'INSERT':
+        corpo = f"INSERT INTO changelog (tabela, linha_id, operacao) VALUES ('{tabela}', NEW.id, 'I');"
+    elif evento == 'DELETE':
+        corpo = f"INSERT INTO changelog (tabela, linha_id, operacao) VALUES ('{tabela}', OLD.id, 'D');"
+    else:
+        # Se o id mudou, a linha antiga deixa de existir
+        corpo = f'''
+            INSERT INTO changelog (tabela, linha_id, operacao)
+            SELECT '{tabela}', OLD.id, 'D' WHERE OLD.id IS NOT NEW.id;
+            INSERT INTO changelog (tabela, linha_id, operacao) VALUES ('{tabela}', NEW.id, 'U');
+        '''
+    return f'''
+        CREATE TRIGGER IF NOT EXISTS trg_cdc_{tabela}_{evento.lower()}
+        AFTER {evento} ON {tabela}
+        BEGIN
+            {corpo}
+        END
+    '''
+
+def criar_changelog(conn):
+    """Cria o changelog, a tabela de posições dos consumidores e os triggers"""
+    # AUTOINCREMENT: seq nunca é reutilizado, mesmo depois da poda
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS changelog (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            tabela TEXT NOT NULL,
+            linha_id INTEGER,
+            operacao TEXT NOT NULL CHECK (operacao IN ('I', 'U', 'D')),
+            registrado_em DATETIME NOT NULL DEFAULT (strftime('%Y-%m-%d %H:%M:%S', 'now'))
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS cdc_posicoes (
+            consumidor TEXT NOT NULL PRIMARY KEY,
+            ultimo_seq INTEGER NOT NULL,
+            atualizado_em DATETIME NOT NULL
+        )
+    ''')
+    for tabela in TABELAS_CDC:
+        for evento in ('INSERT', 'UPDATE', 'DELETE'):
+            conn.execute(_sql_trigger_cdc(tabela, evento))
+
+def ultimo_seq(conn):
+    """Maior seq já registrado (0 se o changelog estiver vazio)"""
+    row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'changelog'").fetchone()
+    return row[0] if row else 0
+
+def ler_mudancas(conn, desde_seq, limite=None):
+    """Mudanças com seq > desde_seq, em ordem: [(seq, tabela, linha_id, operacao)]"""
+    sql = "SELECT seq, tabela, linha_id, operacao FROM changelog WHERE seq > ? ORDER BY seq"
+    params = [desde_seq]
+    if limite:
+        sql += " LIMIT ?"
+        params.append(limite)
+    return [tuple(row) for row in conn.execute(sql, params)]
+
+def resumir_mudancas(mudancas):
+    """Agrupa as mudanças por tabela: {tabela: {'I': n, 'U': n, 'D': n}}"""
+    resumo = {}
+    for _, tabela, _, operacao in mudancas:
+        contagem = resumo.setdefault(tabela, {'I': 0, 'U': 0, 'D': 0})
+        contagem[operacao] += 1
+    return resumo
+
+def mudancas_confirmaveis(mudancas, falhas):
+    """Mudanças que podem ser confirmadas quando as tabelas `falhas` não foram exportadas
+
+    Só o trecho antes da primeira mudança de uma tabela com falha: a
+    posição do consumidor não passa dela, então essas mudanças (e as
+    seguintes, reexportadas sem prejuízo) voltam na próxima leitura.
+    """
+    for indice, (_, tabela, _, _) in enumerate(mudancas):
+        if tabela in falhas:
+            return mudancas[:indice]
+    return mudancas
+
+def descrever_contagem(contagem):
+    """Texto curto da contagem de uma tabela, ex.: "+2 inseridos, ~1 alterados" """
+    sinais = {'I': '+', 'U': '~', 'D': '-'}
+    return ', '.join(f"{sinais[op]}{n} {OPERACOES[op]}" for op, n in contagem.items() if n)
+
+class ConsumidorCDC:
+    """Lê o changelog a partir da última posição confirmada pelo consumidor
+
+    A posição (high-water mark) fica gravada em cdc_posicoes, então um
+    consumidor reiniciado continua de onde parou. Na primeira execução o
+    consumidor começa do fim do changelog. Ao confirmar, as entradas que
+    todos os consumidores já leram são removidas; enquanto nenhum
+    consumidor estiver registrado nada é removido e o changelog só cresce
+    (use `python cdc.py podar` para limitar o tamanho).
+    """
+
+    def __init__(self, db_path='empresa.db', nome='exportador'):
+        self.db_path = db_path
+        self.nome = nome
+        self.posicao = None
+
+    def _carregar_posicao(self):
+        conn = conectar_leitura(self.db_path, row_factory=False)
+        try:
+            row = conn.execute(
+                "SELECT ultimo_seq FROM cdc_posicoes WHERE consumidor = ?", (self.nome,)
+            ).fetchone()
+            if row:
+                return row[0]
+            posicao = ultimo_seq(conn)
+        finally:
+            conn.close()
+
+        self._gravar_posicao(posicao)
+        return posicao
+
+    def _gravar_posicao(self, seq):
+        with obter_escritor(self.db_path).transacao() as conn:
+            conn.execute('''
+                INSERT INTO cdc_posicoes (consumidor, ultimo_seq, atualizado_em)
+                VALUES (?, ?, ?)
+                ON CONFLICT (consumidor) DO UPDATE SET
+                    ultimo_seq = excluded.ultimo_seq,
+                    atualizado_em = excluded.atualizado_em
+            ''', (self.nome, seq, datetime.now().strftime('%Y-%m-%d %H:%M:%S')))
+            conn.execute('''
+                DELETE FROM changelog
+                WHERE seq <= (SELECT MIN(ultimo_seq) FROM cdc_posicoes)
+            ''')
+
+    def registrar(self):
+        """Carrega a posição gravada (ou registra o consumidor no fim do changelog)"""
+        if self.posicao is None:
+            self.posicao = self._carregar_posicao()
+        return self.posicao
+
+    def pendentes(self, limite=None):
+        """Mudanças ainda não confirmadas por este consumidor"""
+        self.registrar()
+        conn = conectar_leitura(self.db_path, row_factory=False)
+        try:
+            return ler_mudancas(conn, self.posicao, limite)
+        finally:
+            conn.close()
+
+    def confirmar(self, mudancas):
+        """Marca as mudanças como processadas (avança a posição até a última)"""
+        if not mudancas:
+            return
+        seq = mudancas[-1][0]
+        self._gravar_posicao(seq)
+        self.posicao = seq
+
+def podar_changelog(db_path='empresa.db', manter=RETENCAO_SEM_CONSUMIDOR):
+    """Limita o changelog quando nenhum consumidor está registrado; retorna as removidas
+
+    Com consumidores registrados a poda é feita por eles ao confirmar
+    (só o que todos já leram), então aqui nada é removido.
+    """
+    with obter_escritor(db_path).transacao() as conn:
+        if conn.execute("SELECT 1 FROM cdc_posicoes LIMIT 1").fetchone():
+            return 0
+        return conn.execute("DELETE FROM changelog WHERE seq <= ?",
+                            (ultimo_seq(conn) - manter,)).rowcount
+
+def mostrar_status(db_path='empresa.db'):
+    """Mostra o tamanho do changelog e a posição de cada consumidor"""
+    conn = conectar_leitura(db_path, row_factory=False)
+    try:
+        total = conn.execute("SELECT COUNT(*) FROM changelog").fetchone()[0]
+        fim = ultimo_seq(conn)
+        consumidores = conn.execute(
+            "SELECT consumidor, ultimo_seq, atualizado_em FROM cdc_posicoes ORDER BY consumidor"
+        ).fetchall()
+    except sqlite3.Error as e:
+        print(f"❌ Changelog indisponível (execute migracoes.py): {e}")
+        return
+    finally:
+        conn.close()
+
+    print(f"📜 Changelog: {total} entradas pendentes, último seq {fim}")
+    if not consumidores:
+        print("⚠️ Nenhum consumidor registrado: o changelog não é podado (python cdc.py podar)")
+    for consumidor, seq, atualizado_em in consumidores:
+        print(f"   {consumidor:<20} seq {seq:>8} ({fim - seq} atrás) | {atualizado_em}")
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == 'podar':
+        removidas = podar_changelog(sys.argv[2] if len(sys.argv) > 2 else 'empresa.db')
+        print(f"🧹 {removidas} entradas removidas do changelog")
+    else:
+        mostrar_status(sys.argv[1] if len(sys.argv) > 1 else 'empresa.db')
@@ -0,0 +1,169 @@
+import zlib
+from flask import request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Tipos de conteúdo que valem a pena comprimir
+TIPOS_COMPRIMIVEIS = {
+    'application/json',
+    'application/x-ndjson',
+    'text/html',
+    'text/plain',
+    'text/csv',
+}
+
+class _Gzip:
+    def __init__(self, nivel):
+        self._obj = zlib.compressobj(nivel, zlib.DEFLATED, 31)  # wbits=31: formato gzip
+
+    def comprimir(self, dados):
+        return self._obj.compress(dados)
+
+    def descarregar(self):
+        return self._obj.flush(zlib.Z_SYNC_FLUSH)
+
+    def finalizar(self):
+        return self._obj.flush()
+
+class _Brotli:
+    def __init__(self, nivel):
+        self._obj = brotli.Compressor(quality=nivel)
+
+    def comprimir(self, dados):
+        return self._obj.process(dados)
+
+    def descarregar(self):
+        return self._obj.flush()
+
+    def finalizar(self):
+        return self._obj.finish()
+
+class _Zstd:
+    def __init__(self, nivel):
+        self._obj = zstandard.ZstdCompressor(level=nivel).compressobj()
+
+    def comprimir(self, dados):
+        return self._obj.compress(dados)
+
+    def descarregar(self):
+        return self._obj.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finalizar(self):
+        return self._obj.flush()
+
+def codificadores_disponiveis():
+    """Codificações suportadas, na ordem de preferência do servidor"""
+    codificadores = {}
+    if zstandard is not None:
+        codificadores['zstd'] = (_Zstd, 3)
+    if brotli is not None:
+        codificadores['br'] = (_Brotli, 5)
+    codificadores['gzip'] = (_Gzip, 6)
+    return codificadores
+
+def codificacao_negociada():
+    """Melhor codificação aceita pelo cliente da requisição atual, ou None"""
+    return request.accept_encodings.best_match(list(codificadores_disponiveis()))
+
+def etag_codificada(etag, codificacao):
+    """ETag da representação comprimida (cada codificação tem a sua)"""
+    return f"{etag}-{codificacao}" if codificacao else etag
+
+def comprimir_bytes(dados, codificacao):
+    """Comprime um corpo completo com a codificação informada"""
+    classe, nivel = codificadores_disponiveis()[codificacao]
+    compressor = classe(nivel)
+    return compressor.comprimir(dados) + compressor.finalizar()
+
+def comprimir_stream(pedacos, codificacao):
+    """Comprime um corpo transmitido em pedaços, liberando cada pedaço ao cliente"""
+    classe, nivel = codificadores_disponiveis()[codificacao]
+    compressor = classe(nivel)
+    try:
+        for pedaco in pedacos:
+            if isinstance(pedaco, str):
+                pedaco = pedaco.encode('utf-8')
+            saida = compressor.comprimir(pedaco) + compressor.descarregar()
+            if saida:
+                yield saida
+        yield compressor.finalizar()
+    finally:
+        if hasattr(pedacos, 'close'):
+            pedacos.close()
+
+class CompressaoRespostas:
+    """Comprime as respostas conforme o Accept-Encoding do cliente (zstd, br ou gzip)
+
+    Respostas menores que `limiar` bytes seguem sem compressão. Respostas
+    transmitidas (streaming) são comprimidas pedaço a pedaço. Se a resposta
+    veio do cache de respostas, a versão comprimida também é guardada lá e
+    reaproveitada nas próximas requisições.
+    """
+
+    def __init__(self, app=None, limiar=1024, cache=None):
+        self.limiar = limiar
+        self.cache = cache
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.after_request(self.comprimir)
+
+    def escolher_codificacao(self):
+        """Melhor codificação aceita pelo cliente, ou None"""
+        return codificacao_negociada()
+
+    def comprimir(self, resposta):
+        """after_request: aplica a codificação negociada à resposta"""
+        if resposta.mimetype not in TIPOS_COMPRIMIVEIS:
+            return resposta
+        resposta.vary.add('Accept-Encoding')
+
+        if (resposta.status_code != 200 or resposta.direct_passthrough
+                or 'Content-Encoding' in resposta.headers):
+            return resposta
+
+        codificacao = self.escolher_codificacao()
+        if codificacao is None:
+            return resposta
+
+        if resposta.is_streamed:
+            resposta.response = comprimir_stream(resposta.response, codificacao)
+            resposta.headers.pop('Content-Length', None)
+        else:
+            corpo = resposta.get_data()
+            if len(corpo) < self.limiar:
+                return resposta
+
+            comprimido = self._comprimido_do_cache(resposta, codificacao)
+            if comprimido is None:
+                comprimido = comprimir_bytes(corpo, codificacao)
+                self._guardar_no_cache(resposta, codificacao, comprimido)
+            resposta.set_data(comprimido)
+
+        resposta.headers['Content-Encoding'] = codificacao
+
+        # Cada codificação é uma representação diferente: ETag própria
+        etag, fraca = resposta.get_etag()
+        if etag:
+            resposta.set_etag(etag_codificada(etag, codificacao), weak=fraca)
+        return resposta
+
+    def _comprimido_do_cache(self, resposta, codificacao):
+        chave_cache = getattr(resposta, 'chave_cache', None)
+        if self.cache is None or chave_cache is None:
+            return None
+        return self.cache.get_variante(*chave_cache, codificacao)
+
+    def _guardar_no_cache(self, resposta, codificacao, comprimido):
+        chave_cache = getattr(resposta, 'chave_cache', None)
+        if self.cache is not None and chave_cache is not None:
+            self.cache.set_variante(*chave_cache, codificacao, comprimido)
@@ -64,14 +64,17 @@ def executar_consultas_demo():
     
     # 5. Performance de vendas por mês
     print("\n📈 VENDAS POR MÊS (ÚLTIMOS 6 MESES):")
+    # Colunas mes_venda/data_venda_epoch (migração 8): a faixa em mes_venda usa o
+    # índice e o epoch faz o corte exato no dia, sem strftime() por venda
     cursor.execute('''
-        SELECT strftime('%Y-%m', data_venda) as mes,
+        SELECT mes_venda as mes,
                COUNT(*) as total_vendas,
                ROUND(SUM(total), 2) as receita,
                ROUND(AVG(total), 2) as ticket_medio
         FROM vendas
-        WHERE data_venda >= date('now', '-6 months')
-        GROUP BY strftime('%Y-%m', data_venda)
+        WHERE mes_venda >= strftime('%Y-%m', 'now', '-6 months')
+          AND data_venda_epoch >= CAST(strftime('%s', date('now', '-6 months')) AS INTEGER)
+        GROUP BY mes_venda
         ORDER BY mes DESC
     ''')
     for row in cursor.fetchall():
@@ -130,9 +133,11 @@ def executar_consultas_demo():
     
     # 9. Sazonalidade de vendas
     print("\n🗓️ VENDAS POR DIA DA SEMANA:")
+    # Agrega por dia pelo índice de dia_venda e só depois por dia da semana:
+    # strftime() roda uma vez por dia, não uma vez por venda
     cursor.execute('''
         SELECT 
-            CASE strftime('%w', data_venda)
+            CASE strftime('%w', dia)
                 WHEN '0' THEN 'Domingo'
                 WHEN '1' THEN 'Segunda'
                 WHEN '2' THEN 'Terça'
@@ -141,10 +146,15 @@ def executar_consultas_demo():
                 WHEN '5' THEN 'Sexta'
                 WHEN '6' THEN 'Sábado'
             END as dia_semana,
-            COUNT(*) as total_vendas,
-            ROUND(AVG(total), 2) as ticket_medio
-        FROM vendas
-        GROUP BY strftime('%w', data_venda)
+            SUM(vendas) as total_vendas,
+            ROUND(SUM(receita) / SUM(vendas), 2) as ticket_medio
+        FROM (
+            SELECT dia_venda as dia, COUNT(*) as vendas, SUM(total) as receita
+            FROM vendas
+            WHERE dia_venda IS NOT NULL
+            GROUP BY dia_venda
+        )
+        GROUP BY strftime('%w', dia)
         ORDER BY total_vendas DESC
     ''')
     for row in cursor.fetchall():
@@ -1,4 +1,5 @@
 import sqlite3
+from migracoes import aplicar_migracoes
 import faker
 import random
 from datetime import datetime, timedelta
@@ -11,6 +12,9 @@ def create_database():
     conn = sqlite3.connect('empresa.db')
     cursor = conn.cursor()
     
+    # Modo WAL: leitores (API, exportadores) não ficam bloqueados pelas inserções
+    cursor.execute("PRAGMA journal_mode = WAL")
+    
     # Criar tabela de funcionários
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS funcionarios (
@@ -298,6 +302,9 @@ if __name__ == "__main__":
     inserir_clientes(200)
     inserir_vendas(500)
     
+    # Índices e demais migrações (criados depois da carga, que fica mais rápida)
+    aplicar_migracoes('empresa.db')
+    
     # Mostrar estatísticas
     mostrar_estatisticas()
     
@@ -1,12 +1,20 @@
+import itertools
 import sqlite3
+import sys
+import time
+import unicodedata
+from migracoes import aplicar_migracoes
 import random
 from datetime import datetime, timedelta
 
-def create_database():
+def create_database(db_path='empresa.db'):
     """Cria o banco de dados e as tabelas"""
-    conn = sqlite3.connect('empresa.db')
+    conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
     
+    # Modo WAL: leitores (API, exportadores) não ficam bloqueados pelas inserções
+    cursor.execute("PRAGMA journal_mode = WAL")
+    
     # Criar tabela de funcionários
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS funcionarios (
@@ -83,322 +91,397 @@ def create_database():
     conn.close()
     print("✅ Banco de dados criado com sucesso!")
 
-def gerar_cpf():
+# Quantidades na escala 1; `--escala=N` multiplica todas (escala 20000 ≈ 10M vendas)
+QUANTIDADES_BASE = {'funcionarios': 50, 'produtos': 100, 'clientes': 200, 'vendas': 500}
+
+TAMANHO_LOTE = 10_000  # linhas geradas por vez
+LINHAS_POR_INSERT = 50  # linhas por INSERT ... VALUES (multi-linha)
+TAMANHO_TRANSACAO = 250_000  # linhas por commit (limita o crescimento do WAL)
+
+# Só durante a carga: sem fsync a cada commit e cache grande
+PRAGMAS_CARGA = (
+    "PRAGMA synchronous = OFF",
+    "PRAGMA cache_size = -262144",
+    "PRAGMA temp_store = MEMORY",
+)
+
+PRIMEIROS_NOMES = [
+    'João', 'Maria', 'Pedro', 'Ana', 'Carlos', 'Juliana', 'Roberto', 'Fernanda', 'Marcos',
+    'Luciana', 'Rafael', 'Camila', 'Diego', 'Patrícia', 'Bruno', 'Vanessa', 'Thiago', 'Priscila',
+    'Gabriel', 'Amanda', 'Leonardo', 'Renata', 'Gustavo', 'Sabrina', 'Rodrigo', 'Tatiane',
+    'Vinicius', 'Cristina', 'Eduardo', 'Carla', 'Daniel', 'Mônica', 'Felipe', 'Simone', 'André',
+    'Elaine', 'Maurício', 'Rosângela', 'Alexandre', 'Denise', 'Ricardo', 'Silvia', 'Lucas',
+    'Adriana', 'Fábio', 'Mariana', 'Paulo', 'Viviane', 'Henrique', 'Larissa'
+]
+
+SOBRENOMES = [
+    'Silva', 'Santos', 'Oliveira', 'Costa', 'Pereira', 'Lima', 'Alves', 'Rocha', 'Ferreira',
+    'Martins', 'Souza', 'Rodrigues', 'Barbosa', 'Gomes', 'Cardoso', 'Dias', 'Nascimento',
+    'Moreira', 'Teixeira', 'Ribeiro', 'Castro', 'Araújo', 'Monteiro', 'Cavalcanti', 'Melo',
+    'Freitas', 'Correia', 'Vieira', 'Mendes', 'Batista', 'Ramos', 'Torres', 'Duarte', 'Cunha',
+    'Lopes', 'Barros', 'Franco', 'Moura', 'Nunes', 'Campos', 'Farias', 'Machado', 'Nogueira',
+    'Pinto', 'Godoy', 'Leite', 'Rezende', 'Sales', 'Azevedo', 'Porto'
+]
+
+PREFIXOS_CLIENTES = ['Dr.', 'Dra.', 'Prof.', '', '', '', '', '']
+SUFIXOS_CLIENTES = ['Jr.', 'Filho', 'Neto', '', '', '', '', '']
+
+CARGOS = ['Analista', 'Desenvolvedor', 'Gerente', 'Coordenador', 'Assistente',
+          'Diretor', 'Supervisor', 'Especialista', 'Consultor', 'Técnico']
+
+DEPARTAMENTOS = ['TI', 'Vendas', 'Marketing', 'RH', 'Financeiro',
+                 'Operações', 'Jurídico', 'Suporte', 'Logística']
+
+CIDADES = ['São Paulo', 'Rio de Janeiro', 'Belo Horizonte', 'Salvador', 'Brasília',
+           'Fortaleza', 'Curitiba', 'Recife', 'Porto Alegre', 'Goiânia']
+
+ESTADOS = ['SP', 'RJ', 'MG', 'BA', 'DF', 'CE', 'PR', 'PE', 'RS', 'GO']
+
+ENDERECOS = [
+    'Rua das Flores, 123', 'Av. Paulista, 456', 'Rua do Comércio, 789',
+    'Av. Brasil, 321', 'Rua da Paz, 654', 'Av. Central, 987',
+    'Rua dos Jardins, 147', 'Av. Principal, 258', 'Rua das Pedras, 369',
+    'Av. das Nações, 741', 'Rua XV de Novembro, 852', 'Av. Getúlio Vargas, 963'
+]
+
+DOMINIOS = ['gmail.com', 'hotmail.com', 'yahoo.com.br', 'uol.com.br', 'outlook.com']
+
+DDDS = ['11', '21', '31', '41', '51', '61', '71', '81', '85', '11']
+
+PRODUTOS_BASE = [
+    'Smartphone Samsung Galaxy', 'iPhone Apple', 'Notebook Dell', 'Mouse Logitech',
+    'Teclado Mecânico', 'Monitor LG', 'Headset Gamer', 'Câmera Canon',
+    'Tablet Samsung', 'Impressora HP', 'Roteador TP-Link', 'SSD Kingston',
+    'Camiseta Polo', 'Calça Jeans', 'Tênis Nike', 'Jaqueta de Couro',
+    'Relógio Casio', 'Óculos Ray-Ban', 'Mochila Adidas', 'Carteira Couro',
+    'Mesa de Escritório', 'Cadeira Ergonômica', 'Luminária LED', 'Vaso Decorativo',
+    'Tapete Persa', 'Espelho Grande', 'Quadro Moderno', 'Almofada Decorativa',
+    'Bicicleta Mountain Bike', 'Patins Inline', 'Bola de Futebol', 'Raquete de Tênis',
+    'Halter 5kg', 'Esteira Elétrica', 'Bola de Basquete', 'Luvas de Boxe',
+    'Livro Python Programming', 'Romance Best Seller', 'Revista Tecnologia', 'Dicionário Inglês',
+    'Enciclopédia Britannica', 'Livro de Receitas', 'Manual de JavaScript', 'Biografia Steve Jobs',
+    'Shampoo Pantene', 'Condicionador Loreal', 'Creme Facial Nivea', 'Perfume Natura',
+    'Batom Ruby Rose', 'Base Maybelline', 'Máscara para Cílios', 'Esmalte Colorama',
+    'Café Especial 500g', 'Chocolate Lindt', 'Biscoito Bauducco', 'Refrigerante Coca-Cola',
+    'Água Mineral Crystal', 'Suco Natural Del Valle', 'Cereal Matinal', 'Iogurte Danone'
+]
+
+VARIANTES_PRODUTOS = ['Pro', 'Max', 'Plus', 'Lite', 'Mini', 'Ultra']
+
+CATEGORIAS = ['Eletrônicos', 'Roupas', 'Casa e Jardim', 'Esportes', 'Livros',
+              'Beleza', 'Alimentação', 'Automóveis', 'Brinquedos', 'Ferramentas']
+
+FORNECEDORES = ['Fornecedor A Ltda', 'B&B Distribuidora', 'Mega Suprimentos',
+                'Central de Produtos', 'Distribuidora Sul', 'Norte Atacado']
+
+METODOS_PAGAMENTO = ['Cartão de Crédito', 'Cartão de Débito', 'Dinheiro',
+                     'PIX', 'Boleto', 'Transferência']
+
+# 70% das vendas sem desconto; as demais com 0% a 20% (sorteio uniforme nesta lista)
+DESCONTOS = [0] * 147 + [round(i / 100, 2) for i in range(21)] * 3
+
+COLUNAS_FUNCIONARIOS = (
+    'nome', 'email', 'telefone', 'cpf', 'data_nascimento', 'endereco', 'cidade', 'estado',
+    'cep', 'salario', 'cargo', 'departamento', 'data_contratacao', 'ativo',
+)
+
+COLUNAS_PRODUTOS = (
+    'nome', 'categoria', 'preco', 'custo', 'estoque', 'codigo_barras', 'fornecedor',
+    'data_cadastro', 'ativo',
+)
+
+COLUNAS_CLIENTES = (
+    'nome', 'email', 'telefone', 'cpf', 'data_nascimento', 'endereco', 'cidade', 'estado',
+    'cep', 'data_cadastro', 'ativo',
+)
+
+COLUNAS_VENDAS = (
+    'funcionario_id', 'produto_id', 'quantidade', 'preco_unitario', 'desconto', 'total',
+    'data_venda', 'metodo_pagamento',
+)
+
+def _somas_parciais(posicao, pesos_iniciais):
+    """Soma ponderada de cada bloco de 3 dígitos (000 a 999) na posição informada"""
+    somas = []
+    for valor in range(1000):
+        digitos = (valor // 100, valor // 10 % 10, valor % 10)
+        somas.append(sum(d * (pesos_iniciais - posicao * 3 - i) for i, d in enumerate(digitos)))
+    return somas
+
+# Somas ponderadas pré-calculadas por bloco de 3 dígitos: o CPF sai com 3 consultas
+# por dígito verificador em vez de um laço pelos 9 dígitos
+SOMAS_DV1 = [_somas_parciais(posicao, 10) for posicao in range(3)]
+SOMAS_DV2 = [_somas_parciais(posicao, 11) for posicao in range(3)]
+
+def completar_cpf(base):
+    """CPF com os dígitos verificadores a partir dos 9 primeiros dígitos (inteiro)"""
+    a, b, c = base // 1_000_000, base // 1000 % 1000, base % 1000
+    soma1 = SOMAS_DV1[0][a] + SOMAS_DV1[1][b] + SOMAS_DV1[2][c]
+    dv1 = 0 if soma1 % 11 < 2 else 11 - soma1 % 11
+    soma2 = SOMAS_DV2[0][a] + SOMAS_DV2[1][b] + SOMAS_DV2[2][c] + dv1 * 2
+    dv2 = 0 if soma2 % 11 < 2 else 11 - soma2 % 11
+    return f"{base:09d}{dv1}{dv2}"
+
+def gerar_cpf(rng=random):
     """Gera um CPF fictício válido"""
-    def calcular_digito(cpf, peso):
-        soma = sum(int(cpf[i]) * peso[i] for i in range(len(peso)))
-        resto = soma % 11
-        return 0 if resto < 2 else 11 - resto
-    
-    # Gera os 9 primeiros dígitos
-    cpf = [random.randint(0, 9) for _ in range(9)]
-    
-    # Calcula o primeiro dígito verificador
-    peso1 = [10, 9, 8, 7, 6, 5, 4, 3, 2]
-    cpf.append(calcular_digito(cpf, peso1))
-    
-    # Calcula o segundo dígito verificador
-    peso2 = [11, 10, 9, 8, 7, 6, 5, 4, 3, 2]
-    cpf.append(calcular_digito(cpf, peso2))
-    
-    return ''.join(map(str, cpf))
+    return completar_cpf(rng.randrange(10 ** 9))
+
+def cpf_sequencial(indice, deslocamento=0):
+    """CPF válido e único para cada índice (permutação dos 9 primeiros dígitos)
+
+    387420489 (3^18) não tem fatores 2 nem 5, então i -> i * 3^18 mod 10^9
+    é uma bijeção: índices diferentes nunca geram o mesmo CPF.
+    """
+    return completar_cpf((indice * 387420489 + deslocamento) % 10 ** 9)
 
-def gerar_email(nome):
+def slug_nome(nome):
+    """Parte local do email a partir do nome (sem acentos, pontos no lugar de espaços)"""
+    sem_acentos = unicodedata.normalize('NFKD', nome).encode('ascii', 'ignore').decode()
+    return '.'.join(parte.strip('.') for parte in sem_acentos.lower().split() if parte.strip('.'))
+
+def gerar_email(nome, rng=random):
     """Gera um email baseado no nome"""
-    dominios = ['gmail.com', 'hotmail.com', 'yahoo.com.br', 'uol.com.br', 'outlook.com']
-    nome_limpo = nome.lower().replace(' ', '.').replace('ç', 'c').replace('ã', 'a').replace('á', 'a').replace('é', 'e').replace('í', 'i').replace('ó', 'o').replace('ú', 'u')
-    return f"{nome_limpo}@{random.choice(dominios)}"
+    return f"{slug_nome(nome)}@{rng.choice(DOMINIOS)}"
 
-def gerar_telefone():
+def gerar_telefone(rng=random):
     """Gera um número de telefone brasileiro"""
-    ddd = random.choice(['11', '21', '31', '41', '51', '61', '71', '81', '85', '11'])
-    numero = f"9{random.randint(1000, 9999)}{random.randint(1000, 9999)}"
-    return f"({ddd}) {numero[:5]}-{numero[5:]}"
+    return f"({rng.choice(DDDS)}) 9{rng.randint(1000, 9999)}-{rng.randint(1000, 9999)}"
 
-def gerar_cep():
+def gerar_cep(rng=random):
     """Gera um CEP fictício"""
-    return f"{random.randint(10000, 99999)}-{random.randint(100, 999)}"
+    return f"{rng.randint(10000, 99999)}-{rng.randint(100, 999)}"
+
+def _sorteios(rng, n):
+    """n inteiros aleatórios de 32 bits gerados de uma vez (random.randbytes, em C)"""
+    return memoryview(rng.randbytes(4 * n)).cast('I')
+
+def _escolher(rng, opcoes, n):
+    """Como rng.choices(opcoes, k=n), mas bem mais rápido em lotes grandes"""
+    quantidade = len(opcoes)
+    return [opcoes[x % quantidade] for x in _sorteios(rng, n)]
+
+def _inteiros(rng, minimo, maximo, n):
+    """n inteiros entre `minimo` e `maximo` (inclusive)"""
+    faixa = maximo - minimo + 1
+    return [minimo + x % faixa for x in _sorteios(rng, n)]
+
+def _reais(rng, minimo, maximo, n):
+    """n valores uniformes entre `minimo` e `maximo`, com 2 casas decimais"""
+    escala = (maximo - minimo) / 2 ** 32
+    return [round(minimo + x * escala, 2) for x in _sorteios(rng, n)]
+
+def _datas(rng, ano_inicial, ano_final, n):
+    """n datas YYYY-MM-DD (dias 1 a 28) entre os anos informados"""
+    dias = [f"{ano}-{mes:02d}-{dia:02d}" for ano in range(ano_inicial, ano_final + 1)
+            for mes in range(1, 13) for dia in range(1, 29)]
+    return _escolher(rng, dias, n)
 
-def inserir_funcionarios(quantidade=50):
+def _telefones(rng, n):
+    return [f"({ddd}) 9{a}-{b}" for ddd, a, b in zip(
+        _escolher(rng, DDDS, n), _inteiros(rng, 1000, 9999, n), _inteiros(rng, 1000, 9999, n))]
+
+def _ceps(rng, n):
+    return [f"{a}-{b}" for a, b in zip(_inteiros(rng, 10000, 99999, n), _inteiros(rng, 100, 999, n))]
+
+def _lotes(gerar_lote, quantidade, tamanho_lote=TAMANHO_LOTE):
+    """Chama gerar_lote(inicio, n) em pedaços de até `tamanho_lote` linhas"""
+    for inicio in range(0, quantidade, tamanho_lote):
+        yield gerar_lote(inicio, min(tamanho_lote, quantidade - inicio))
+
+def conectar_carga(db_path='empresa.db'):
+    """Conexão para a carga em massa, com os PRAGMAs relaxados"""
+    conn = sqlite3.connect(db_path)
+    for pragma in PRAGMAS_CARGA:
+        conn.execute(pragma)
+    return conn
+
+def inserir_em_lotes(conn, tabela, colunas, lotes, ignorar_duplicados=False,
+                     tamanho_transacao=TAMANHO_TRANSACAO):
+    """Insere os lotes com executemany, com um commit a cada `tamanho_transacao` linhas
+
+    Cada INSERT leva LINHAS_POR_INSERT linhas (VALUES (...), (...), ...),
+    o que corta o custo por linha do sqlite3 pela metade. Retorna o número
+    de linhas inseridas (as ignoradas por duplicidade não entram na conta).
+    """
+    ou_ignorar = 'OR IGNORE ' if ignorar_duplicados else ''
+    prefixo = f"INSERT {ou_ignorar}INTO {tabela} ({', '.join(colunas)}) VALUES "
+    linha = f"({', '.join('?' for _ in colunas)})"
+    sql_multiplo = prefixo + ', '.join([linha] * LINHAS_POR_INSERT)
+
+    inseridas = pendentes = 0
+    conn.execute("BEGIN")
+    for lote in lotes:
+        antes = conn.total_changes
+        completas = len(lote) - len(lote) % LINHAS_POR_INSERT
+        conn.executemany(sql_multiplo, (
+            tuple(itertools.chain.from_iterable(lote[i:i + LINHAS_POR_INSERT]))
+            for i in range(0, completas, LINHAS_POR_INSERT)
+        ))
+        conn.executemany(prefixo + linha, lote[completas:])
+        inseridas += conn.total_changes - antes
+        pendentes += len(lote)
+        if pendentes >= tamanho_transacao:
+            conn.execute("COMMIT")
+            conn.execute("BEGIN")
+            pendentes = 0
+    conn.execute("COMMIT")
+    return inseridas
+
+def _proximo_id(conn, tabela):
+    return (conn.execute(f"SELECT MAX(id) FROM {tabela}").fetchone()[0] or 0) + 1
+
+def inserir_funcionarios(conn, quantidade=50, rng=random):
     """Insere funcionários fictícios no banco"""
-    conn = sqlite3.connect('empresa.db')
-    cursor = conn.cursor()
-    
-    nomes = [
-        'João Silva', 'Maria Santos', 'Pedro Oliveira', 'Ana Costa', 'Carlos Pereira',
-        'Juliana Lima', 'Roberto Alves', 'Fernanda Rocha', 'Marcos Ferreira', 'Luciana Martins',
-        'Rafael Souza', 'Camila Rodrigues', 'Diego Barbosa', 'Patrícia Gomes', 'Bruno Cardoso',
-        'Vanessa Dias', 'Thiago Nascimento', 'Priscila Moreira', 'Gabriel Teixeira', 'Amanda Ribeiro',
-        'Leonardo Castro', 'Renata Araújo', 'Gustavo Monteiro', 'Sabrina Cavalcanti', 'Rodrigo Melo',
-        'Tatiane Freitas', 'Vinicius Correia', 'Cristina Vieira', 'Eduardo Mendes', 'Carla Batista',
-        'Daniel Ramos', 'Mônica Torres', 'Felipe Duarte', 'Simone Cunha', 'André Lopes',
-        'Elaine Barros', 'Maurício Franco', 'Rosângela Moura', 'Alexandre Nunes', 'Denise Campos',
-        'Ricardo Farias', 'Silvia Machado', 'Lucas Nogueira', 'Adriana Pinto', 'Fábio Godoy',
-        'Mariana Leite', 'Paulo Rezende', 'Viviane Sales', 'Henrique Azevedo', 'Larissa Porto'
-    ]
-    
-    cargos = ['Analista', 'Desenvolvedor', 'Gerente', 'Coordenador', 'Assistente', 
-              'Diretor', 'Supervisor', 'Especialista', 'Consultor', 'Técnico']
-    
-    departamentos = ['TI', 'Vendas', 'Marketing', 'RH', 'Financeiro', 
-                     'Operações', 'Jurídico', 'Suporte', 'Logística']
-    
-    cidades = ['São Paulo', 'Rio de Janeiro', 'Belo Horizonte', 'Salvador', 'Brasília',
-               'Fortaleza', 'Curitiba', 'Recife', 'Porto Alegre', 'Goiânia']
-    
-    estados = ['SP', 'RJ', 'MG', 'BA', 'DF', 'CE', 'PR', 'PE', 'RS', 'GO']
-    
-    enderecos = [
-        'Rua das Flores, 123', 'Av. Paulista, 456', 'Rua do Comércio, 789',
-        'Av. Brasil, 321', 'Rua da Paz, 654', 'Av. Central, 987',
-        'Rua dos Jardins, 147', 'Av. Principal, 258', 'Rua das Pedras, 369',
-        'Av. das Nações, 741'
-    ]
-    
-    cpfs_usados = set()
-    emails_usados = set()
-    
-    for i in range(min(quantidade, len(nomes))):
-        nome = nomes[i]
-        
-        # Gerar CPF único
-        cpf = gerar_cpf()
-        while cpf in cpfs_usados:
-            cpf = gerar_cpf()
-        cpfs_usados.add(cpf)
-        
-        # Gerar email único
-        email = gerar_email(nome)
-        counter = 1
-        base_email = email
-        while email in emails_usados:
-            email = base_email.replace('@', f'{counter}@')
-            counter += 1
-        emails_usados.add(email)
-        
-        telefone = gerar_telefone()
-        data_nascimento = f"{random.randint(1970, 2000)}-{random.randint(1, 12):02d}-{random.randint(1, 28):02d}"
-        endereco = random.choice(enderecos)
-        cidade = random.choice(cidades)
-        estado = random.choice(estados)
-        cep = gerar_cep()
-        salario = round(random.uniform(2000, 15000), 2)
-        cargo = random.choice(cargos)
-        departamento = random.choice(departamentos)
-        data_contratacao = f"{random.randint(2020, 2024)}-{random.randint(1, 12):02d}-{random.randint(1, 28):02d}"
-        ativo = random.choice([1, 1, 1, 0])  # 75% ativo
-        
-        cursor.execute('''
-            INSERT INTO funcionarios (nome, email, telefone, cpf, data_nascimento,
-                                    endereco, cidade, estado, cep, salario, cargo,
-                                    departamento, data_contratacao, ativo)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (nome, email, telefone, cpf, data_nascimento, endereco, cidade,
-              estado, cep, salario, cargo, departamento, data_contratacao, ativo))
-    
-    conn.commit()
-    conn.close()
-    print(f"✅ {min(quantidade, len(nomes))} funcionários inseridos!")
+    primeiro_id = _proximo_id(conn, 'funcionarios')
+    slugs = {nome: slug_nome(nome) for nome in PRIMEIROS_NOMES + SOBRENOMES}
 
-def inserir_produtos(quantidade=100):
+    def gerar_lote(inicio, n):
+        ids = range(primeiro_id + inicio, primeiro_id + inicio + n)
+        return [
+            (f"{primeiro} {sobrenome}", f"{slugs[primeiro]}.{slugs[sobrenome]}.{i}@{dominio}",
+             telefone, cpf_sequencial(i), nascimento, endereco, cidade, estado, cep, salario,
+             cargo, departamento, contratacao, ativo)
+            for i, primeiro, sobrenome, dominio, telefone, nascimento, endereco, cidade, estado,
+                cep, salario, cargo, departamento, contratacao, ativo in zip(
+                ids, _escolher(rng, PRIMEIROS_NOMES, n), _escolher(rng, SOBRENOMES, n),
+                _escolher(rng, DOMINIOS, n), _telefones(rng, n), _datas(rng, 1970, 2000, n),
+                _escolher(rng, ENDERECOS, n), _escolher(rng, CIDADES, n),
+                _escolher(rng, ESTADOS, n), _ceps(rng, n), _reais(rng, 2000, 15000, n),
+                _escolher(rng, CARGOS, n), _escolher(rng, DEPARTAMENTOS, n),
+                _datas(rng, 2020, 2024, n), _escolher(rng, [1, 1, 1, 0], n))  # 75% ativo
+        ]
+
+    inseridos = inserir_em_lotes(conn, 'funcionarios', COLUNAS_FUNCIONARIOS,
+                                 _lotes(gerar_lote, quantidade), ignorar_duplicados=True)
+    print(f"✅ {inseridos} funcionários inseridos!")
+    return inseridos
+
+def inserir_produtos(conn, quantidade=100, rng=random):
     """Insere produtos fictícios no banco"""
-    conn = sqlite3.connect('empresa.db')
-    cursor = conn.cursor()
-    
-    produtos_base = [
-        'Smartphone Samsung Galaxy', 'iPhone Apple', 'Notebook Dell', 'Mouse Logitech',
-        'Teclado Mecânico', 'Monitor LG', 'Headset Gamer', 'Câmera Canon',
-        'Tablet Samsung', 'Impressora HP', 'Roteador TP-Link', 'SSD Kingston',
-        'Camiseta Polo', 'Calça Jeans', 'Tênis Nike', 'Jaqueta de Couro',
-        'Relógio Casio', 'Óculos Ray-Ban', 'Mochila Adidas', 'Carteira Couro',
-        'Mesa de Escritório', 'Cadeira Ergonômica', 'Luminária LED', 'Vaso Decorativo',
-        'Tapete Persa', 'Espelho Grande', 'Quadro Moderno', 'Almofada Decorativa',
-        'Bicicleta Mountain Bike', 'Patins Inline', 'Bola de Futebol', 'Raquete de Tênis',
-        'Halter 5kg', 'Esteira Elétrica', 'Bola de Basquete', 'Luvas de Boxe',
-        'Livro Python Programming', 'Romance Best Seller', 'Revista Tecnologia', 'Dicionário Inglês',
-        'Enciclopédia Britannica', 'Livro de Receitas', 'Manual de JavaScript', 'Biografia Steve Jobs',
-        'Shampoo Pantene', 'Condicionador Loreal', 'Creme Facial Nivea', 'Perfume Natura',
-        'Batom Ruby Rose', 'Base Maybelline', 'Máscara para Cílios', 'Esmalte Colorama',
-        'Café Especial 500g', 'Chocolate Lindt', 'Biscoito Bauducco', 'Refrigerante Coca-Cola',
-        'Água Mineral Crystal', 'Suco Natural Del Valle', 'Cereal Matinal', 'Iogurte Danone'
-    ]
-    
-    categorias = ['Eletrônicos', 'Roupas', 'Casa e Jardim', 'Esportes', 'Livros',
-                  'Beleza', 'Alimentação', 'Automóveis', 'Brinquedos', 'Ferramentas']
-    
-    fornecedores = ['Fornecedor A Ltda', 'B&B Distribuidora', 'Mega Suprimentos',
-                    'Central de Produtos', 'Distribuidora Sul', 'Norte Atacado']
-    
-    codigos_usados = set()
-    
-    for i in range(min(quantidade, len(produtos_base) * 2)):
-        if i < len(produtos_base):
-            nome = produtos_base[i]
-        else:
-            nome = f"{random.choice(produtos_base)} Pro"
-            
-        categoria = random.choice(categorias)
-        custo = round(random.uniform(10, 500), 2)
-        preco = round(custo * random.uniform(1.2, 3.0), 2)  # Margem de 20% a 200%
-        estoque = random.randint(0, 1000)
-        
-        # Gerar código de barras único
-        codigo_barras = f"{random.randint(1000000000000, 9999999999999)}"
-        while codigo_barras in codigos_usados:
-            codigo_barras = f"{random.randint(1000000000000, 9999999999999)}"
-        codigos_usados.add(codigo_barras)
-        
-        fornecedor = random.choice(fornecedores)
-        data_cadastro = f"{random.randint(2022, 2024)}-{random.randint(1, 12):02d}-{random.randint(1, 28):02d}"
-        ativo = random.choice([1, 1, 1, 0])  # 75% ativo
-        
-        cursor.execute('''
-            INSERT INTO produtos (nome, categoria, preco, custo, estoque,
-                                codigo_barras, fornecedor, data_cadastro, ativo)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (nome, categoria, preco, custo, estoque, codigo_barras,
-              fornecedor, data_cadastro, ativo))
-    
-    conn.commit()
-    conn.close()
-    print(f"✅ {min(quantidade, len(produtos_base) * 2)} produtos inseridos!")
+    primeiro_id = _proximo_id(conn, 'produtos')
+    variantes = [f"{nome} {variante}" for nome in PRODUTOS_BASE for variante in VARIANTES_PRODUTOS]
+
+    def gerar_lote(inicio, n):
+        linhas = []
+        for i, variante, categoria, custo, margem, estoque, fornecedor, cadastro, ativo in zip(
+                range(primeiro_id + inicio, primeiro_id + inicio + n),
+                _escolher(rng, variantes, n), _escolher(rng, CATEGORIAS, n),
+                _reais(rng, 10, 500, n), _reais(rng, 1.2, 3.0, n), _inteiros(rng, 0, 1000, n),
+                _escolher(rng, FORNECEDORES, n), _datas(rng, 2022, 2024, n),
+                _escolher(rng, [1, 1, 1, 0], n)):  # 75% ativo
+            nome = PRODUTOS_BASE[i - 1] if i <= len(PRODUTOS_BASE) else variante
+            preco = round(custo * margem, 2)  # Margem de 20% a 200%
+            # Código de barras único: permutação do id (7919 é primo com 10^10)
+            codigo_barras = f"789{(i * 7919 + 1234567) % 10 ** 10:010d}"
+            linhas.append((nome, categoria, preco, custo, estoque, codigo_barras,
+                           fornecedor, cadastro, ativo))
+        return linhas
+
+    inseridos = inserir_em_lotes(conn, 'produtos', COLUNAS_PRODUTOS,
+                                 _lotes(gerar_lote, quantidade), ignorar_duplicados=True)
+    print(f"✅ {inseridos} produtos inseridos!")
+    return inseridos
 
-def inserir_clientes(quantidade=200):
+def inserir_clientes(conn, quantidade=200, rng=random):
     """Insere clientes fictícios no banco"""
-    conn = sqlite3.connect('empresa.db')
-    cursor = conn.cursor()
-    
-    nomes_clientes = [
-        'Alice Fernandes', 'Bruno Carvalho', 'Carla Mendes', 'Daniel Rosa', 'Elisa Moura',
-        'Felipe Torres', 'Gabriela Dias', 'Hugo Barbosa', 'Isabela Cruz', 'Jorge Pinto',
-        'Kelly Ramos', 'Luis Monteiro', 'Monica Vidal', 'Nuno Silveira', 'Olga Machado',
-        'Paulo Caldeira', 'Quintino Faria', 'Rita Gonçalves', 'Samuel Braga', 'Tânia Coelho',
-        'Ulisses Vargas', 'Vera Nunes', 'Wagner Freire', 'Ximena Correa', 'Yara Bastos',
-        'Zeca Tavares', 'Abel Fonseca', 'Bianca Leal', 'César Amaral', 'Débora Campos'
-    ]
-    
-    # Expandir lista de nomes
-    prefixos = ['Dr.', 'Dra.', 'Prof.', '']
-    sufixos = ['Jr.', 'Filho', 'Neto', '']
-    
-    nomes_expandidos = []
-    for nome in nomes_clientes:
-        nomes_expandidos.append(nome)
-        nomes_expandidos.append(f"{random.choice(prefixos)} {nome} {random.choice(sufixos)}".strip())
-    
-    cidades = ['São Paulo', 'Rio de Janeiro', 'Belo Horizonte', 'Salvador', 'Brasília',
-               'Fortaleza', 'Curitiba', 'Recife', 'Porto Alegre', 'Goiânia']
-    
-    estados = ['SP', 'RJ', 'MG', 'BA', 'DF', 'CE', 'PR', 'PE', 'RS', 'GO']
-    
-    enderecos = [
-        'Rua das Flores, 123', 'Av. Paulista, 456', 'Rua do Comércio, 789',
-        'Av. Brasil, 321', 'Rua da Paz, 654', 'Av. Central, 987',
-        'Rua dos Jardins, 147', 'Av. Principal, 258', 'Rua das Pedras, 369',
-        'Av. das Nações, 741', 'Rua XV de Novembro, 852', 'Av. Getúlio Vargas, 963'
-    ]
-    
-    cpfs_usados = set()
-    emails_usados = set()
-    
-    for i in range(quantidade):
-        if i < len(nomes_expandidos):
-            nome = nomes_expandidos[i]
-        else:
-            nome = f"{random.choice(nomes_clientes)} {random.randint(1, 999)}"
-        
-        # Email pode ser None para alguns clientes
-        email = None
-        if random.random() > 0.1:  # 90% tem email
-            email = gerar_email(nome)
-            counter = 1
-            base_email = email
-            while email in emails_usados:
-                email = base_email.replace('@', f'{counter}@')
-                counter += 1
-            emails_usados.add(email)
-        
-        # Telefone pode ser None para alguns clientes
-        telefone = gerar_telefone() if random.random() > 0.05 else None  # 95% tem telefone
-        
-        # CPF pode ser None para alguns clientes
-        cpf = None
-        if random.random() > 0.02:  # 98% tem CPF
-            cpf = gerar_cpf()
-            while cpf in cpfs_usados:
-                cpf = gerar_cpf()
-            cpfs_usados.add(cpf)
-        
-        data_nascimento = f"{random.randint(1960, 2005)}-{random.randint(1, 12):02d}-{random.randint(1, 28):02d}"
-        endereco = random.choice(enderecos)
-        cidade = random.choice(cidades)
-        estado = random.choice(estados)
-        cep = gerar_cep()
-        data_cadastro = f"{random.randint(2021, 2024)}-{random.randint(1, 12):02d}-{random.randint(1, 28):02d}"
-        ativo = random.choice([1, 1, 1, 1, 0])  # 80% ativo
-        
-        try:
-            cursor.execute('''
-                INSERT INTO clientes (nome, email, telefone, cpf, data_nascimento,
-                                    endereco, cidade, estado, cep, data_cadastro, ativo)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (nome, email, telefone, cpf, data_nascimento, endereco,
-                  cidade, estado, cep, data_cadastro, ativo))
-        except sqlite3.IntegrityError:
-            # Ignora se email ou CPF já existir
-            pass
-    
-    conn.commit()
-    conn.close()
-    print(f"✅ Clientes inseridos!")
+    primeiro_id = _proximo_id(conn, 'clientes')
+    slugs = {nome: slug_nome(nome) for nome in PRIMEIROS_NOMES + SOBRENOMES}
 
-def inserir_vendas(quantidade=500):
-    """Insere vendas fictícias no banco"""
-    conn = sqlite3.connect('empresa.db')
-    cursor = conn.cursor()
-    
+    def gerar_lote(inicio, n):
+        linhas = []
+        for i, primeiro, sobrenome, prefixo, sufixo, dominio, sorteio, telefone, nascimento, \
+                cadastro, endereco, cidade, estado, cep, ativo in zip(
+                range(primeiro_id + inicio, primeiro_id + inicio + n),
+                _escolher(rng, PRIMEIROS_NOMES, n), _escolher(rng, SOBRENOMES, n),
+                _escolher(rng, PREFIXOS_CLIENTES, n), _escolher(rng, SUFIXOS_CLIENTES, n),
+                _escolher(rng, DOMINIOS, n), _inteiros(rng, 0, 9999, n), _telefones(rng, n),
+                _datas(rng, 1960, 2005, n), _datas(rng, 2021, 2024, n),
+                _escolher(rng, ENDERECOS, n), _escolher(rng, CIDADES, n),
+                _escolher(rng, ESTADOS, n), _ceps(rng, n),
+                _escolher(rng, [1, 1, 1, 1, 0], n)):  # 80% ativo
+            nome = ' '.join(parte for parte in (prefixo, primeiro, sobrenome, sufixo) if parte)
+            # 90% têm email, 95% telefone e 98% CPF (dígitos independentes do sorteio)
+            email = f"{slugs[primeiro]}.{slugs[sobrenome]}.{i}@{dominio}" if sorteio % 10 else None
+            telefone = telefone if sorteio // 10 % 20 else None
+            cpf = cpf_sequencial(i, 500_000_000) if sorteio // 200 % 50 else None
+            linhas.append((nome, email, telefone, cpf, nascimento, endereco, cidade, estado,
+                           cep, cadastro, ativo))
+        return linhas
+
+    inseridos = inserir_em_lotes(conn, 'clientes', COLUNAS_CLIENTES,
+                                 _lotes(gerar_lote, quantidade), ignorar_duplicados=True)
+    print(f"✅ {inseridos} clientes inseridos!")
+    return inseridos
+
+def inserir_vendas(conn, quantidade=500, rng=random, referencia=None):
+    """Insere vendas fictícias no banco (último ano até `referencia`)"""
     # Buscar IDs dos funcionários e produtos ativos
-    cursor.execute("SELECT id FROM funcionarios WHERE ativo = 1")
-    funcionarios_ids = [row[0] for row in cursor.fetchall()]
-    
-    cursor.execute("SELECT id, preco FROM produtos WHERE ativo = 1")
-    produtos = [(row[0], row[1]) for row in cursor.fetchall()]
-    
-    metodos_pagamento = ['Cartão de Crédito', 'Cartão de Débito', 'Dinheiro', 
-                         'PIX', 'Boleto', 'Transferência']
-    
-    for _ in range(quantidade):
-        if not funcionarios_ids or not produtos:
-            break
-            
-        funcionario_id = random.choice(funcionarios_ids)
-        produto_id, preco_produto = random.choice(produtos)
-        quantidade_vendida = random.randint(1, 10)
-        preco_unitario = preco_produto
-        desconto = round(random.uniform(0, 0.2), 2) if random.random() > 0.7 else 0  # 30% chance de desconto
-        total = round(quantidade_vendida * preco_unitario * (1 - desconto), 2)
-        
-        # Gerar data e hora de venda no último ano
-        dias_atras = random.randint(0, 365)
-        data_venda = datetime.now() - timedelta(days=dias_atras)
-        data_venda = data_venda.strftime('%Y-%m-%d %H:%M:%S')
-        
-        metodo_pagamento = random.choice(metodos_pagamento)
-        
-        cursor.execute('''
-            INSERT INTO vendas (funcionario_id, produto_id, quantidade, preco_unitario,
-                              desconto, total, data_venda, metodo_pagamento)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (funcionario_id, produto_id, quantidade_vendida, preco_unitario,
-              desconto, total, data_venda, metodo_pagamento))
-    
-    conn.commit()
-    conn.close()
-    print(f"✅ {quantidade} vendas inseridas!")
+    funcionarios_ids = [row[0] for row in conn.execute("SELECT id FROM funcionarios WHERE ativo = 1")]
+    produtos = conn.execute("SELECT id, preco FROM produtos WHERE ativo = 1").fetchall()
+    if not funcionarios_ids or not produtos:
+        print("⚠️ Sem funcionários ou produtos ativos: nenhuma venda inserida")
+        return 0
+
+    # Datas e horários pré-formatados: a data de cada venda é só uma concatenação
+    referencia = (referencia or datetime.now()).replace(microsecond=0)
+    dias = [(referencia - timedelta(days=d)).strftime('%Y-%m-%d') for d in range(366)]
+    horarios = [f"{s // 3600:02d}:{s // 60 % 60:02d}:{s % 60:02d}" for s in range(86400)]
+    limite_hoje = referencia.hour * 3600 + referencia.minute * 60 + referencia.second
+
+    def gerar_lote(inicio, n):
+        linhas = []
+        for funcionario_id, (produto_id, preco_unitario), quantidade_vendida, desconto, dia, \
+                segundo, metodo in zip(
+                _escolher(rng, funcionarios_ids, n), _escolher(rng, produtos, n),
+                _inteiros(rng, 1, 10, n), _escolher(rng, DESCONTOS, n),
+                _inteiros(rng, 0, 365, n), _inteiros(rng, 0, 86399, n),
+                _escolher(rng, METODOS_PAGAMENTO, n)):
+            if dia == 0:
+                segundo = segundo % (limite_hoje + 1)  # nada depois da referência
+            total = round(quantidade_vendida * preco_unitario * (1 - desconto), 2)
+            linhas.append((funcionario_id, produto_id, quantidade_vendida, preco_unitario,
+                           desconto, total, f"{dias[dia]} {horarios[segundo]}", metodo))
+        return linhas
+
+    inseridas = inserir_em_lotes(conn, 'vendas', COLUNAS_VENDAS,
+                                 _lotes(gerar_lote, quantidade))
+    print(f"✅ {inseridas} vendas inseridas!")
+    return inseridas
+
+def popular_banco(db_path='empresa.db', escala=1, semente=None, referencia=None):
+    """Gera os dados fictícios na escala informada; retorna {tabela: linhas inseridas}
 
-def mostrar_estatisticas():
+    Com a mesma `semente` (e a mesma `referencia` para as datas das vendas)
+    os dados gerados são sempre os mesmos.
+    """
+    rng = random.Random(semente)
+    quantidades = {tabela: max(1, int(n * escala)) for tabela, n in QUANTIDADES_BASE.items()}
+
+    conn = conectar_carga(db_path)
+    try:
+        gatilhos = conn.execute("SELECT COUNT(*) FROM sqlite_master WHERE type = 'trigger'").fetchone()[0]
+        if gatilhos:
+            print(f"⚠️ Banco já migrado: {gatilhos} triggers rodam a cada linha inserida "
+                  f"(a carga fica mais lenta)")
+
+        inicio = time.perf_counter()
+        inseridas = {
+            'funcionarios': inserir_funcionarios(conn, quantidades['funcionarios'], rng),
+            'produtos': inserir_produtos(conn, quantidades['produtos'], rng),
+            'clientes': inserir_clientes(conn, quantidades['clientes'], rng),
+            'vendas': inserir_vendas(conn, quantidades['vendas'], rng, referencia),
+        }
+        segundos = time.perf_counter() - inicio
+    finally:
+        conn.close()
+
+    total = sum(inseridas.values())
+    print(f"⏱️ {total:,} linhas em {segundos:.1f} s ({total / segundos:,.0f} linhas/s)")
+    return inseridas
+
+def mostrar_estatisticas(db_path='empresa.db'):
     """Mostra estatísticas do banco de dados"""
-    conn = sqlite3.connect('empresa.db')
+    conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
     
     print("\n📊 ESTATÍSTICAS DO BANCO DE DADOS:")
@@ -443,17 +526,23 @@ def mostrar_estatisticas():
     conn.close()
 
 if __name__ == "__main__":
+    # --escala=N: N vezes os volumes padrão (50 funcionários, 100 produtos,
+    # 200 clientes e 500 vendas); --semente=S: dados reproduzíveis
+    opcoes = dict(a[2:].split('=', 1) for a in sys.argv[1:] if a.startswith('--') and '=' in a)
+    escala = float(opcoes.get('escala', 1))
+    semente = int(opcoes['semente']) if 'semente' in opcoes else None
+    
     print("🚀 Criando banco de dados com dados fictícios...")
     print("=" * 50)
     
     # Criar banco e tabelas
     create_database()
     
-    # Inserir dados fictícios
-    inserir_funcionarios(50)
-    inserir_produtos(100)
-    inserir_clientes(200)
-    inserir_vendas(500)
+    # Inserir dados fictícios (em massa, com executemany)
+    popular_banco('empresa.db', escala, semente)
+    
+    # Índices e demais migrações (criados depois da carga, que fica mais rápida)
+    aplicar_migracoes('empresa.db')
     
     # Mostrar estatísticas
     mostrar_estatisticas()
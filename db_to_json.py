@@ -1,14 +1,37 @@
+import functools
+import itertools
 import sqlite3
-import json
 import os
+import sys
+import time
 from datetime import datetime
+from banco_dados import conectar_leitura, listar_tabelas, imagem_temporaria, iterar_linhas, sql_exportacao
+from serializacao import salvar_json, salvar_json_stream, arquivo_atomico, escrever_json
+from agendador_exportacao import AgendadorExportacao, mostrar_tempos
+from relacionamentos import RELACIONAMENTOS, exportar_relacionamento
+from formatos_exportacao import obter_formato, exportar_tabela, extensao
 
 class DatabaseToJsonConverter:
     """Conversor de banco de dados SQLite para JSON"""
     
-    def __init__(self, db_path='empresa.db', json_dir='dados_json'):
+    def __init__(self, db_path='empresa.db', json_dir='dados_json', compacto=False,
+                 workers=None, processos=False, snapshot=None, fsync=None, formatos=('json',)):
         self.db_path = db_path
         self.json_dir = json_dir
+        self.compacto = compacto  # JSON sem indentação, para consumo por máquinas
+        self.workers = workers  # tabelas exportadas em paralelo (padrão: núcleos)
+        self.processos = processos  # pool de processos em vez de threads
+        # Exportação consistente entre tabelas: 'transacao' (uma transação de
+        # leitura, em série) ou 'backup' (imagem temporária lida em paralelo)
+        if snapshot not in (None, 'transacao', 'backup'):
+            raise ValueError(f"Modo de snapshot inválido: {snapshot}")
+        self.snapshot = snapshot
+        self.fsync = fsync  # fsync antes de publicar cada arquivo (padrão: JSON_FSYNC)
+        # Formatos de cada tabela: json e, opcionalmente, csv, parquet e feather
+        for formato in formatos:
+            if formato != 'json':
+                obter_formato(formato)
+        self.formatos = tuple(formatos)
         self.ensure_json_directory()
     
     def ensure_json_directory(self):
@@ -17,70 +40,141 @@ class DatabaseToJsonConverter:
             os.makedirs(self.json_dir)
             print(f"📁 Diretório '{self.json_dir}' criado")
     
-    def get_table_data(self, table_name):
-        """Extrai dados de uma tabela específica"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row  # Para acessar colunas por nome
-        cursor = conn.cursor()
+    def get_table_data(self, table_name, conn=None):
+        """Percorre os registros de uma tabela como dicionários (na conexão informada, se houver)
+
+        Os registros são lidos em lotes com fetchmany, então a tabela nunca
+        fica inteira na memória. Um erro de leitura no meio da tabela é
+        repassado a quem consome o gerador: o gravador atômico descarta o
+        temporário em vez de publicar um arquivo truncado.
+        """
+        propria = conn is None
+        if propria:
+            conn = conectar_leitura(self.db_path)
         
         try:
-            cursor.execute(f"SELECT * FROM {table_name}")
-            rows = cursor.fetchall()
-            
-            # Converter Row objects para dicionários
-            data = []
-            for row in rows:
-                data.append(dict(row))
-            
-            return data
+            yield from iterar_linhas(conn.execute(sql_exportacao(conn, table_name)))
         except sqlite3.Error as e:
             print(f"❌ Erro ao acessar tabela {table_name}: {e}")
-            return []
+            raise
         finally:
-            conn.close()
+            if propria:
+                conn.close()
     
-    def save_table_to_json(self, table_name):
-        """Salva uma tabela específica em JSON"""
-        data = self.get_table_data(table_name)
-        
-        if data:
-            filename = os.path.join(self.json_dir, f"{table_name}.json")
-            
-            with open(filename, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False, default=str)
-            
-            print(f"✅ {table_name}: {len(data)} registros salvos em {filename}")
-            return True
+    def save_table_to_json(self, table_name, conn=None):
+        """Salva uma tabela específica em JSON e retorna o número de registros"""
+        data = self.get_table_data(table_name, conn)
+        filename = os.path.join(self.json_dir, f"{table_name}.json")
+        try:
+            primeiro = next(data, None)
+            if primeiro is not None:
+                # Grava em streaming num temporário que substitui o arquivo no final
+                total = salvar_json_stream(filename, itertools.chain([primeiro], data),
+                                           self.compacto, self.fsync)
+        except sqlite3.Error:
+            print(f"⚠️ {table_name}: exportação interrompida, {filename} anterior mantido")
+            return False
+        
+        if primeiro is not None:
+            print(f"✅ {table_name}: {total} registros salvos em {filename}")
+            return total
         else:
             print(f"⚠️ Nenhum dado encontrado para a tabela {table_name}")
             return False
     
+    def save_table_to_format(self, table_name, formato, conn):
+        """Salva uma tabela em CSV, Parquet ou Feather e retorna o número de registros"""
+        filename = os.path.join(self.json_dir, f"{table_name}.{extensao(formato)}")
+        try:
+            total = exportar_tabela(conn, table_name, filename, formato, fsync=self.fsync)
+        except sqlite3.Error as e:
+            print(f"❌ Erro ao acessar tabela {table_name}: {e}")
+            return False
+        print(f"✅ {table_name}: {total} registros salvos em {filename}")
+        return total
+    
+    def save_table(self, table_name, conn=None, db_path=None):
+        """Salva uma tabela em todos os formatos configurados e retorna o número de registros
+
+        Sem `conn`, abre uma conexão própria em `db_path` (padrão: self.db_path).
+        """
+        propria = conn is None
+        if propria:
+            conn = conectar_leitura(db_path or self.db_path)
+            conn.execute("BEGIN")  # todos os formatos do mesmo instante do banco
+        
+        try:
+            total = False
+            for formato in self.formatos:
+                if formato == 'json':
+                    total = self.save_table_to_json(table_name, conn)
+                else:
+                    total = self.save_table_to_format(table_name, formato, conn)
+            return total
+        finally:
+            if propria:
+                conn.close()
+    
     def export_all_tables(self):
         """Exporta todas as tabelas para JSON"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        conn = conectar_leitura(self.db_path, row_factory=False)
         
         # Obter lista de tabelas
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
-        tables = cursor.fetchall()
+        tables = listar_tabelas(conn)
         conn.close()
         
         print("🚀 INICIANDO EXPORTAÇÃO PARA JSON")
         print("=" * 40)
         
-        exported_tables = []
-        for table in tables:
-            table_name = table[0]
-            if self.save_table_to_json(table_name):
-                exported_tables.append(table_name)
+        if self.snapshot == 'transacao':
+            resultados = self.export_in_transaction(tables)
+        elif self.snapshot == 'backup':
+            with imagem_temporaria(self.db_path) as imagem:
+                print(f"📸 Imagem consistente do banco criada em {imagem}")
+                resultados = self.export_parallel(tables, imagem)
+        else:
+            resultados = self.export_parallel(tables)
         
-        # Criar arquivo de resumo
-        self.create_summary_file(exported_tables)
+        exported_tables = [t for t in tables if resultados[t]['registros']]
+        
+        # Criar arquivo de resumo (contagens vindas da própria exportação)
+        self.create_summary_file(exported_tables,
+                                 {t: resultados[t]['registros'] for t in exported_tables})
         
         print(f"\n✅ Exportação concluída! {len(exported_tables)} tabelas exportadas")
         return exported_tables
     
-    def create_summary_file(self, exported_tables):
+    def export_parallel(self, tables, db_path=None):
+        """Exporta as tabelas em paralelo, cada uma em sua própria conexão"""
+        # Workers leem da imagem, se houver; o caminho vai como argumento
+        # (vale também para processos) e self.db_path não muda
+        funcao = functools.partial(self.save_table, db_path=db_path or self.db_path)
+        agendador = AgendadorExportacao(funcao, self.workers, self.processos)
+        try:
+            resultados = agendador.exportar(tables)
+        finally:
+            agendador.encerrar()
+        mostrar_tempos(resultados, agendador.ultima_duracao)
+        return resultados
+    
+    def export_in_transaction(self, tables):
+        """Exporta todas as tabelas em uma única transação de leitura"""
+        resultados = {}
+        conn = conectar_leitura(self.db_path)
+        try:
+            conn.execute("BEGIN")  # todas as leituras veem o mesmo instante do banco
+            for table_name in tables:
+                inicio = time.perf_counter()
+                registros = self.save_table(table_name, conn)
+                resultados[table_name] = {'registros': registros,
+                                          'segundos': time.perf_counter() - inicio}
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+        mostrar_tempos(resultados)
+        return resultados
+    
+    def create_summary_file(self, exported_tables, contagens=None):
         """Cria arquivo de resumo da exportação"""
         summary = {
             "exportacao": {
@@ -93,87 +187,87 @@ class DatabaseToJsonConverter:
         }
         
         # Adicionar estatísticas de cada tabela
+        if contagens is None:
+            contagens = self.count_rows(exported_tables)
+        
         for table in exported_tables:
-            data = self.get_table_data(table)
             summary["estatisticas"][table] = {
-                "total_registros": len(data),
+                "total_registros": contagens[table],
                 "arquivo_json": f"{table}.json"
             }
+            if self.formatos != ('json',):
+                summary["estatisticas"][table]["arquivos"] = [
+                    f"{table}.{extensao(formato)}" for formato in self.formatos
+                ]
         
         summary_file = os.path.join(self.json_dir, "_resumo_exportacao.json")
-        with open(summary_file, 'w', encoding='utf-8') as f:
-            json.dump(summary, f, indent=2, ensure_ascii=False, default=str)
+        salvar_json(summary_file, summary, fsync=self.fsync)
         
         print(f"📊 Resumo salvo em {summary_file}")
     
+    def count_rows(self, tables):
+        """Conta os registros das tabelas (sem carregar os dados)"""
+        conn = conectar_leitura(self.db_path, row_factory=False)
+        try:
+            return {t: conn.execute(f"SELECT COUNT(*) FROM {t}").fetchone()[0] for t in tables}
+        finally:
+            conn.close()
+    
     def create_unified_json(self):
         """Cria um arquivo JSON unificado com todas as tabelas"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        conn = conectar_leitura(self.db_path)
         
         # Obter lista de tabelas
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
-        tables = cursor.fetchall()
-        conn.close()
+        tables = listar_tabelas(conn)
         
+        # Cada tabela é um gerador: o arquivo é gravado tabela a tabela, em streaming
         unified_data = {
             "metadados": {
                 "data_exportacao": datetime.now().isoformat(),
                 "banco_origem": self.db_path,
                 "total_tabelas": len(tables)
             },
-            "dados": {}
+            "dados": {table_name: self.get_table_data(table_name, conn) for table_name in tables}
         }
         
-        for table in tables:
-            table_name = table[0]
-            unified_data["dados"][table_name] = self.get_table_data(table_name)
-        
         unified_file = os.path.join(self.json_dir, "banco_completo.json")
-        with open(unified_file, 'w', encoding='utf-8') as f:
-            json.dump(unified_data, f, indent=2, ensure_ascii=False, default=str)
+        
+        # Uma transação de leitura para todas as tabelas: vendas nunca
+        # referencia um produto que não esteja em produtos
+        try:
+            conn.execute("BEGIN")
+            with arquivo_atomico(unified_file, self.fsync) as f:
+                escrever_json(f, unified_data, self.compacto)
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
         
         print(f"🗂️ Arquivo unificado salvo em {unified_file}")
     
-    def export_with_relationships(self):
-        """Exporta dados com relacionamentos preservados"""
-        # Funcionários com suas vendas
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        
-        funcionarios_vendas = []
-        
-        cursor.execute("SELECT * FROM funcionarios WHERE ativo = 1")
-        funcionarios = cursor.fetchall()
-        
-        for funcionario in funcionarios:
-            func_dict = dict(funcionario)
-            
-            # Buscar vendas do funcionário
-            cursor.execute("""
-                SELECT v.*, p.nome as produto_nome, p.categoria
-                FROM vendas v
-                JOIN produtos p ON v.produto_id = p.id
-                WHERE v.funcionario_id = ?
-                ORDER BY v.data_venda DESC
-            """, (funcionario['id'],))
-            
-            vendas = cursor.fetchall()
-            func_dict['vendas'] = [dict(venda) for venda in vendas]
-            func_dict['total_vendas'] = len(vendas)
-            func_dict['receita_total'] = sum(venda['total'] for venda in vendas)
-            
-            funcionarios_vendas.append(func_dict)
-        
-        conn.close()
+    def export_with_relationships(self, nomes=None):
+        """Exporta dados com relacionamentos preservados (pai com filhos aninhados)"""
+        nomes = nomes or list(RELACIONAMENTOS)
+        conn = conectar_leitura(self.db_path)
         
-        # Salvar dados com relacionamentos
-        rel_file = os.path.join(self.json_dir, "funcionarios_com_vendas.json")
-        with open(rel_file, 'w', encoding='utf-8') as f:
-            json.dump(funcionarios_vendas, f, indent=2, ensure_ascii=False, default=str)
-        
-        print(f"🔗 Dados com relacionamentos salvos em {rel_file}")
+        try:
+            conn.execute("BEGIN")  # todos os relacionamentos do mesmo instante
+            for nome in nomes:
+                rel_file = os.path.join(self.json_dir, f"{nome}.json")
+                with arquivo_atomico(rel_file, self.fsync) as f:
+                    total = exportar_relacionamento(conn, RELACIONAMENTOS[nome], f, self.compacto)
+                print(f"🔗 Dados com relacionamentos salvos em {rel_file} ({total} registros)")
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+
+def criar_json_unificado(converter):
+    """Opção do menu: um erro no arquivo unificado não encerra o menu"""
+    try:
+        converter.create_unified_json()
+    except (sqlite3.Error, OSError) as e:
+        arquivo = os.path.join(converter.json_dir, "banco_completo.json")
+        print(f"❌ Erro ao criar o arquivo unificado: {e}")
+        print(f"⚠️ {arquivo} anterior mantido")
 
 def main():
     """Função principal para executar a conversão"""
@@ -186,7 +280,18 @@ def main():
         print("Execute primeiro o script 'criar_banco_simples.py'")
         return
     
-    converter = DatabaseToJsonConverter()
+    # --compacto: arquivos sem indentação (menores, para consumo por máquinas)
+    # --processos: tabelas exportadas em processos paralelos em vez de threads
+    # --snapshot=transacao|backup: todas as tabelas do mesmo instante do banco
+    # --fsync: arquivos forçados para o disco antes de substituir os antigos
+    # --formatos=json,csv,parquet,feather: formatos de cada tabela (parquet e feather exigem pyarrow)
+    snapshot = next((a.split('=', 1)[1] for a in sys.argv if a.startswith('--snapshot=')), None)
+    formatos = next((a.split('=', 1)[1] for a in sys.argv if a.startswith('--formatos=')), 'json')
+    converter = DatabaseToJsonConverter(compacto='--compacto' in sys.argv,
+                                        processos='--processos' in sys.argv,
+                                        snapshot=snapshot,
+                                        fsync='--fsync' in sys.argv or None,
+                                        formatos=formatos.split(','))
     
     # Menu de opções
     while True:
@@ -204,7 +309,7 @@ def main():
             converter.export_all_tables()
         
         elif opcao == "2":
-            converter.create_unified_json()
+            criar_json_unificado(converter)
         
         elif opcao == "3":
             converter.export_with_relationships()
@@ -214,7 +319,7 @@ def main():
             print("-" * 30)
             converter.export_all_tables()
             print("\n" + "-" * 30)
-            converter.create_unified_json()
+            criar_json_unificado(converter)
             print("\n" + "-" * 30)
             converter.export_with_relationships()
             print("\n✅ Exportação completa finalizada!")
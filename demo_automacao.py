@@ -44,51 +44,51 @@ def demonstrar_automacao():
     # Inserir dados de teste para demonstrar automação
     print("\n3️⃣ Inserindo dados de teste...")
     
-    conn = sqlite3.connect('empresa.db')
-    cursor = conn.cursor()
+    from banco_dados import obter_escritor
+    escritor = obter_escritor('empresa.db')
     
     try:
         for i in range(5):
             print(f"\n📝 Inserindo lote {i+1}/5...")
             
-            # Inserir cliente
-            cursor.execute('''
-                INSERT INTO clientes (nome, email, telefone, cidade, data_cadastro, ativo)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (
-                f'Cliente Demo {i+1} - {datetime.now().strftime("%H:%M:%S")}',
-                f'demo{i+1}_{int(time.time())}@teste.com',
-                f'(11) 9999{i:04d}',
-                ['São Paulo', 'Rio de Janeiro', 'Belo Horizonte', 'Salvador', 'Brasília'][i],
-                datetime.now().strftime('%Y-%m-%d'),
-                1
-            ))
+            with escritor.transacao() as conn:
+                cursor = conn.cursor()
+                
+                # Inserir cliente
+                cursor.execute('''
+                    INSERT INTO clientes (nome, email, telefone, cidade, data_cadastro, ativo)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                ''', (
+                    f'Cliente Demo {i+1} - {datetime.now().strftime("%H:%M:%S")}',
+                    f'demo{i+1}_{int(time.time())}@teste.com',
+                    f'(11) 9999{i:04d}',
+                    ['São Paulo', 'Rio de Janeiro', 'Belo Horizonte', 'Salvador', 'Brasília'][i],
+                    datetime.now().strftime('%Y-%m-%d'),
+                    1
+                ))
             
-            # Inserir produto
-            cursor.execute('''
-                INSERT INTO produtos (nome, categoria, preco, custo, estoque, 
-                                    codigo_barras, fornecedor, data_cadastro, ativo)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                f'Produto Demo {i+1} - {datetime.now().strftime("%H:%M:%S")}',
-                'Demonstração',
-                round(50 + (i * 25.50), 2),
-                round(25 + (i * 12.75), 2),
-                100 + (i * 10),
-                f'DEMO{i+1}{int(time.time())}',
-                'Fornecedor Demo',
-                datetime.now().strftime('%Y-%m-%d'),
-                1
-            ))
+                # Inserir produto
+                cursor.execute('''
+                    INSERT INTO produtos (nome, categoria, preco, custo, estoque, 
+                                        codigo_barras, fornecedor, data_cadastro, ativo)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', (
+                    f'Produto Demo {i+1} - {datetime.now().strftime("%H:%M:%S")}',
+                    'Demonstração',
+                    round(50 + (i * 25.50), 2),
+                    round(25 + (i * 12.75), 2),
+                    100 + (i * 10),
+                    f'DEMO{i+1}{int(time.time())}',
+                    'Fornecedor Demo',
+                    datetime.now().strftime('%Y-%m-%d'),
+                    1
+                ))
             
-            conn.commit()
             print(f"✅ Lote {i+1} inserido - aguardando detecção automática...")
             time.sleep(3)  # Aguardar para ver a automação funcionando
     
     except Exception as e:
         print(f"❌ Erro ao inserir dados: {e}")
-    finally:
-        conn.close()
     
     # Aguardar thread de monitoramento finalizar
     monitor.join()
@@ -0,0 +1,188 @@
+import os
+import sys
+from datetime import datetime
+from banco_dados import conectar_leitura, iterar_linhas, sql_exportacao
+from serializacao import serializador, salvar_json, salvar_json_stream
+
+TAMANHO_LOTE_IDS = 500  # ids por SELECT ... WHERE rowid IN (...)
+
+class ExportadorIncremental:
+    """Exportação incremental: base JSON + journal NDJSON com as linhas alteradas
+
+    Cada tabela tem um arquivo base (`<tabela>.json`) e um journal
+    (`<tabela>.journal.ndjson`) onde cada mudança vira uma linha
+    {"seq", "op", "id", "row"}. Exportar uma mudança custa proporcional ao
+    número de linhas alteradas; quando o journal passa de
+    `limite_compactacao` linhas ele é aplicado à base e zerado.
+    """
+
+    def __init__(self, db_path='empresa.db', json_dir='dados_json_auto', compacto=False,
+                 limite_compactacao=500):
+        self.db_path = db_path
+        self.json_dir = json_dir
+        self.compacto = compacto
+        self.limite_compactacao = limite_compactacao
+        self.arquivo_estado = os.path.join(json_dir, '_incremental.json')
+        self.estado = self._carregar_estado()
+
+    def arquivo_base(self, tabela):
+        return os.path.join(self.json_dir, f"{tabela}.json")
+
+    def arquivo_journal(self, tabela):
+        return os.path.join(self.json_dir, f"{tabela}.journal.ndjson")
+
+    def _carregar_estado(self):
+        if os.path.exists(self.arquivo_estado):
+            with open(self.arquivo_estado, 'rb') as f:
+                return serializador.loads(f.read())
+        return {}
+
+    def _salvar_estado(self):
+        salvar_json(self.arquivo_estado, self.estado)
+
+    def exportar_base(self, tabela):
+        """Grava a tabela inteira como nova base e zera o journal"""
+        conn = conectar_leitura(self.db_path)
+        try:
+            linhas = iterar_linhas(conn.execute(f"{sql_exportacao(conn, tabela)} ORDER BY rowid"))
+            total = salvar_json_stream(self.arquivo_base(tabela), linhas, self.compacto)
+        finally:
+            conn.close()
+
+        self._zerar_journal(tabela, total)
+        return total
+
+    def _zerar_journal(self, tabela, registros):
+        if os.path.exists(self.arquivo_journal(tabela)):
+            os.remove(self.arquivo_journal(tabela))
+        self.estado[tabela] = {
+            'base_em': datetime.now().isoformat(),
+            'registros_base': registros,
+            'linhas_journal': 0,
+        }
+        self._salvar_estado()
+
+    def _buscar_linhas(self, conn, tabela, ids):
+        """Estado atual das linhas `ids` ({id: linha}); ids ausentes foram removidos
+
+        O id do changelog é o rowid da linha (OLD.id/NEW.id, alias do rowid).
+        """
+        linhas = {}
+        ids = list(ids)
+        select = sql_exportacao(conn, tabela).replace('SELECT ', 'SELECT rowid AS _linha_id, ', 1)
+        for inicio in range(0, len(ids), TAMANHO_LOTE_IDS):
+            lote = ids[inicio:inicio + TAMANHO_LOTE_IDS]
+            marcadores = ', '.join('?' for _ in lote)
+            for row in conn.execute(f"{select} WHERE rowid IN ({marcadores})", lote):
+                linha = dict(row)
+                linhas[linha.pop('_linha_id')] = linha
+        return linhas
+
+    def aplicar_mudancas(self, mudancas):
+        """Grava no journal as linhas alteradas pelas mudanças do changelog
+
+        `mudancas` são tuplas (seq, tabela, linha_id, operacao) do CDC.
+        Várias mudanças na mesma linha viram uma só entrada com o estado
+        atual. Retorna {tabela: (destino, linhas)}, com destino 'journal'
+        ou 'base' (tabela ainda sem base, exportada por inteiro); uma tabela
+        que falhou volta como ('erro', mensagem) e as demais seguem.
+        """
+        por_tabela = {}
+        for seq, tabela, linha_id, operacao in mudancas:
+            por_tabela.setdefault(tabela, {})[linha_id] = (seq, operacao)
+
+        gravadas = {}
+        conn = conectar_leitura(self.db_path)
+        try:
+            for tabela, alteradas in por_tabela.items():
+                try:
+                    gravadas[tabela] = self._aplicar_tabela(conn, tabela, alteradas)
+                except Exception as e:
+                    print(f"❌ Erro ao exportar {tabela}: {e}")
+                    gravadas[tabela] = ('erro', str(e))
+        finally:
+            conn.close()
+
+        self._salvar_estado()
+        return gravadas
+
+    def _aplicar_tabela(self, conn, tabela, alteradas):
+        """Grava as mudanças de uma tabela no journal (ou exporta a base)"""
+        if tabela not in self.estado or not os.path.exists(self.arquivo_base(tabela)):
+            # Sem base ainda: a exportação completa já inclui as mudanças
+            return ('base', self.exportar_base(tabela))
+
+        linhas = self._buscar_linhas(conn, tabela, alteradas)
+        pedacos = []
+        for linha_id, (seq, operacao) in sorted(alteradas.items(), key=lambda item: item[1][0]):
+            linha = linhas.get(linha_id)
+            if linha is None:
+                operacao = 'D'
+            pedacos.append(serializador.dumps_bytes(
+                {'seq': seq, 'op': operacao, 'id': linha_id, 'row': linha}, compacto=True
+            ) + b'\n')
+
+        # Entradas repetidas numa nova tentativa são inofensivas: cada uma
+        # traz o estado atual da linha e o journal é aplicado em ordem
+        with open(self.arquivo_journal(tabela), 'ab') as f:
+            f.write(b''.join(pedacos))
+
+        self.estado[tabela]['linhas_journal'] += len(pedacos)
+        if self.estado[tabela]['linhas_journal'] >= self.limite_compactacao:
+            self.compactar(tabela)
+        return ('journal', len(pedacos))
+
+    def ler_journal(self, tabela):
+        """Entradas do journal da tabela, em ordem"""
+        if not os.path.exists(self.arquivo_journal(tabela)):
+            return []
+        with open(self.arquivo_journal(tabela), 'rb') as f:
+            return [serializador.loads(linha) for linha in f if linha.strip()]
+
+    def carregar_tabela(self, tabela):
+        """Reconstrói a tabela atual: base + journal aplicado"""
+        with open(self.arquivo_base(tabela), 'rb') as f:
+            linhas = {row['id']: row for row in serializador.loads(f.read())}
+
+        for entrada in self.ler_journal(tabela):
+            if entrada['op'] == 'D':
+                linhas.pop(entrada['id'], None)
+            else:
+                linhas[entrada['id']] = entrada['row']
+
+        return [linhas[linha_id] for linha_id in sorted(linhas)]
+
+    def compactar(self, tabela):
+        """Regrava a base com o estado atual da tabela e zera o journal
+
+        Base + journal é o estado da tabela, então a compactação relê a
+        tabela em streaming (como exportar_base) em vez de carregar a base
+        e o journal inteiros na memória.
+        """
+        total = self.exportar_base(tabela)
+        print(f"🗜️ {tabela}: journal compactado na base ({total} registros)")
+        return total
+
+    def compactar_todas(self):
+        """Compacta todas as tabelas que têm journal"""
+        for tabela in list(self.estado):
+            if self.estado[tabela]['linhas_journal']:
+                self.compactar(tabela)
+
+if __name__ == "__main__":
+    comando = sys.argv[1] if len(sys.argv) > 1 else None
+    json_dir = sys.argv[3] if len(sys.argv) > 3 else 'dados_json_auto'
+    exportador = ExportadorIncremental(json_dir=json_dir)
+
+    if comando == 'compactar':
+        if len(sys.argv) > 2 and sys.argv[2] != 'todas':
+            exportador.compactar(sys.argv[2])
+        else:
+            exportador.compactar_todas()
+    elif comando == 'status':
+        for tabela, info in sorted(exportador.estado.items()):
+            print(f"📄 {tabela:<15} base {info['registros_base']:>7} registros "
+                  f"({info['base_em']}) | journal {info['linhas_journal']} linhas")
+    else:
+        print("Uso: python exportacao_incremental.py <status|compactar> [tabela|todas] [json_dir]")
+        sys.exit(1)
@@ -0,0 +1,216 @@
+import csv
+import io
+from datetime import date, datetime
+from banco_dados import sql_exportacao
+from serializacao import arquivo_atomico
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+TAMANHO_GRUPO = 50_000  # linhas por lote lido do cursor (= row group do Parquet)
+
+def tipo_declarado(declarado):
+    """Tipo lógico da coluna a partir do tipo declarado no CREATE TABLE
+
+    Datas e flags são reconhecidas pelo nome do tipo (DATE, DATETIME,
+    BOOLEAN); o resto segue as regras de afinidade do SQLite. Colunas sem
+    tipo declarado retornam None e são inferidas pelo primeiro valor.
+    """
+    declarado = (declarado or '').upper()
+    if 'BOOL' in declarado:
+        return 'booleano'
+    if 'DATETIME' in declarado or 'TIMESTAMP' in declarado:
+        return 'data_hora'
+    if 'DATE' in declarado:
+        return 'data'
+    if 'INT' in declarado:
+        return 'inteiro'
+    if any(nome in declarado for nome in ('CHAR', 'CLOB', 'TEXT')):
+        return 'texto'
+    if 'BLOB' in declarado:
+        return 'binario'
+    if any(nome in declarado for nome in ('REAL', 'FLOA', 'DOUB', 'NUM', 'DEC')):
+        return 'real'
+    return None
+
+def tipos_colunas(conn, tabela):
+    """{coluna: tipo lógico} das colunas exportadas da tabela (sem as colunas geradas)"""
+    return {row[1]: tipo_declarado(row[2])
+            for row in conn.execute(f"PRAGMA table_xinfo({tabela})") if row[6] == 0}
+
+def _inferir_tipo(valores):
+    for valor in valores:
+        if isinstance(valor, bool):
+            return 'booleano'
+        if isinstance(valor, int):
+            return 'inteiro'
+        if isinstance(valor, float):
+            return 'real'
+        if isinstance(valor, bytes):
+            return 'binario'
+        if valor is not None:
+            return 'texto'
+    return 'texto'
+
+def _converter_data(valor):
+    return date.fromisoformat(valor[:10]) if isinstance(valor, str) else valor
+
+def _converter_data_hora(valor):
+    return datetime.fromisoformat(valor) if isinstance(valor, str) else valor
+
+def _converter_booleano(valor):
+    return None if valor is None else bool(valor)
+
+CONVERSORES = {
+    'data': _converter_data,
+    'data_hora': _converter_data_hora,
+    'booleano': _converter_booleano,
+}
+
+class EscritorCSV:
+    """CSV (UTF-8, com cabeçalho); os valores saem como estão no banco"""
+
+    extensao = 'csv'
+
+    def __init__(self, arquivo, colunas, tipos):
+        self.texto = io.TextIOWrapper(arquivo, encoding='utf-8', newline='')
+        self.escritor = csv.writer(self.texto)
+        self.escritor.writerow(colunas)
+
+    def escrever(self, lote):
+        self.escritor.writerows(lote)
+
+    def fechar(self):
+        self.texto.flush()
+        self.texto.detach()  # o arquivo binário é fechado por quem o abriu
+
+    @staticmethod
+    def ler(caminho):
+        with open(caminho, newline='', encoding='utf-8') as f:
+            return list(csv.reader(f))
+
+class EscritorArrow:
+    """Base dos formatos colunares: converte cada lote em um RecordBatch tipado"""
+
+    TIPOS_ARROW = {
+        'inteiro': lambda: pyarrow.int64(),
+        'real': lambda: pyarrow.float64(),
+        'texto': lambda: pyarrow.string(),
+        'binario': lambda: pyarrow.binary(),
+        'booleano': lambda: pyarrow.bool_(),
+        'data': lambda: pyarrow.date32(),
+        'data_hora': lambda: pyarrow.timestamp('us'),
+    }
+
+    def __init__(self, arquivo, colunas, tipos):
+        self.arquivo = arquivo
+        self.colunas = colunas
+        self.tipos = tipos
+        self.esquema = None
+        self.escritor = None
+
+    def _criar_esquema(self, lote):
+        # Colunas sem tipo declarado (ex.: sqlite_sequence) seguem o primeiro lote
+        valores = list(zip(*lote)) if lote else [()] * len(self.colunas)
+        self.tipos = [tipo or _inferir_tipo(valores[i]) for i, tipo in enumerate(self.tipos)]
+        self.esquema = pyarrow.schema([
+            (coluna, self.TIPOS_ARROW[tipo]()) for coluna, tipo in zip(self.colunas, self.tipos)
+        ])
+        self.escritor = self._abrir_escritor()
+
+    def _lote_arrow(self, lote):
+        arrays = []
+        for valores, tipo, campo in zip(zip(*lote), self.tipos, self.esquema):
+            conversor = CONVERSORES.get(tipo)
+            if conversor:
+                valores = [conversor(valor) for valor in valores]
+            arrays.append(pyarrow.array(valores, type=campo.type))
+        return pyarrow.RecordBatch.from_arrays(arrays, schema=self.esquema)
+
+    def escrever(self, lote):
+        if self.escritor is None:
+            self._criar_esquema(lote)
+        self._gravar(self._lote_arrow(lote))
+
+    def fechar(self):
+        if self.escritor is None:
+            self._criar_esquema([])  # tabela vazia: arquivo só com o esquema
+        self.escritor.close()
+
+class EscritorParquet(EscritorArrow):
+    """Parquet com compressão zstd; cada lote vira um row group"""
+
+    extensao = 'parquet'
+
+    def _abrir_escritor(self):
+        return pyarrow.parquet.ParquetWriter(self.arquivo, self.esquema, compression='zstd')
+
+    def _gravar(self, lote):
+        self.escritor.write_batch(lote, row_group_size=lote.num_rows)
+
+    @staticmethod
+    def ler(caminho):
+        return pyarrow.parquet.read_table(caminho)
+
+class EscritorFeather(EscritorArrow):
+    """Feather v2 (arquivo Arrow IPC) com compressão lz4"""
+
+    extensao = 'feather'
+
+    def _abrir_escritor(self):
+        opcoes = pyarrow.ipc.IpcWriteOptions(compression='lz4')
+        return pyarrow.ipc.new_file(self.arquivo, self.esquema, options=opcoes)
+
+    def _gravar(self, lote):
+        self.escritor.write_batch(lote)
+
+    @staticmethod
+    def ler(caminho):
+        with pyarrow.memory_map(caminho) as fonte:
+            return pyarrow.ipc.open_file(fonte).read_all()
+
+FORMATOS = {'csv': EscritorCSV}
+if pyarrow is not None:
+    FORMATOS['parquet'] = EscritorParquet
+    FORMATOS['feather'] = EscritorFeather
+
+def obter_formato(nome):
+    """Classe escritora do formato `nome` (csv, parquet, feather)"""
+    if nome not in FORMATOS:
+        dica = ' (instale pyarrow)' if nome in ('parquet', 'feather') else ''
+        raise ValueError(f"Formato de exportação indisponível: {nome}{dica} "
+                         f"(disponíveis: json, {', '.join(FORMATOS)})")
+    return FORMATOS[nome]
+
+def extensao(formato):
+    """Extensão dos arquivos do formato (json incluído)"""
+    return 'json' if formato == 'json' else obter_formato(formato).extensao
+
+def exportar_tabela(conn, tabela, caminho, formato, tamanho_grupo=TAMANHO_GRUPO, fsync=None):
+    """Grava a tabela em `caminho` no formato informado, lote a lote; retorna os registros
+
+    O cursor é lido com fetchmany em lotes de `tamanho_grupo` linhas, então
+    só um lote fica na memória. O arquivo é publicado de forma atômica.
+    """
+    classe = obter_formato(formato)
+    tipos = tipos_colunas(conn, tabela)
+    cursor = conn.cursor()
+    cursor.row_factory = None  # tuplas: sem o custo do sqlite3.Row por linha
+    cursor.execute(sql_exportacao(conn, tabela))
+    colunas = [descricao[0] for descricao in cursor.description]
+
+    total = 0
+    with arquivo_atomico(caminho, fsync) as f:
+        escritor = classe(f, colunas, [tipos.get(coluna) for coluna in colunas])
+        while True:
+            lote = cursor.fetchmany(tamanho_grupo)
+            if not lote:
+                break
+            escritor.escrever(lote)
+            total += len(lote)
+        escritor.fechar()
+    return total
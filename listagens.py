@@ -0,0 +1,216 @@
+import re
+from functools import lru_cache
+
+# Operadores aceitos em ?filter[campo][operador]=valor (sem operador: igualdade)
+OPERADORES = {
+    'eq': '=',
+    'ne': '<>',
+    'gt': '>',
+    'gte': '>=',
+    'lt': '<',
+    'lte': '<=',
+    'in': 'IN',
+}
+
+MAXIMO_VALORES_IN = 100
+
+PADRAO_FILTRO = re.compile(r'^filter\[(\w+)\](?:\[(\w+)\])?$')
+
+class ParametroInvalidoError(ValueError):
+    """Filtro, ordenação ou campo fora do que a listagem permite"""
+
+class Listagem:
+    """Declaração de uma listagem da API: o que o cliente pode pedir e como vira SQL
+
+    `campos` mapeia cada campo da resposta para sua expressão SQL, `padrao`
+    são os campos devolvidos sem ?fields=, `filtros` e `ordenacoes` os
+    campos aceitos em ?filter[...] e ?sort=, e `ordem_padrao` a ordenação
+    sem ?sort= (prefixo '-' para decrescente). O id entra sempre como
+    último critério, no sentido do anterior, para a ordem ser única.
+    """
+
+    def __init__(self, origem, campos, padrao, filtros=(), ordenacoes=(), ordem_padrao=('id',)):
+        self.origem = origem
+        self.campos = campos
+        self.padrao = padrao
+        self.filtros = filtros
+        self.ordenacoes = ordenacoes
+        self.ordem_padrao = ordem_padrao
+
+LISTAGENS = {
+    'funcionarios': Listagem(
+        origem='funcionarios',
+        campos={
+            'id': 'id', 'nome': 'nome', 'email': 'email', 'telefone': 'telefone',
+            'cidade': 'cidade', 'estado': 'estado', 'departamento': 'departamento',
+            'cargo': 'cargo', 'salario': 'salario', 'data_contratacao': 'data_contratacao',
+            'ativo': 'ativo',
+        },
+        padrao=('id', 'nome', 'email', 'departamento', 'cargo', 'salario', 'ativo'),
+        filtros=('id', 'departamento', 'cargo', 'cidade', 'estado', 'salario', 'ativo'),
+        ordenacoes=('id', 'nome', 'salario', 'data_contratacao', 'departamento'),
+        ordem_padrao=('nome',),
+    ),
+    'produtos': Listagem(
+        origem='produtos',
+        campos={
+            'id': 'id', 'nome': 'nome', 'categoria': 'categoria', 'preco': 'preco',
+            'estoque': 'estoque', 'codigo_barras': 'codigo_barras',
+            'fornecedor': 'fornecedor', 'data_cadastro': 'data_cadastro', 'ativo': 'ativo',
+        },
+        padrao=('id', 'nome', 'categoria', 'preco', 'estoque', 'ativo'),
+        filtros=('id', 'categoria', 'fornecedor', 'preco', 'estoque', 'ativo'),
+        ordenacoes=('id', 'nome', 'preco', 'estoque', 'categoria'),
+        ordem_padrao=('nome',),
+    ),
+    'clientes': Listagem(
+        origem='clientes',
+        campos={
+            'id': 'id', 'nome': 'nome', 'email': 'email', 'telefone': 'telefone',
+            'cidade': 'cidade', 'estado': 'estado', 'data_cadastro': 'data_cadastro',
+            'ativo': 'ativo',
+        },
+        padrao=('id', 'nome', 'email', 'telefone', 'cidade', 'ativo'),
+        filtros=('id', 'cidade', 'estado', 'data_cadastro', 'ativo'),
+        ordenacoes=('id', 'nome', 'cidade', 'data_cadastro'),
+        ordem_padrao=('nome',),
+    ),
+    'vendas': Listagem(
+        origem='''vendas v
+            JOIN funcionarios f ON v.funcionario_id = f.id
+            JOIN produtos p ON v.produto_id = p.id''',
+        campos={
+            'id': 'v.id', 'funcionario_id': 'v.funcionario_id', 'funcionario': 'f.nome',
+            'produto_id': 'v.produto_id', 'produto': 'p.nome', 'quantidade': 'v.quantidade',
+            'preco_unitario': 'v.preco_unitario', 'desconto': 'v.desconto', 'total': 'v.total',
+            'data_venda': 'v.data_venda', 'metodo_pagamento': 'v.metodo_pagamento',
+        },
+        padrao=('id', 'funcionario', 'produto', 'quantidade', 'total', 'data_venda',
+                'metodo_pagamento'),
+        filtros=('id', 'funcionario_id', 'produto_id', 'metodo_pagamento', 'data_venda',
+                 'total', 'quantidade'),
+        ordenacoes=('id', 'data_venda', 'total', 'quantidade'),
+        ordem_padrao=('-data_venda',),
+    ),
+}
+
+class ConsultaListagem:
+    """SQL compilado de uma forma de requisição (campos, filtros e ordem, sem os valores)"""
+
+    def __init__(self, select, where, ordem, chaves, direcoes, campos):
+        self.select = select
+        self.where = where
+        self.ordem = ordem
+        self.chaves = chaves
+        self.direcoes = direcoes
+        self.campos = campos
+
+    def sql(self, limitar=False):
+        """SELECT completo (WHERE, ORDER BY e, com `limitar`, um LIMIT ?)"""
+        sql = self.select
+        if self.where:
+            sql += f" WHERE {self.where}"
+        sql += ' ORDER BY ' + ', '.join(f"{coluna}{' DESC' if desc else ''}"
+                                        for coluna, desc in zip(self.ordem, self.direcoes))
+        return sql + (' LIMIT ?' if limitar else '')
+
+    def projetar(self, row):
+        """Dicionário só com os campos pedidos (as chaves de ordenação extras ficam de fora)"""
+        return {campo: row[campo] for campo in self.campos}
+
+@lru_cache(maxsize=256)
+def compilar(nome, campos, filtros, ordem):
+    """Compila a forma da requisição em SQL parametrizado (resultado em cache)
+
+    `filtros` é uma tupla (campo, operador, quantidade de valores) e `ordem`
+    uma tupla (campo, descendente). Os valores não fazem parte da chave:
+    requisições com a mesma forma geram exatamente o mesmo texto SQL, que
+    também é reaproveitado pelo cache de statements de cada conexão.
+    """
+    listagem = LISTAGENS[nome]
+    chaves = [campo for campo, _ in ordem]
+    selecionados = list(campos) + [campo for campo in chaves if campo not in campos]
+    select = (f"SELECT {', '.join(f'{listagem.campos[c]} AS {c}' for c in selecionados)} "
+              f"FROM {listagem.origem}")
+
+    condicoes = []
+    for campo, operador, quantidade in filtros:
+        expressao = listagem.campos[campo]
+        if operador == 'in':
+            condicoes.append(f"{expressao} IN ({', '.join('?' for _ in range(quantidade))})")
+        else:
+            condicoes.append(f"{expressao} {OPERADORES[operador]} ?")
+
+    return ConsultaListagem(
+        select, ' AND '.join(condicoes),
+        tuple(listagem.campos[campo] for campo in chaves), tuple(chaves),
+        tuple(desc for _, desc in ordem), tuple(campos),
+    )
+
+def _ler_campos(listagem, texto):
+    if not texto:
+        return listagem.padrao
+    campos = tuple(dict.fromkeys(c.strip() for c in texto.split(',') if c.strip()))
+    invalidos = [c for c in campos if c not in listagem.campos]
+    if invalidos or not campos:
+        raise ParametroInvalidoError(
+            f"Campo inválido em fields: {', '.join(invalidos) or texto} "
+            f"(use {', '.join(listagem.campos)})")
+    return campos
+
+def _ler_ordem(listagem, texto):
+    itens = [c.strip() for c in texto.split(',') if c.strip()] if texto else listagem.ordem_padrao
+    ordem = []
+    for item in itens:
+        campo = item.lstrip('-')
+        if campo not in listagem.ordenacoes:
+            raise ParametroInvalidoError(
+                f"Ordenação inválida: {campo} (use {', '.join(listagem.ordenacoes)})")
+        if campo not in (c for c, _ in ordem):
+            ordem.append((campo, item.startswith('-')))
+    if 'id' not in (c for c, _ in ordem):
+        ordem.append(('id', ordem[-1][1] if ordem else False))
+    return tuple(ordem)
+
+def _ler_filtros(listagem, args):
+    filtros = []
+    for chave, valor in args.items(multi=True):
+        encontrado = PADRAO_FILTRO.match(chave)
+        if not encontrado:
+            continue
+        campo, operador = encontrado.group(1), encontrado.group(2) or 'eq'
+        if campo not in listagem.filtros:
+            raise ParametroInvalidoError(
+                f"Filtro inválido: {campo} (use {', '.join(listagem.filtros)})")
+        if operador not in OPERADORES:
+            raise ParametroInvalidoError(
+                f"Operador inválido: {operador} (use {', '.join(OPERADORES)})")
+        valores = valor.split(',') if operador == 'in' else [valor]
+        if len(valores) > MAXIMO_VALORES_IN:
+            raise ParametroInvalidoError(f"Máximo de {MAXIMO_VALORES_IN} valores em [in]")
+        filtros.append((campo, operador, valores))
+    # Ordem estável: a mesma forma de requisição sempre gera o mesmo SQL
+    filtros.sort(key=lambda f: (f[0], f[1], len(f[2])))
+    return filtros
+
+def montar_consulta(nome, args):
+    """Interpreta ?fields=, ?sort= e ?filter[...] da requisição
+
+    Retorna (ConsultaListagem, parâmetros dos filtros). Só campos,
+    filtros e ordenações declarados em LISTAGENS são aceitos; o resto gera
+    ParametroInvalidoError.
+    """
+    listagem = LISTAGENS[nome]
+    campos = _ler_campos(listagem, args.get('fields'))
+    ordem = _ler_ordem(listagem, args.get('sort'))
+    filtros = _ler_filtros(listagem, args)
+
+    consulta = compilar(nome, campos, tuple((c, op, len(v)) for c, op, v in filtros), ordem)
+    params = [valor for _, _, valores in filtros for valor in valores]
+    return consulta, params
+
+def estatisticas_compilacao():
+    """Acertos e falhas do cache de consultas compiladas"""
+    info = compilar.cache_info()
+    return {'hits': info.hits, 'misses': info.misses, 'tamanho': info.currsize,
+            'tamanho_maximo': info.maxsize}
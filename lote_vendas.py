@@ -0,0 +1,209 @@
+import json
+import math
+from datetime import datetime
+
+# Inserção de vendas em lote (POST /api/vendas/batch). O lote inteiro é
+# validado com uma consulta por tabela referenciada (não uma por venda) e
+# gravado com um único executemany dentro de uma transação do escritor,
+# então os triggers de resumo/CDC rodam sem um COMMIT por linha.
+MAXIMO_VENDAS_LOTE = 10_000
+
+COLUNAS_VENDA = ('funcionario_id', 'produto_id', 'quantidade', 'preco_unitario',
+                 'desconto', 'total', 'data_venda', 'metodo_pagamento')
+
+FORMATO_DATA_VENDA = '%Y-%m-%d %H:%M:%S'
+
+class LoteInvalidoError(ValueError):
+    """Corpo da requisição que não pôde ser lido como lote de vendas"""
+
+def _recusar_constante(nome):
+    # json.loads aceita NaN/Infinity, que não são JSON válido
+    raise ValueError(f"valor não permitido: {nome}")
+
+def ler_lote(corpo, ndjson=False):
+    """Lista de vendas de um corpo JSON (array) ou NDJSON (um objeto por linha)"""
+    try:
+        texto = corpo.decode('utf-8') if isinstance(corpo, bytes) else corpo
+        if ndjson:
+            vendas = [json.loads(linha, parse_constant=_recusar_constante)
+                      for linha in texto.splitlines() if linha.strip()]
+        else:
+            vendas = json.loads(texto, parse_constant=_recusar_constante)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise LoteInvalidoError(f"Corpo inválido: {e}")
+
+    if not isinstance(vendas, list):
+        raise LoteInvalidoError("O corpo deve ser um array de vendas (ou NDJSON)")
+    if not vendas:
+        raise LoteInvalidoError("Lote vazio")
+    if len(vendas) > MAXIMO_VENDAS_LOTE:
+        raise LoteInvalidoError(f"Máximo de {MAXIMO_VENDAS_LOTE} vendas por lote")
+    return vendas
+
+def _inteiro(valor):
+    # Fora de 64 bits o sqlite3 levanta OverflowError na gravação
+    return isinstance(valor, int) and not isinstance(valor, bool) and -2**63 <= valor < 2**63
+
+def _numero(valor):
+    # 1e999 vira inf mesmo sem NaN/Infinity no texto
+    return (isinstance(valor, (int, float)) and not isinstance(valor, bool)
+            and math.isfinite(valor))
+
+def _ler_data_venda(valor):
+    data = datetime.fromisoformat(valor)
+    if data.tzinfo is not None:
+        raise ValueError("sem fuso horário")
+    return data.strftime(FORMATO_DATA_VENDA)
+
+def _validar_campos(venda, agora):
+    """Erros de formato da venda e a linha normalizada (sem consultar o banco)"""
+    if not isinstance(venda, dict):
+        return ["cada venda deve ser um objeto"], None
+
+    erros = []
+    for campo in ('funcionario_id', 'produto_id'):
+        if not _inteiro(venda.get(campo)):
+            erros.append(f"{campo} deve ser um inteiro")
+    quantidade = venda.get('quantidade')
+    if not _inteiro(quantidade) or quantidade <= 0:
+        erros.append("quantidade deve ser um inteiro positivo")
+    preco_unitario = venda.get('preco_unitario')
+    if preco_unitario is not None and (not _numero(preco_unitario) or preco_unitario < 0):
+        erros.append("preco_unitario deve ser um número não negativo")
+    desconto = venda.get('desconto', 0)
+    if not _numero(desconto) or not 0 <= desconto < 1:
+        erros.append("desconto deve ser uma fração entre 0 e 1")
+    total = venda.get('total')
+    if total is not None and (not _numero(total) or total < 0):
+        erros.append("total deve ser um número não negativo")
+    metodo = venda.get('metodo_pagamento')
+    if not isinstance(metodo, str) or not metodo.strip():
+        erros.append("metodo_pagamento é obrigatório")
+
+    data_venda = venda.get('data_venda')
+    if data_venda is None:
+        data_venda = agora
+    else:
+        try:
+            data_venda = _ler_data_venda(data_venda)
+        except (TypeError, ValueError):
+            erros.append("data_venda inválida (use AAAA-MM-DD HH:MM:SS, sem fuso horário)")
+
+    desconhecidos = sorted(set(venda) - set(COLUNAS_VENDA))
+    if desconhecidos:
+        erros.append(f"campos desconhecidos: {', '.join(desconhecidos)}")
+    if erros:
+        return erros, None
+
+    return [], {
+        'funcionario_id': venda['funcionario_id'],
+        'produto_id': venda['produto_id'],
+        'quantidade': quantidade,
+        'preco_unitario': preco_unitario,
+        'desconto': desconto,
+        'total': total,
+        'data_venda': data_venda,
+        'metodo_pagamento': metodo.strip(),
+    }
+
+def _consultar_ids(conn, sql, ids):
+    """Linhas cujo id está em `ids`, com uma única consulta (a lista vai como JSON)"""
+    return {row[0]: row for row in conn.execute(sql, (json.dumps(sorted(ids)),))}
+
+def validar_vendas(conn, vendas):
+    """Valida o lote e completa preço e total a partir do cadastro
+
+    Retorna (erros, linhas): `erros` tem uma lista por venda (vazia se
+    válida) e `linhas` as vendas válidas já normalizadas, na ordem do lote
+    e acompanhadas do índice original. Funcionários e produtos de todo o
+    lote são buscados de uma vez.
+    """
+    agora = datetime.now().strftime(FORMATO_DATA_VENDA)
+    erros, normalizadas = [], []
+    for venda in vendas:
+        erros_venda, linha = _validar_campos(venda, agora)
+        erros.append(erros_venda)
+        normalizadas.append(linha)
+
+    validas = [linha for linha in normalizadas if linha]
+    funcionarios = _consultar_ids(conn, '''
+        SELECT id, ativo FROM funcionarios
+        WHERE id IN (SELECT value FROM json_each(?))
+    ''', {linha['funcionario_id'] for linha in validas})
+    produtos = _consultar_ids(conn, '''
+        SELECT id, ativo, preco FROM produtos
+        WHERE id IN (SELECT value FROM json_each(?))
+    ''', {linha['produto_id'] for linha in validas})
+
+    linhas = []
+    for indice, linha in enumerate(normalizadas):
+        if linha is None:
+            continue
+        funcionario = funcionarios.get(linha['funcionario_id'])
+        produto = produtos.get(linha['produto_id'])
+        if funcionario is None:
+            erros[indice].append(f"funcionário {linha['funcionario_id']} não existe")
+        elif not funcionario[1]:
+            erros[indice].append(f"funcionário {linha['funcionario_id']} está inativo")
+        if produto is None:
+            erros[indice].append(f"produto {linha['produto_id']} não existe")
+        elif not produto[1]:
+            erros[indice].append(f"produto {linha['produto_id']} está inativo")
+        if erros[indice]:
+            continue
+
+        if linha['preco_unitario'] is None:
+            linha['preco_unitario'] = produto[2]
+        if linha['total'] is None:
+            # Mesma regra das vendas geradas em criar_banco_simples.py
+            linha['total'] = round(linha['quantidade'] * linha['preco_unitario']
+                                   * (1 - linha['desconto']), 2)
+        linhas.append((indice, linha))
+    return erros, linhas
+
+def inserir_vendas(conn, linhas):
+    """Grava as linhas com um executemany e retorna os ids na mesma ordem
+
+    Deve rodar dentro da transação do escritor: como vendas usa
+    AUTOINCREMENT e só essa conexão escreve, os ids do lote são os
+    seguintes ao último valor de sqlite_sequence.
+    """
+    if not linhas:
+        return []
+    anterior = conn.execute(
+        "SELECT seq FROM sqlite_sequence WHERE name = 'vendas'").fetchone()
+    anterior = anterior[0] if anterior else 0
+    conn.executemany(f'''
+        INSERT INTO vendas ({', '.join(COLUNAS_VENDA)})
+        VALUES ({', '.join(f':{coluna}' for coluna in COLUNAS_VENDA)})
+    ''', linhas)
+    ultimo = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'vendas'").fetchone()[0]
+    if ultimo - anterior != len(linhas):
+        raise RuntimeError("Ids das vendas do lote fora de sequência")
+    return list(range(anterior + 1, ultimo + 1))
+
+def gravar_lote(escritor, vendas, atomico=False):
+    """Valida e grava o lote em uma única transação do escritor
+
+    Retorna (resultados, inseridas): um resultado por venda, na ordem do
+    lote ({"index", "status": "created", "id"} ou {"index", "status":
+    "error", "errors"}). Com `atomico`, qualquer venda inválida cancela o
+    lote inteiro.
+    """
+    with escritor.transacao() as conn:
+        erros, linhas = validar_vendas(conn, vendas)
+        if atomico and len(linhas) < len(vendas):
+            linhas = []
+        ids = inserir_vendas(conn, [linha for _, linha in linhas])
+
+    criados = {indice: id_venda for (indice, _), id_venda in zip(linhas, ids)}
+    resultados = []
+    for indice, erros_venda in enumerate(erros):
+        if indice in criados:
+            resultados.append({'index': indice, 'status': 'created', 'id': criados[indice]})
+        elif erros_venda:
+            resultados.append({'index': indice, 'status': 'error', 'errors': erros_venda})
+        else:
+            resultados.append({'index': indice, 'status': 'error',
+                               'errors': ["lote cancelado (atomic): há vendas inválidas"]})
+    return resultados, len(ids)
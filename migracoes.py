@@ -0,0 +1,269 @@
+import sys
+from datetime import datetime
+from banco_dados import conectar_leitura, obter_escritor
+from resumos import criar_resumos
+from versoes_tabelas import criar_versoes_tabelas
+from cdc import criar_changelog
+from busca import criar_busca
+from series_vendas import criar_series
+
+# Colunas derivadas de vendas.data_venda (texto 'AAAA-MM-DD HH:MM:SS'). São
+# colunas geradas VIRTUAL: não ocupam espaço na tabela, são calculadas pelo
+# próprio SQLite em cada INSERT/UPDATE (sem triggers nem backfill) e os
+# índices guardam o valor pronto. O epoch trata data_venda como UTC, então
+# dia_venda e mes_venda coincidem com o texto gravado.
+COLUNAS_DATA_VENDA = [
+    ('data_venda_epoch',
+     "INTEGER GENERATED ALWAYS AS (CAST(strftime('%s', data_venda) AS INTEGER)) VIRTUAL"),
+    ('dia_venda', "DATE GENERATED ALWAYS AS (date(data_venda_epoch, 'unixepoch')) VIRTUAL"),
+    ('mes_venda', "TEXT GENERATED ALWAYS AS (strftime('%Y-%m', data_venda_epoch, 'unixepoch')) VIRTUAL"),
+]
+
+def criar_colunas_data_venda(conn):
+    """Adiciona a vendas as colunas de COLUNAS_DATA_VENDA que ainda não existem"""
+    existentes = {row[1] for row in conn.execute("PRAGMA table_xinfo(vendas)")}
+    for coluna, definicao in COLUNAS_DATA_VENDA:
+        if coluna not in existentes:
+            conn.execute(f"ALTER TABLE vendas ADD COLUMN {coluna} {definicao}")
+
+# Cada migração: (versão, descrição, passos). Um passo é um comando SQL ou
+# uma função que recebe a conexão de escrita. As migrações já aplicadas
+# ficam registradas em schema_migrations e não são executadas de novo.
+MIGRACOES = [
+    (1, 'Índices para as consultas da API e dos relatórios', [
+        # /api/vendas: ORDER BY data_venda DESC (e paginação por data_venda, id)
+        "CREATE INDEX IF NOT EXISTS idx_vendas_data ON vendas (data_venda)",
+        # Receita por vendedor/departamento e top vendedor (índice de cobertura)
+        "CREATE INDEX IF NOT EXISTS idx_vendas_funcionario ON vendas (funcionario_id, total)",
+        # Top produtos: soma de quantidade e total por produto
+        "CREATE INDEX IF NOT EXISTS idx_vendas_produto ON vendas (produto_id, quantidade, total)",
+        # Vendas por mês: GROUP BY strftime('%Y-%m', data_venda) (trocado por mes_venda na migração 8)
+        "CREATE INDEX IF NOT EXISTS idx_vendas_mes ON vendas (strftime('%Y-%m', data_venda), total)",
+        # Vendas por método de pagamento
+        "CREATE INDEX IF NOT EXISTS idx_vendas_pagamento ON vendas (metodo_pagamento, total)",
+        # Listagens ordenadas por nome (e paginação por nome, id)
+        "CREATE INDEX IF NOT EXISTS idx_funcionarios_nome ON funcionarios (nome)",
+        "CREATE INDEX IF NOT EXISTS idx_produtos_nome ON produtos (nome)",
+        "CREATE INDEX IF NOT EXISTS idx_clientes_nome ON clientes (nome)",
+        # Filtros por ativo nos relatórios
+        "CREATE INDEX IF NOT EXISTS idx_produtos_ativo ON produtos (ativo, categoria, preco)",
+        "CREATE INDEX IF NOT EXISTS idx_funcionarios_ativo ON funcionarios (ativo, departamento, salario)",
+        "CREATE INDEX IF NOT EXISTS idx_clientes_ativo ON clientes (ativo, cidade)",
+    ]),
+    (2, 'Tabelas de resumo das vendas mantidas por triggers', [
+        criar_resumos,
+    ]),
+    (3, 'Contador de versão por tabela para ETag/Last-Modified', [
+        criar_versoes_tabelas,
+    ]),
+    (4, 'Changelog (CDC) das tabelas de dados para os exportadores', [
+        criar_changelog,
+    ]),
+    (5, 'Busca textual (FTS5) em funcionários, clientes e produtos', [
+        criar_busca,
+    ]),
+    (6, 'Índices para os filtros e ordenações das listagens da API', [
+        # /api/produtos?filter[categoria]=...&sort=preco (ou -preco)
+        "CREATE INDEX IF NOT EXISTS idx_produtos_categoria ON produtos (categoria, preco)",
+        # /api/funcionarios?filter[departamento]=... na ordem padrão (nome)
+        "CREATE INDEX IF NOT EXISTS idx_funcionarios_departamento ON funcionarios (departamento, nome)",
+        # /api/clientes?filter[cidade]=... na ordem padrão (nome)
+        "CREATE INDEX IF NOT EXISTS idx_clientes_cidade ON clientes (cidade, nome)",
+    ]),
+    (7, 'Resumos das vendas por hora e por dia (séries temporais) mantidos por triggers', [
+        criar_series,
+    ]),
+    (8, 'Colunas de data das vendas (epoch, dia e mês) com índices', [
+        criar_colunas_data_venda,
+        # Faixas de tempo: WHERE data_venda_epoch BETWEEN ? AND ? (cobre SUM(total))
+        "CREATE INDEX IF NOT EXISTS idx_vendas_epoch ON vendas (data_venda_epoch, total)",
+        # Relatórios por dia: GROUP BY dia_venda
+        "CREATE INDEX IF NOT EXISTS idx_vendas_dia ON vendas (dia_venda, total)",
+        # Relatórios por mês: GROUP BY mes_venda, inclusive "últimos N meses" (faixa em
+        # mes_venda e corte exato no epoch, tudo no índice); substitui o índice de
+        # strftime da migração 1
+        "CREATE INDEX IF NOT EXISTS idx_vendas_mes_venda ON vendas (mes_venda, data_venda_epoch, total)",
+        "DROP INDEX IF EXISTS idx_vendas_mes",
+    ]),
+]
+
+# Consultas da API/relatórios e o índice que cada uma deve usar (EXPLAIN QUERY PLAN)
+PLANOS_ESPERADOS = [
+    ('/api/funcionarios', "SELECT id, nome FROM funcionarios ORDER BY nome, id",
+     'idx_funcionarios_nome'),
+    ('/api/produtos', "SELECT id, nome FROM produtos ORDER BY nome, id",
+     'idx_produtos_nome'),
+    ('/api/clientes', "SELECT id, nome FROM clientes ORDER BY nome, id",
+     'idx_clientes_nome'),
+    ('/api/vendas', '''
+        SELECT v.id FROM vendas v
+        JOIN funcionarios f ON v.funcionario_id = f.id
+        JOIN produtos p ON v.produto_id = p.id
+        ORDER BY v.data_venda DESC, v.id DESC LIMIT 50
+     ''', 'idx_vendas_data'),
+    ('relatório top vendedor', '''
+        SELECT f.nome, SUM(v.total) as receita
+        FROM vendas v JOIN funcionarios f ON v.funcionario_id = f.id
+        GROUP BY f.id, f.nome ORDER BY receita DESC LIMIT 1
+     ''', 'idx_vendas_funcionario'),
+    ('relatório vendas por departamento', '''
+        SELECT f.departamento, COUNT(v.id), SUM(v.total) as receita_total
+        FROM vendas v JOIN funcionarios f ON v.funcionario_id = f.id
+        GROUP BY f.departamento ORDER BY receita_total DESC
+     ''', 'idx_vendas_funcionario'),
+    ('relatório vendas por mês', '''
+        SELECT mes_venda as mes, COUNT(*), SUM(total)
+        FROM vendas GROUP BY mes_venda
+        ORDER BY mes DESC LIMIT 6
+     ''', 'idx_vendas_mes_venda'),
+    ('relatório vendas por dia', '''
+        SELECT dia_venda as data, COUNT(*), SUM(total)
+        FROM vendas GROUP BY dia_venda
+        ORDER BY data DESC LIMIT 10
+     ''', 'idx_vendas_dia'),
+    ('relatório vendas dos últimos 6 meses', '''
+        SELECT mes_venda as mes, COUNT(*), SUM(total)
+        FROM vendas
+        WHERE mes_venda >= strftime('%Y-%m', 'now', '-6 months')
+          AND data_venda_epoch >= CAST(strftime('%s', 'now', '-6 months') AS INTEGER)
+        GROUP BY mes_venda
+     ''', 'idx_vendas_mes_venda'),
+    ('vendas em uma faixa de datas', '''
+        SELECT COUNT(*), SUM(total) FROM vendas
+        WHERE data_venda_epoch >= CAST(strftime('%s', '2025-01-01') AS INTEGER)
+          AND data_venda_epoch < CAST(strftime('%s', '2025-02-01') AS INTEGER)
+     ''', 'idx_vendas_epoch'),
+    ('relatório top produtos', '''
+        SELECT p.nome, SUM(v.quantidade) as quantidade_total
+        FROM vendas v JOIN produtos p ON v.produto_id = p.id
+        GROUP BY p.id, p.nome ORDER BY quantidade_total DESC LIMIT 5
+     ''', 'idx_vendas_produto'),
+    ('/api/produtos?filter[categoria]&sort=-preco', '''
+        SELECT id, preco FROM produtos WHERE categoria = 'Eletrônicos'
+        ORDER BY preco DESC, id DESC LIMIT 50
+     ''', 'idx_produtos_categoria'),
+    ('/api/funcionarios?filter[departamento]', '''
+        SELECT id, nome FROM funcionarios WHERE departamento = 'Vendas'
+        ORDER BY nome, id
+     ''', 'idx_funcionarios_departamento'),
+    ('/api/clientes?filter[cidade]', '''
+        SELECT id, nome FROM clientes WHERE cidade = 'São Paulo'
+        ORDER BY nome, id
+     ''', 'idx_clientes_cidade'),
+    # /api/vendas/series: faixa na chave do resumo em vez de strftime() em cada venda
+    ('/api/vendas/series?group_by=departamento', '''
+        SELECT substr(dia, 1, 7), departamento, SUM(receita)
+        FROM resumo_vendas_dia_departamento
+        WHERE dia >= '2025-01-01' AND dia < '2025-07-01'
+        GROUP BY 1, 2
+     ''', 'PRIMARY KEY (dia>? AND dia<?)'),
+    # /api/search: consulta o índice FTS5 em vez de varrer com LIKE '%...%'
+    ('/api/search', '''
+        SELECT f.id FROM busca_funcionarios
+        JOIN funcionarios f ON f.id = busca_funcionarios.rowid
+        WHERE busca_funcionarios MATCH '"ana"*'
+     ''', 'busca_funcionarios VIRTUAL TABLE INDEX'),
+]
+
+def criar_tabela_controle(conn):
+    """Cria a tabela que registra as migrações aplicadas"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            versao INTEGER PRIMARY KEY,
+            descricao TEXT NOT NULL,
+            aplicada_em DATETIME NOT NULL
+        )
+    ''')
+
+def versoes_aplicadas(conn):
+    """Retorna o conjunto de versões já aplicadas"""
+    existe = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type='table' AND name='schema_migrations'"
+    ).fetchone()
+    if not existe:
+        return set()
+    return {row[0] for row in conn.execute("SELECT versao FROM schema_migrations")}
+
+def aplicar_migracoes(db_path='empresa.db', verbose=True):
+    """Aplica, em ordem, as migrações pendentes (cada uma em sua transação)"""
+    escritor = obter_escritor(db_path)
+    aplicadas = []
+
+    with escritor.transacao() as conn:
+        criar_tabela_controle(conn)
+        ja_aplicadas = versoes_aplicadas(conn)
+
+    for versao, descricao, passos in MIGRACOES:
+        if versao in ja_aplicadas:
+            continue
+
+        with escritor.transacao() as conn:
+            for passo in passos:
+                if callable(passo):
+                    passo(conn)
+                else:
+                    conn.execute(passo)
+            conn.execute(
+                "INSERT INTO schema_migrations (versao, descricao, aplicada_em) VALUES (?, ?, ?)",
+                (versao, descricao, datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+            )
+
+        aplicadas.append(versao)
+        if verbose:
+            print(f"✅ Migração {versao} aplicada: {descricao}")
+
+    return aplicadas
+
+def plano_consulta(conn, sql):
+    """Retorna as linhas de EXPLAIN QUERY PLAN da consulta"""
+    return [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}")]
+
+def verificar_planos(db_path='empresa.db', verbose=True):
+    """Confere se as consultas da API usam os índices esperados"""
+    conn = conectar_leitura(db_path, row_factory=False)
+    falhas = []
+
+    try:
+        for nome, sql, indice in PLANOS_ESPERADOS:
+            plano = plano_consulta(conn, sql)
+            ok = any(indice in passo for passo in plano)
+            if not ok:
+                falhas.append(nome)
+
+            if verbose:
+                print(f"{'✅' if ok else '❌'} {nome} → {indice}")
+                for passo in plano:
+                    print(f"      {passo}")
+    finally:
+        conn.close()
+
+    return falhas
+
+def mostrar_status(db_path='empresa.db'):
+    """Lista as migrações aplicadas e pendentes"""
+    conn = conectar_leitura(db_path, row_factory=False)
+    try:
+        aplicadas = versoes_aplicadas(conn)
+    finally:
+        conn.close()
+
+    for versao, descricao, _ in MIGRACOES:
+        status = "✅ aplicada" if versao in aplicadas else "⏳ pendente"
+        print(f"{versao:>3} | {status} | {descricao}")
+
+if __name__ == "__main__":
+    db_path = 'empresa.db'
+    argumentos = [a for a in sys.argv[1:] if not a.startswith('--')]
+    if argumentos:
+        db_path = argumentos[0]
+
+    if '--status' in sys.argv:
+        mostrar_status(db_path)
+    elif '--verificar' in sys.argv:
+        falhas = verificar_planos(db_path)
+        sys.exit(1 if falhas else 0)
+    else:
+        print("🔧 APLICANDO MIGRAÇÕES")
+        print("=" * 40)
+        if not aplicar_migracoes(db_path):
+            print("✅ Banco já está na versão mais recente")
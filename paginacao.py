@@ -0,0 +1,120 @@
+import base64
+import json
+
+PAGE_SIZE_PADRAO = 50
+PAGE_SIZE_MAXIMO = 1000
+
+class CursorInvalidoError(ValueError):
+    """O token de paginação recebido não pôde ser decodificado"""
+
+def codificar_cursor(valores):
+    """Gera o token opaco com os valores da última linha da página"""
+    bruto = json.dumps(list(valores), ensure_ascii=False, separators=(',', ':'))
+    return base64.urlsafe_b64encode(bruto.encode('utf-8')).decode('ascii').rstrip('=')
+
+def decodificar_cursor(token, quantidade):
+    """Recupera os valores de ordenação gravados no token"""
+    try:
+        preenchimento = '=' * (-len(token) % 4)
+        valores = json.loads(base64.urlsafe_b64decode(token + preenchimento).decode('utf-8'))
+    except (ValueError, UnicodeDecodeError) as e:
+        raise CursorInvalidoError(f"Cursor inválido: {e}")
+
+    if not isinstance(valores, list) or len(valores) != quantidade:
+        raise CursorInvalidoError("Cursor inválido para esta listagem")
+    return valores
+
+def normalizar_page_size(page_size):
+    """Limita o tamanho da página ao intervalo permitido"""
+    if page_size is None:
+        return PAGE_SIZE_PADRAO
+    return max(1, min(page_size, PAGE_SIZE_MAXIMO))
+
+def segmentos_apos(ordem, direcoes, valores):
+    """Condições "linha depois do cursor", na ordem da listagem, com seus parâmetros
+
+    O SQLite põe NULL antes dos valores em ASC e depois em DESC, e uma
+    comparação como `(a, id) > (?, ?)` nunca é verdadeira com a nula. As
+    linhas depois do cursor são divididas em segmentos consecutivos: o
+    prefixo igual ao cursor (`IS NULL` onde o valor é nulo) mais um passo
+    na coluna seguinte (`> ?`, `< ?`, `IS NOT NULL` ou `IS NULL`). Passos
+    vizinhos no mesmo sentido viram uma só comparação de row values, então
+    cada segmento continua sendo uma busca no índice. A última coluna da
+    ordem (o id) não pode ser nula.
+    """
+    passos = []  # (coluna inicial, coluna final, operador)
+    for i in range(len(ordem) - 1, -1, -1):
+        desc, valor = direcoes[i], valores[i]
+        if valor is None:
+            if not desc:
+                passos.append((i, i, 'IS NOT NULL'))
+            continue  # NULL em DESC: nada vem depois nesta coluna
+        operador = '<' if desc else '>'
+        if passos and passos[-1][2] == operador and passos[-1][0] == i + 1:
+            passos[-1] = (i, passos[-1][1], operador)
+        else:
+            passos.append((i, i, operador))
+        if desc and i < len(ordem) - 1:
+            passos.append((i, i, 'IS NULL'))
+
+    segmentos = []
+    for inicio, fim, operador in passos:
+        termos = [f"{coluna} IS NULL" if valor is None else f"{coluna} = ?"
+                  for coluna, valor in zip(ordem[:inicio], valores[:inicio])]
+        params = [valor for valor in valores[:inicio] if valor is not None]
+        if operador in ('IS NULL', 'IS NOT NULL'):
+            termos.append(f"{ordem[inicio]} {operador}")
+        elif inicio == fim:
+            termos.append(f"{ordem[inicio]} {operador} ?")
+            params.append(valores[inicio])
+        else:
+            colunas = ordem[inicio:fim + 1]
+            termos.append(f"({', '.join(colunas)}) {operador} "
+                          f"({', '.join('?' for _ in colunas)})")
+            params.extend(valores[inicio:fim + 1])
+        segmentos.append((' AND '.join(termos), params))
+    return segmentos
+
+def buscar_pagina(conn, consulta, ordem, chaves, where='', params=(),
+                  after=None, page_size=None, descendente=False):
+    """Busca uma página pelo método keyset (seek) em vez de OFFSET
+
+    `consulta` é o SELECT ... FROM ... sem WHERE/ORDER BY, `ordem` são as
+    expressões SQL de ordenação (a última deve ser única, ex.: o id) e
+    `chaves` os nomes das mesmas colunas no resultado. `descendente` vale
+    para todas as colunas ou é uma sequência com o sentido de cada uma.
+    A página seguinte começa logo após a última linha, então o custo não
+    cresce com a posição na listagem.
+    """
+    page_size = normalizar_page_size(page_size)
+    if isinstance(descendente, (list, tuple)):
+        direcoes = list(descendente)
+    else:
+        direcoes = [descendente] * len(ordem)
+
+    if after:
+        segmentos = segmentos_apos(ordem, direcoes, decodificar_cursor(after, len(ordem)))
+    else:
+        segmentos = [(None, [])]
+
+    ordenacao = ' ORDER BY ' + ', '.join(f"{coluna}{' DESC' if desc else ''}"
+                                         for coluna, desc in zip(ordem, direcoes))
+    rows = []
+    # Uma linha extra indica se há próxima página; os segmentos seguintes só
+    # são lidos quando os anteriores não completam a página
+    for condicao, valores in segmentos:
+        condicoes = [c for c in (where, condicao) if c]
+        sql = consulta
+        if condicoes:
+            sql += ' WHERE ' + ' AND '.join(f"({c})" for c in condicoes)
+        sql += ordenacao + ' LIMIT ?'
+        rows.extend(conn.execute(sql, [*params, *valores, page_size + 1 - len(rows)]).fetchall())
+        if len(rows) > page_size:
+            break
+
+    proximo = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        proximo = codificar_cursor(rows[-1][chave] for chave in chaves)
+
+    return rows, proximo
@@ -0,0 +1,105 @@
+from banco_dados import iterar_linhas
+from serializacao import escrever_array_json
+
+TAMANHO_LOTE = 500
+
+class Relacionamento:
+    """Declaração de um relacionamento pai → filhos para exportação aninhada
+
+    `colunas` e `origem` formam o SELECT dos filhos (sem WHERE/ORDER BY),
+    `chave` é a expressão SQL da chave estrangeira que aponta para o pai e
+    `agregados` são totais calculados sobre os filhos de cada pai, no
+    formato {campo: ('count' | 'sum' | 'min' | 'max', coluna)}.
+    """
+
+    def __init__(self, nome, pai, campo, colunas, origem, chave, filtro_pai=None,
+                 ordem_filhos=None, agregados=None):
+        self.nome = nome
+        self.pai = pai
+        self.campo = campo
+        self.colunas = colunas
+        self.origem = origem
+        self.chave = chave
+        self.filtro_pai = filtro_pai
+        self.ordem_filhos = ordem_filhos
+        self.agregados = agregados or {}
+
+    def sql_pais(self):
+        where = f" WHERE {self.filtro_pai}" if self.filtro_pai else ''
+        return f"SELECT * FROM {self.pai}{where} ORDER BY id"
+
+    def sql_filhos(self):
+        ordem = f", {self.ordem_filhos}" if self.ordem_filhos else ''
+        return (f"SELECT {self.chave} AS _chave_pai, {self.colunas} FROM {self.origem} "
+                f"WHERE {self.chave} IS NOT NULL ORDER BY {self.chave}{ordem}")
+
+# Colunas de dados das vendas filhas (v.* traria também as colunas geradas da migração 8)
+COLUNAS_VENDAS = ('v.id, v.funcionario_id, v.produto_id, v.quantidade, v.preco_unitario, '
+                  'v.desconto, v.total, v.data_venda, v.metodo_pagamento')
+
+RELACIONAMENTOS = {
+    'funcionarios_com_vendas': Relacionamento(
+        'funcionarios_com_vendas', 'funcionarios', 'vendas',
+        colunas=f'{COLUNAS_VENDAS}, p.nome as produto_nome, p.categoria',
+        origem='vendas v JOIN produtos p ON v.produto_id = p.id',
+        chave='v.funcionario_id',
+        filtro_pai='ativo = 1',
+        ordem_filhos='v.data_venda DESC',
+        agregados={'total_vendas': ('count', None), 'receita_total': ('sum', 'total')},
+    ),
+    'produtos_com_vendas': Relacionamento(
+        'produtos_com_vendas', 'produtos', 'vendas',
+        colunas=f'{COLUNAS_VENDAS}, f.nome as vendedor_nome, f.departamento',
+        origem='vendas v JOIN funcionarios f ON v.funcionario_id = f.id',
+        chave='v.produto_id',
+        ordem_filhos='v.data_venda DESC',
+        agregados={'total_vendas': ('count', None), 'quantidade_total': ('sum', 'quantidade'),
+                   'receita_total': ('sum', 'total')},
+    ),
+}
+
+def _agregar(filhos, agregados):
+    totais = {}
+    for campo, (funcao, coluna) in agregados.items():
+        if funcao == 'count':
+            totais[campo] = len(filhos)
+            continue
+        valores = [filho[coluna] for filho in filhos if filho[coluna] is not None]
+        if funcao == 'sum':
+            totais[campo] = sum(valores)
+        elif valores:
+            totais[campo] = min(valores) if funcao == 'min' else max(valores)
+        else:
+            totais[campo] = None
+    return totais
+
+def documentos_aninhados(conn, relacionamento, tamanho_lote=TAMANHO_LOTE):
+    """Gera um documento por pai com seus filhos aninhados, em uma única passada
+
+    Pais e filhos são lidos por dois cursores ordenados pela chave e
+    combinados como em um merge join: duas consultas no total (em vez de
+    uma por pai) e só os filhos do pai atual ficam na memória.
+    """
+    pais = iterar_linhas(conn.execute(relacionamento.sql_pais()), tamanho_lote)
+    filhos = iterar_linhas(conn.execute(relacionamento.sql_filhos()), tamanho_lote)
+    filho = next(filhos, None)
+
+    for pai in pais:
+        chave_pai = pai['id']
+        # Filhos de pais filtrados (ou inexistentes) são descartados
+        while filho is not None and filho['_chave_pai'] < chave_pai:
+            filho = next(filhos, None)
+
+        grupo = []
+        while filho is not None and filho['_chave_pai'] == chave_pai:
+            del filho['_chave_pai']
+            grupo.append(filho)
+            filho = next(filhos, None)
+
+        pai[relacionamento.campo] = grupo
+        pai.update(_agregar(grupo, relacionamento.agregados))
+        yield pai
+
+def exportar_relacionamento(conn, relacionamento, arquivo, compacto=False):
+    """Grava o relacionamento como array JSON em `arquivo` (binário); retorna os pais"""
+    return escrever_array_json(arquivo, documentos_aninhados(conn, relacionamento), compacto)
@@ -0,0 +1,197 @@
+import sys
+from banco_dados import obter_escritor
+from series_vendas import reconstruir_series
+
+# Tabelas de resumo das vendas. Os triggers abaixo aplicam cada INSERT,
+# UPDATE e DELETE em vendas como um delta, então /api/stats e
+# /api/estatisticas leem O(grupos) linhas em vez de varrer todas as vendas.
+TABELAS_RESUMO = {
+    'resumo_vendas_geral': '''
+        CREATE TABLE IF NOT EXISTS resumo_vendas_geral (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            total_vendas INTEGER NOT NULL DEFAULT 0,
+            quantidade INTEGER NOT NULL DEFAULT 0,
+            receita REAL NOT NULL DEFAULT 0
+        )
+    ''',
+    'resumo_vendas_funcionario': '''
+        CREATE TABLE IF NOT EXISTS resumo_vendas_funcionario (
+            funcionario_id INTEGER NOT NULL PRIMARY KEY,
+            total_vendas INTEGER NOT NULL DEFAULT 0,
+            quantidade INTEGER NOT NULL DEFAULT 0,
+            receita REAL NOT NULL DEFAULT 0
+        )
+    ''',
+    'resumo_vendas_departamento': '''
+        CREATE TABLE IF NOT EXISTS resumo_vendas_departamento (
+            departamento TEXT NOT NULL PRIMARY KEY,
+            total_vendas INTEGER NOT NULL DEFAULT 0,
+            quantidade INTEGER NOT NULL DEFAULT 0,
+            receita REAL NOT NULL DEFAULT 0
+        )
+    ''',
+    'resumo_vendas_produto': '''
+        CREATE TABLE IF NOT EXISTS resumo_vendas_produto (
+            produto_id INTEGER NOT NULL PRIMARY KEY,
+            total_vendas INTEGER NOT NULL DEFAULT 0,
+            quantidade INTEGER NOT NULL DEFAULT 0,
+            receita REAL NOT NULL DEFAULT 0
+        )
+    ''',
+    'resumo_vendas_mes': '''
+        CREATE TABLE IF NOT EXISTS resumo_vendas_mes (
+            mes TEXT NOT NULL PRIMARY KEY,
+            total_vendas INTEGER NOT NULL DEFAULT 0,
+            quantidade INTEGER NOT NULL DEFAULT 0,
+            receita REAL NOT NULL DEFAULT 0
+        )
+    ''',
+}
+
+# Chave de cada resumo calculada a partir de uma linha de vendas (NEW/OLD)
+CHAVES_RESUMO = {
+    'resumo_vendas_geral': ('id', "SELECT 1 AS chave"),
+    'resumo_vendas_funcionario': ('funcionario_id', "SELECT {ref}.funcionario_id AS chave"),
+    'resumo_vendas_departamento': ('departamento', '''
+        SELECT departamento AS chave FROM funcionarios WHERE id = {ref}.funcionario_id
+    '''),
+    'resumo_vendas_produto': ('produto_id', "SELECT {ref}.produto_id AS chave"),
+    'resumo_vendas_mes': ('mes', "SELECT strftime('%Y-%m', {ref}.data_venda) AS chave"),
+}
+
+def _sql_delta(tabela, ref, sinal):
+    """Comandos que somam (sinal='+') ou subtraem (sinal='-') a venda `ref` do resumo"""
+    coluna, chave_sql = CHAVES_RESUMO[tabela]
+    chave_sql = chave_sql.format(ref=ref).strip()
+    return f'''
+        INSERT INTO {tabela} ({coluna}, total_vendas, quantidade, receita)
+        SELECT chave, {sinal}1, {sinal}{ref}.quantidade, {sinal}{ref}.total
+        FROM ({chave_sql}) WHERE chave IS NOT NULL
+        ON CONFLICT ({coluna}) DO UPDATE SET
+            total_vendas = total_vendas + excluded.total_vendas,
+            quantidade = quantidade + excluded.quantidade,
+            receita = receita + excluded.receita;
+        DELETE FROM {tabela}
+        WHERE {coluna} = ({chave_sql}) AND total_vendas = 0;
+    '''
+
+def _sql_trigger(nome, evento, deltas):
+    corpo = ''.join(_sql_delta(tabela, ref, sinal)
+                    for ref, sinal in deltas for tabela in TABELAS_RESUMO)
+    return f'''
+        CREATE TRIGGER IF NOT EXISTS {nome} {evento}
+        BEGIN
+            {corpo}
+        END
+    '''
+
+def _sql_mover_departamento(nome, evento, ref_saida, ref_entrada):
+    """Move os totais de um vendedor entre departamentos"""
+    comandos = []
+    if ref_saida:
+        comandos.append(f'''
+            UPDATE resumo_vendas_departamento SET
+                total_vendas = resumo_vendas_departamento.total_vendas - r.total_vendas,
+                quantidade = resumo_vendas_departamento.quantidade - r.quantidade,
+                receita = resumo_vendas_departamento.receita - r.receita
+            FROM (SELECT * FROM resumo_vendas_funcionario WHERE funcionario_id = {ref_saida}.id) AS r
+            WHERE departamento = {ref_saida}.departamento;
+            DELETE FROM resumo_vendas_departamento
+            WHERE departamento = {ref_saida}.departamento AND total_vendas = 0;
+        ''')
+    if ref_entrada:
+        comandos.append(f'''
+            INSERT INTO resumo_vendas_departamento (departamento, total_vendas, quantidade, receita)
+            SELECT {ref_entrada}.departamento, total_vendas, quantidade, receita
+            FROM resumo_vendas_funcionario
+            WHERE funcionario_id = {ref_entrada}.id AND {ref_entrada}.departamento IS NOT NULL
+            ON CONFLICT (departamento) DO UPDATE SET
+                total_vendas = total_vendas + excluded.total_vendas,
+                quantidade = quantidade + excluded.quantidade,
+                receita = receita + excluded.receita;
+        ''')
+    return f'''
+        CREATE TRIGGER IF NOT EXISTS {nome} {evento}
+        BEGIN
+            {''.join(comandos)}
+        END
+    '''
+
+TRIGGERS_RESUMO = [
+    _sql_trigger('trg_resumo_vendas_insert', 'AFTER INSERT ON vendas', [('NEW', '+')]),
+    _sql_trigger('trg_resumo_vendas_delete', 'AFTER DELETE ON vendas', [('OLD', '-')]),
+    _sql_trigger('trg_resumo_vendas_update',
+                 'AFTER UPDATE OF funcionario_id, produto_id, quantidade, total, data_venda ON vendas',
+                 [('OLD', '-'), ('NEW', '+')]),
+    # A venda pertence ao departamento atual do vendedor
+    _sql_mover_departamento(
+        'trg_resumo_funcionario_departamento',
+        'AFTER UPDATE OF departamento ON funcionarios '
+        'WHEN OLD.departamento IS NOT NEW.departamento',
+        'OLD', 'NEW'
+    ),
+    _sql_mover_departamento(
+        'trg_resumo_funcionario_insert', 'AFTER INSERT ON funcionarios', None, 'NEW'
+    ),
+    _sql_mover_departamento(
+        'trg_resumo_funcionario_delete', 'AFTER DELETE ON funcionarios', 'OLD', None
+    ),
+]
+
+# Recalculo completo a partir da tabela vendas
+RECONSTRUCAO_RESUMO = {
+    'resumo_vendas_geral': '''
+        INSERT INTO resumo_vendas_geral (id, total_vendas, quantidade, receita)
+        SELECT 1, COUNT(*), COALESCE(SUM(quantidade), 0), COALESCE(SUM(total), 0)
+        FROM vendas HAVING COUNT(*) > 0
+    ''',
+    'resumo_vendas_funcionario': '''
+        INSERT INTO resumo_vendas_funcionario (funcionario_id, total_vendas, quantidade, receita)
+        SELECT funcionario_id, COUNT(*), SUM(quantidade), SUM(total)
+        FROM vendas WHERE funcionario_id IS NOT NULL
+        GROUP BY funcionario_id
+    ''',
+    'resumo_vendas_departamento': '''
+        INSERT INTO resumo_vendas_departamento (departamento, total_vendas, quantidade, receita)
+        SELECT f.departamento, COUNT(*), SUM(v.quantidade), SUM(v.total)
+        FROM vendas v JOIN funcionarios f ON v.funcionario_id = f.id
+        WHERE f.departamento IS NOT NULL
+        GROUP BY f.departamento
+    ''',
+    'resumo_vendas_produto': '''
+        INSERT INTO resumo_vendas_produto (produto_id, total_vendas, quantidade, receita)
+        SELECT produto_id, COUNT(*), SUM(quantidade), SUM(total)
+        FROM vendas WHERE produto_id IS NOT NULL
+        GROUP BY produto_id
+    ''',
+    'resumo_vendas_mes': '''
+        INSERT INTO resumo_vendas_mes (mes, total_vendas, quantidade, receita)
+        SELECT strftime('%Y-%m', data_venda), COUNT(*), SUM(quantidade), SUM(total)
+        FROM vendas WHERE data_venda IS NOT NULL
+        GROUP BY strftime('%Y-%m', data_venda)
+    ''',
+}
+
+def criar_resumos(conn):
+    """Cria as tabelas de resumo, os triggers e preenche os totais atuais"""
+    for sql in TABELAS_RESUMO.values():
+        conn.execute(sql)
+    for sql in TRIGGERS_RESUMO:
+        conn.execute(sql)
+    reconstruir_resumos(conn)
+
+def reconstruir_resumos(conn):
+    """Recalcula todos os resumos do zero (reconciliação)"""
+    for tabela, sql in RECONSTRUCAO_RESUMO.items():
+        conn.execute(f"DELETE FROM {tabela}")
+        conn.execute(sql)
+
+if __name__ == "__main__":
+    db_path = sys.argv[1] if len(sys.argv) > 1 else 'empresa.db'
+
+    print("🔄 Reconstruindo tabelas de resumo das vendas...")
+    with obter_escritor(db_path).transacao() as conn:
+        reconstruir_resumos(conn)
+        reconstruir_series(conn)
+        total = conn.execute("SELECT total_vendas FROM resumo_vendas_geral").fetchone()
+    print(f"✅ Resumos reconstruídos ({total[0] if total else 0} vendas)")
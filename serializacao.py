@@ -0,0 +1,192 @@
+import json
+import os
+import tempfile
+from collections.abc import Iterator
+from contextlib import contextmanager
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Backend padrão: JSON_BACKEND=orjson|stdlib (sem variável, usa orjson se instalado)
+BACKEND_PADRAO = os.environ.get('JSON_BACKEND')
+
+# JSON_FSYNC=1: força os arquivos exportados para o disco antes de publicá-los
+FSYNC_PADRAO = os.environ.get('JSON_FSYNC') == '1'
+
+TAMANHO_BUFFER = 1024 * 1024  # buffer de escrita dos arquivos exportados
+
+class SerializadorStdlib:
+    """Serializador com o módulo json da biblioteca padrão"""
+
+    nome = 'stdlib'
+
+    def dumps(self, dados, compacto=False, default=str, sort_keys=False):
+        """Serializa para str (indentado com 2 espaços, ou compacto)"""
+        if compacto:
+            return json.dumps(dados, ensure_ascii=False, default=default,
+                              sort_keys=sort_keys, separators=(',', ':'))
+        return json.dumps(dados, indent=2, ensure_ascii=False, default=default,
+                          sort_keys=sort_keys)
+
+    def dumps_bytes(self, dados, compacto=False, default=str, sort_keys=False):
+        """Serializa para bytes UTF-8"""
+        return self.dumps(dados, compacto, default, sort_keys).encode('utf-8')
+
+    def loads(self, texto):
+        return json.loads(texto)
+
+class SerializadorOrjson(SerializadorStdlib):
+    """Serializador com orjson; recorre ao stdlib no que o orjson não suporta
+
+    datetime passa pelo `default` (como no json.dump(default=str)) para a
+    saída ser a mesma dos dois backends.
+    """
+
+    nome = 'orjson'
+
+    def dumps_bytes(self, dados, compacto=False, default=str, sort_keys=False):
+        opcoes = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if not compacto:
+            opcoes |= orjson.OPT_INDENT_2
+        if sort_keys:
+            opcoes |= orjson.OPT_SORT_KEYS
+        try:
+            return orjson.dumps(dados, default=default, option=opcoes)
+        except orjson.JSONEncodeError:
+            # Ex.: inteiros maiores que 64 bits
+            return super().dumps(dados, compacto, default, sort_keys).encode('utf-8')
+
+    def dumps(self, dados, compacto=False, default=str, sort_keys=False):
+        return self.dumps_bytes(dados, compacto, default, sort_keys).decode('utf-8')
+
+    def loads(self, texto):
+        return orjson.loads(texto)
+
+SERIALIZADORES = {'stdlib': SerializadorStdlib}
+if orjson is not None:
+    SERIALIZADORES['orjson'] = SerializadorOrjson
+
+def obter_serializador(nome=None):
+    """Retorna o serializador `nome` (orjson, stdlib) ou o mais rápido disponível"""
+    nome = nome or BACKEND_PADRAO
+    if nome is None:
+        nome = 'orjson' if orjson is not None else 'stdlib'
+    if nome not in SERIALIZADORES:
+        raise ValueError(f"Backend JSON indisponível: {nome} "
+                         f"(disponíveis: {', '.join(SERIALIZADORES)})")
+    return SERIALIZADORES[nome]()
+
+serializador = obter_serializador()
+
+def dumps(dados, compacto=False):
+    """Serializa com o backend padrão"""
+    return serializador.dumps(dados, compacto)
+
+@contextmanager
+def arquivo_atomico(caminho, fsync=None):
+    """Abre um arquivo temporário (binário) que substitui `caminho` ao sair do bloco
+
+    O temporário fica no mesmo diretório e entra no lugar do arquivo final
+    com os.replace, então quem lê `caminho` vê o arquivo antigo ou o novo,
+    nunca um arquivo pela metade. Se o bloco falhar, o temporário é
+    removido e o arquivo antigo continua intacto.
+    """
+    fsync = FSYNC_PADRAO if fsync is None else fsync
+    diretorio, nome = os.path.split(os.path.abspath(caminho))
+    descritor, temporario = tempfile.mkstemp(prefix=f".{nome}.", suffix='.tmp', dir=diretorio)
+    try:
+        with os.fdopen(descritor, 'wb', buffering=TAMANHO_BUFFER) as f:
+            yield f
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.chmod(temporario, 0o644)  # mkstemp cria com 0600
+        os.replace(temporario, caminho)
+    except BaseException:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+        raise
+
+def salvar_json(caminho, dados, compacto=False, fsync=None):
+    """Grava `dados` em `caminho` (UTF-8, indentado ou compacto), de forma atômica"""
+    with arquivo_atomico(caminho, fsync) as f:
+        f.write(serializador.dumps_bytes(dados, compacto))
+
+def salvar_json_stream(caminho, itens, compacto=False, fsync=None):
+    """Grava os itens como array JSON, em streaming e de forma atômica; retorna a quantidade"""
+    with arquivo_atomico(caminho, fsync) as f:
+        return escrever_array_json(f, itens, compacto)
+
+def _recuo(nivel):
+    return b'\n' + b'  ' * nivel
+
+def escrever_array_json(arquivo, itens, compacto=False, nivel=0):
+    """Grava um array JSON item a item em `arquivo` (binário); retorna a quantidade
+
+    A saída é idêntica à de salvar_json com a lista completa, mas só um
+    item fica serializado na memória por vez. `nivel` é a profundidade do
+    array dentro do documento (para a indentação).
+    """
+    total = 0
+    for item in itens:
+        pedaco = serializador.dumps_bytes(item, compacto)
+        if compacto:
+            arquivo.write((b',' if total else b'[') + pedaco)
+        else:
+            pedaco = pedaco.replace(b'\n', _recuo(nivel + 1))
+            arquivo.write((b',' if total else b'[') + _recuo(nivel + 1) + pedaco)
+        total += 1
+
+    if not total:
+        arquivo.write(b'[]')
+    else:
+        arquivo.write(b']' if compacto else _recuo(nivel) + b']')
+    return total
+
+def escrever_json(arquivo, dados, compacto=False, nivel=0):
+    """Grava um documento JSON em `arquivo` (binário), em streaming
+
+    Dicionários são gravados campo a campo e iteradores (ex.: geradores de
+    linhas) viram arrays gravados item a item; o resto é serializado
+    inteiro. A saída é idêntica à de salvar_json com os iteradores
+    convertidos em listas.
+    """
+    if isinstance(dados, dict) and dados:
+        for i, (chave, valor) in enumerate(dados.items()):
+            chave = serializador.dumps_bytes(str(chave), compacto)
+            if compacto:
+                arquivo.write((b',' if i else b'{') + chave + b':')
+            else:
+                arquivo.write((b',' if i else b'{') + _recuo(nivel + 1) + chave + b': ')
+            escrever_json(arquivo, valor, compacto, nivel + 1)
+        arquivo.write(b'}' if compacto else _recuo(nivel) + b'}')
+    elif isinstance(dados, Iterator):
+        escrever_array_json(arquivo, dados, compacto, nivel)
+    else:
+        pedaco = serializador.dumps_bytes(dados, compacto)
+        arquivo.write(pedaco if compacto else pedaco.replace(b'\n', _recuo(nivel)))
+
+class JsonProviderRapido(DefaultJSONProvider):
+    """JSON provider do Flask que usa o serializador rápido no jsonify
+
+    Mantém o comportamento do provider padrão (chaves ordenadas, datas em
+    formato HTTP, indentação só com JSONIFY_PRETTYPRINT/debug).
+    """
+
+    def __init__(self, app, backend=None):
+        super().__init__(app)
+        self.serializador = obter_serializador(backend)
+
+    def dumps(self, obj, **kwargs):
+        return self.serializador.dumps(
+            obj,
+            compacto=kwargs.get('indent') is None,
+            default=kwargs.get('default', self.default),
+            sort_keys=kwargs.get('sort_keys', self.sort_keys),
+        )
+
+    def loads(self, s, **kwargs):
+        return self.serializador.loads(s)
@@ -0,0 +1,292 @@
+from datetime import date, timedelta
+
+# Resumos das vendas por período, mantidos por triggers como os de resumos.py.
+# O total sai do resumo por hora (que também atende dia, semana e mês); as
+# séries por grupo saem dos resumos diários por departamento, produto e
+# método de pagamento. As consultas viram buscas por faixa na chave
+# (hora/dia) em vez de strftime() sobre cada venda.
+TABELAS_SERIES = {
+    'resumo_vendas_hora': '''
+        CREATE TABLE IF NOT EXISTS resumo_vendas_hora (
+            hora TEXT NOT NULL PRIMARY KEY,
+            total_vendas INTEGER NOT NULL DEFAULT 0,
+            quantidade INTEGER NOT NULL DEFAULT 0,
+            receita REAL NOT NULL DEFAULT 0
+        )
+    ''',
+    # Chave composta (dia, grupo): WITHOUT ROWID guarda as linhas na ordem da chave
+    'resumo_vendas_dia_departamento': '''
+        CREATE TABLE IF NOT EXISTS resumo_vendas_dia_departamento (
+            dia TEXT NOT NULL,
+            departamento TEXT NOT NULL,
+            total_vendas INTEGER NOT NULL DEFAULT 0,
+            quantidade INTEGER NOT NULL DEFAULT 0,
+            receita REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (dia, departamento)
+        ) WITHOUT ROWID
+    ''',
+    'resumo_vendas_dia_produto': '''
+        CREATE TABLE IF NOT EXISTS resumo_vendas_dia_produto (
+            dia TEXT NOT NULL,
+            produto_id INTEGER NOT NULL,
+            total_vendas INTEGER NOT NULL DEFAULT 0,
+            quantidade INTEGER NOT NULL DEFAULT 0,
+            receita REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (dia, produto_id)
+        ) WITHOUT ROWID
+    ''',
+    'resumo_vendas_dia_pagamento': '''
+        CREATE TABLE IF NOT EXISTS resumo_vendas_dia_pagamento (
+            dia TEXT NOT NULL,
+            metodo_pagamento TEXT NOT NULL,
+            total_vendas INTEGER NOT NULL DEFAULT 0,
+            quantidade INTEGER NOT NULL DEFAULT 0,
+            receita REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (dia, metodo_pagamento)
+        ) WITHOUT ROWID
+    ''',
+}
+
+# Colunas da chave de cada resumo e o SELECT que as calcula a partir de uma venda (NEW/OLD)
+CHAVES_SERIES = {
+    'resumo_vendas_hora': (('hora',), "SELECT strftime('%Y-%m-%d %H:00', {ref}.data_venda) AS k1"),
+    'resumo_vendas_dia_departamento': (('dia', 'departamento'), '''
+        SELECT date({ref}.data_venda) AS k1, departamento AS k2
+        FROM funcionarios WHERE id = {ref}.funcionario_id
+    '''),
+    'resumo_vendas_dia_produto': (('dia', 'produto_id'),
+                                  "SELECT date({ref}.data_venda) AS k1, {ref}.produto_id AS k2"),
+    'resumo_vendas_dia_pagamento': (('dia', 'metodo_pagamento'),
+                                    "SELECT date({ref}.data_venda) AS k1, {ref}.metodo_pagamento AS k2"),
+}
+
+def _sql_delta(tabela, ref, sinal):
+    """Comandos que somam (sinal='+') ou subtraem (sinal='-') a venda `ref` do resumo"""
+    colunas, chave_sql = CHAVES_SERIES[tabela]
+    chave_sql = chave_sql.format(ref=ref).strip()
+    chaves = [f"k{i + 1}" for i in range(len(colunas))]
+    return f'''
+        INSERT INTO {tabela} ({', '.join(colunas)}, total_vendas, quantidade, receita)
+        SELECT {', '.join(chaves)}, {sinal}1, {sinal}{ref}.quantidade, {sinal}{ref}.total
+        FROM ({chave_sql}) WHERE {' AND '.join(f'{k} IS NOT NULL' for k in chaves)}
+        ON CONFLICT ({', '.join(colunas)}) DO UPDATE SET
+            total_vendas = total_vendas + excluded.total_vendas,
+            quantidade = quantidade + excluded.quantidade,
+            receita = receita + excluded.receita;
+        DELETE FROM {tabela}
+        WHERE ({', '.join(colunas)}) IN (SELECT {', '.join(chaves)} FROM ({chave_sql}))
+          AND total_vendas = 0;
+    '''
+
+def _sql_trigger(nome, evento, deltas):
+    corpo = ''.join(_sql_delta(tabela, ref, sinal)
+                    for ref, sinal in deltas for tabela in TABELAS_SERIES)
+    return f'''
+        CREATE TRIGGER IF NOT EXISTS {nome} {evento}
+        BEGIN
+            {corpo}
+        END
+    '''
+
+def _sql_mover_departamento(nome, evento, ref_saida, ref_entrada):
+    """Move as vendas diárias de um vendedor entre departamentos
+
+    Lê as vendas do vendedor (idx_vendas_funcionario): mudanças de
+    departamento são raras e o custo é proporcional às vendas dele.
+    """
+    comandos = []
+    for ref, sinal in ((ref_saida, '-'), (ref_entrada, '')):
+        if not ref:
+            continue
+        comandos.append(f'''
+            INSERT INTO resumo_vendas_dia_departamento
+                (dia, departamento, total_vendas, quantidade, receita)
+            SELECT date(data_venda), {ref}.departamento,
+                   {sinal}COUNT(*), {sinal}SUM(quantidade), {sinal}SUM(total)
+            FROM vendas
+            WHERE funcionario_id = {ref}.id AND data_venda IS NOT NULL
+              AND {ref}.departamento IS NOT NULL
+            GROUP BY date(data_venda)
+            ON CONFLICT (dia, departamento) DO UPDATE SET
+                total_vendas = total_vendas + excluded.total_vendas,
+                quantidade = quantidade + excluded.quantidade,
+                receita = receita + excluded.receita;
+        ''')
+    if ref_saida:
+        comandos.append(f'''
+            DELETE FROM resumo_vendas_dia_departamento
+            WHERE departamento = {ref_saida}.departamento AND total_vendas = 0;
+        ''')
+    return f'''
+        CREATE TRIGGER IF NOT EXISTS {nome} {evento}
+        BEGIN
+            {''.join(comandos)}
+        END
+    '''
+
+TRIGGERS_SERIES = [
+    _sql_trigger('trg_series_vendas_insert', 'AFTER INSERT ON vendas', [('NEW', '+')]),
+    _sql_trigger('trg_series_vendas_delete', 'AFTER DELETE ON vendas', [('OLD', '-')]),
+    _sql_trigger('trg_series_vendas_update',
+                 'AFTER UPDATE OF funcionario_id, produto_id, quantidade, total, data_venda, '
+                 'metodo_pagamento ON vendas',
+                 [('OLD', '-'), ('NEW', '+')]),
+    # Como em resumo_vendas_departamento, a venda pertence ao departamento atual do vendedor
+    _sql_mover_departamento(
+        'trg_series_funcionario_departamento',
+        'AFTER UPDATE OF departamento ON funcionarios '
+        'WHEN OLD.departamento IS NOT NEW.departamento',
+        'OLD', 'NEW'
+    ),
+    _sql_mover_departamento(
+        'trg_series_funcionario_insert', 'AFTER INSERT ON funcionarios', None, 'NEW'
+    ),
+    _sql_mover_departamento(
+        'trg_series_funcionario_delete', 'AFTER DELETE ON funcionarios', 'OLD', None
+    ),
+]
+
+# Recalculo completo a partir da tabela vendas
+RECONSTRUCAO_SERIES = {
+    'resumo_vendas_hora': '''
+        INSERT INTO resumo_vendas_hora (hora, total_vendas, quantidade, receita)
+        SELECT strftime('%Y-%m-%d %H:00', data_venda), COUNT(*), SUM(quantidade), SUM(total)
+        FROM vendas WHERE data_venda IS NOT NULL
+        GROUP BY strftime('%Y-%m-%d %H:00', data_venda)
+    ''',
+    'resumo_vendas_dia_departamento': '''
+        INSERT INTO resumo_vendas_dia_departamento
+            (dia, departamento, total_vendas, quantidade, receita)
+        SELECT date(v.data_venda), f.departamento, COUNT(*), SUM(v.quantidade), SUM(v.total)
+        FROM vendas v JOIN funcionarios f ON v.funcionario_id = f.id
+        WHERE v.data_venda IS NOT NULL AND f.departamento IS NOT NULL
+        GROUP BY date(v.data_venda), f.departamento
+    ''',
+    'resumo_vendas_dia_produto': '''
+        INSERT INTO resumo_vendas_dia_produto (dia, produto_id, total_vendas, quantidade, receita)
+        SELECT date(data_venda), produto_id, COUNT(*), SUM(quantidade), SUM(total)
+        FROM vendas WHERE data_venda IS NOT NULL AND produto_id IS NOT NULL
+        GROUP BY date(data_venda), produto_id
+    ''',
+    'resumo_vendas_dia_pagamento': '''
+        INSERT INTO resumo_vendas_dia_pagamento
+            (dia, metodo_pagamento, total_vendas, quantidade, receita)
+        SELECT date(data_venda), metodo_pagamento, COUNT(*), SUM(quantidade), SUM(total)
+        FROM vendas WHERE data_venda IS NOT NULL AND metodo_pagamento IS NOT NULL
+        GROUP BY date(data_venda), metodo_pagamento
+    ''',
+}
+
+def criar_series(conn):
+    """Cria os resumos por período, os triggers e preenche os totais atuais"""
+    for sql in TABELAS_SERIES.values():
+        conn.execute(sql)
+    for sql in TRIGGERS_SERIES:
+        conn.execute(sql)
+    reconstruir_series(conn)
+
+def reconstruir_series(conn):
+    """Recalcula os resumos por período do zero (reconciliação)"""
+    for tabela, sql in RECONSTRUCAO_SERIES.items():
+        conn.execute(f"DELETE FROM {tabela}")
+        conn.execute(sql)
+
+# Rótulo de cada período a partir da coluna de tempo do resumo (hora ou dia);
+# a semana é identificada pela data da segunda-feira
+PERIODOS = {
+    'hour': lambda tempo: tempo,
+    'day': lambda tempo: f"substr({tempo}, 1, 10)",
+    'week': lambda tempo: f"date({tempo}, 'weekday 0', '-6 days')",
+    'month': lambda tempo: f"substr({tempo}, 1, 7)",
+}
+
+# Origem de cada agrupamento: resumo, coluna de tempo, rótulo do grupo e chave do GROUP BY
+AGRUPAMENTOS = {
+    None: {
+        'origem': 'resumo_vendas_hora r',
+        'tempo': 'r.hora',
+    },
+    'departamento': {
+        'origem': 'resumo_vendas_dia_departamento r',
+        'tempo': 'r.dia',
+        'grupo': 'r.departamento',
+    },
+    'produto': {
+        'origem': 'resumo_vendas_dia_produto r JOIN produtos p ON p.id = r.produto_id',
+        'tempo': 'r.dia',
+        'grupo': 'p.nome',
+        'chave': 'r.produto_id',
+    },
+    'metodo_pagamento': {
+        'origem': 'resumo_vendas_dia_pagamento r',
+        'tempo': 'r.dia',
+        'grupo': 'r.metodo_pagamento',
+    },
+}
+
+class SerieInvalidaError(ValueError):
+    """Parâmetros da série (período, agrupamento ou datas) inválidos"""
+
+def _ler_data(texto, nome):
+    try:
+        return date.fromisoformat(texto)
+    except (TypeError, ValueError):
+        raise SerieInvalidaError(f"Data inválida em {nome}: {texto!r} (use AAAA-MM-DD)")
+
+def consulta_series(bucket='day', group_by=None, inicio=None, fim=None):
+    """SQL e parâmetros da série de vendas
+
+    `inicio` e `fim` são datas (inclusive) ou None para não limitar. O
+    filtro é uma faixa na chave do resumo, então o custo depende só do
+    intervalo pedido.
+    """
+    if bucket not in PERIODOS:
+        raise SerieInvalidaError(f"bucket inválido: {bucket} (use {', '.join(PERIODOS)})")
+    if group_by not in AGRUPAMENTOS:
+        opcoes = ', '.join(g for g in AGRUPAMENTOS if g)
+        raise SerieInvalidaError(f"group_by inválido: {group_by} (use {opcoes})")
+    if bucket == 'hour' and group_by:
+        raise SerieInvalidaError("bucket=hour só está disponível para o total (sem group_by)")
+    if inicio and fim and inicio > fim:
+        raise SerieInvalidaError("from deve ser anterior ou igual a to")
+
+    agrupamento = AGRUPAMENTOS[group_by]
+    tempo = agrupamento['tempo']
+    colunas = [f"{PERIODOS[bucket](tempo)} AS periodo"]
+    grupos = ['periodo']
+    if group_by:
+        colunas.append(f"{agrupamento['grupo']} AS grupo")
+        if 'chave' in agrupamento:
+            colunas.append(f"{agrupamento['chave']} AS {agrupamento['chave'].split('.')[-1]}")
+        grupos.append(agrupamento.get('chave', agrupamento['grupo']))
+
+    condicoes, params = [], []
+    if inicio:
+        condicoes.append(f"{tempo} >= ?")
+        params.append(inicio.isoformat())
+    if fim:
+        # Fim inclusive: tudo antes do dia seguinte (vale para 'AAAA-MM-DD HH:00' também)
+        condicoes.append(f"{tempo} < ?")
+        params.append((fim + timedelta(days=1)).isoformat())
+
+    sql = f'''
+        SELECT {', '.join(colunas)},
+               SUM(r.total_vendas) AS total_vendas, SUM(r.quantidade) AS quantidade,
+               ROUND(SUM(r.receita), 2) AS receita
+        FROM {agrupamento['origem']}
+        {'WHERE ' + ' AND '.join(condicoes) if condicoes else ''}
+        GROUP BY {', '.join(grupos)}
+        ORDER BY periodo{', grupo' if group_by else ''}
+    '''
+    return sql, params
+
+def consultar_series(conn, bucket='day', group_by=None, inicio=None, fim=None):
+    """Pontos da série: [{periodo, [grupo], total_vendas, quantidade, receita}]"""
+    if isinstance(inicio, str):
+        inicio = _ler_data(inicio, 'from')
+    if isinstance(fim, str):
+        fim = _ler_data(fim, 'to')
+    sql, params = consulta_series(bucket, group_by, inicio, fim)
+    cursor = conn.execute(sql, params)
+    colunas = [descricao[0] for descricao in cursor.description]
+    return [dict(zip(colunas, row)) for row in cursor]
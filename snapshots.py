@@ -0,0 +1,397 @@
+import glob
+import gzip
+import hashlib
+import os
+import re
+import sys
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from datetime import datetime
+from serializacao import serializador, salvar_json, salvar_json_stream
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt  # Windows
+
+TAMANHO_BLOCO = 100  # linhas por bloco (faixa de ids)
+
+# Retenção padrão: últimos N, o mais recente de cada hora e de cada dia
+RETENCAO_PADRAO = {'ultimos': 10, 'horarios': 24, 'diarios': 7}
+
+FORMATO_VERSAO = '%Y%m%dT%H%M%S%f'
+
+# Blocos gravados (ou reaproveitados) há menos tempo que isso não são
+# coletados: podem ser de uma gravação em andamento em outro processo
+IDADE_MINIMA_GC = 15 * 60
+
+def _travar_arquivo(arquivo):
+    if fcntl is not None:
+        fcntl.flock(arquivo.fileno(), fcntl.LOCK_EX)
+        return
+    arquivo.seek(0)
+    while True:
+        try:
+            msvcrt.locking(arquivo.fileno(), msvcrt.LK_LOCK, 1)
+            return
+        except OSError:
+            pass  # LK_LOCK desiste depois de ~10 s: continua esperando
+
+def _destravar_arquivo(arquivo):
+    if fcntl is not None:
+        fcntl.flock(arquivo.fileno(), fcntl.LOCK_UN)
+    else:
+        arquivo.seek(0)
+        msvcrt.locking(arquivo.fileno(), msvcrt.LK_UNLCK, 1)
+
+class SnapshotStore:
+    """Histórico das tabelas em blocos endereçados por conteúdo
+
+    Cada snapshot é um manifesto com a lista de hashes dos blocos da
+    tabela; um bloco guarda as linhas de uma faixa de ids. Como uma mudança
+    altera só os blocos das faixas afetadas, snapshots consecutivos
+    compartilham quase todos os blocos e o disco cresce com o tamanho das
+    mudanças, não com o tamanho da tabela.
+
+    Várias exportações podem gravar no mesmo store em paralelo, inclusive
+    de processos diferentes (automacao_json e auto_json_monitor usam o
+    mesmo diretório): manifestos, retenção e coleta de lixo passam por um
+    lock do store (threads) e por um lock de arquivo (`.lock`, processos).
+    Blocos de gravações em andamento neste processo contam como
+    referenciados; os de outros processos são protegidos pela idade mínima
+    da coleta (IDADE_MINIMA_GC).
+    """
+
+    def __init__(self, diretorio='dados_json_auto/_snapshots', tamanho_bloco=TAMANHO_BLOCO):
+        self.diretorio = diretorio
+        self.tamanho_bloco = tamanho_bloco
+        self.dir_blocos = os.path.join(diretorio, 'blocos')
+        self.dir_manifestos = os.path.join(diretorio, 'manifestos')
+        os.makedirs(self.dir_blocos, exist_ok=True)
+        os.makedirs(self.dir_manifestos, exist_ok=True)
+        self._lock = threading.RLock()
+        self._gravacoes = weakref.WeakSet()  # gravações em andamento (sem manifesto ainda)
+        self._caminho_lock = os.path.join(diretorio, '.lock')
+        self._arquivo_lock = None
+        self._profundidade = 0  # _bloqueio é reentrante na mesma thread
+
+    @contextmanager
+    def _bloqueio(self):
+        """Exclusão mútua entre threads e entre processos que usam o store"""
+        with self._lock:
+            if self._profundidade == 0:
+                arquivo = open(self._caminho_lock, 'a+b')
+                try:
+                    _travar_arquivo(arquivo)
+                except BaseException:
+                    arquivo.close()
+                    raise
+                self._arquivo_lock = arquivo
+            self._profundidade += 1
+            try:
+                yield
+            finally:
+                self._profundidade -= 1
+                if self._profundidade == 0:
+                    arquivo, self._arquivo_lock = self._arquivo_lock, None
+                    try:
+                        _destravar_arquivo(arquivo)
+                    finally:
+                        arquivo.close()
+
+    def _caminho_bloco(self, hash_bloco):
+        return os.path.join(self.dir_blocos, hash_bloco[:2], f"{hash_bloco}.json.gz")
+
+    def _caminho_manifesto(self, tabela, versao):
+        return os.path.join(self.dir_manifestos, tabela, f"{versao}.json")
+
+    def _gravar_bloco(self, linhas, hashes):
+        """Grava o bloco se ainda não existir e acrescenta seu hash a `hashes`
+
+        O hash entra na gravação (que a coleta de lixo considera
+        referenciada) antes de conferir se o arquivo existe: uma coleta em
+        outra thread não apaga o bloco antes de o manifesto ser gravado. Um
+        bloco reaproveitado tem a data renovada sob o lock, para a coleta de
+        outro processo tratá-lo como novo.
+        """
+        conteudo = serializador.dumps_bytes(linhas, compacto=True)
+        hash_bloco = hashlib.sha256(conteudo).hexdigest()
+        caminho = self._caminho_bloco(hash_bloco)
+        with self._bloqueio():
+            hashes.append(hash_bloco)
+            try:
+                os.utime(caminho)
+                existe = True
+            except FileNotFoundError:
+                existe = False
+        if not existe:
+            os.makedirs(os.path.dirname(caminho), exist_ok=True)
+            # Nome único: duas exportações em paralelo podem gravar o mesmo bloco
+            temporario = f"{caminho}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with gzip.open(temporario, 'wb') as f:
+                f.write(conteudo)
+            os.replace(temporario, caminho)
+        return hash_bloco
+
+    def _ler_bloco(self, hash_bloco):
+        with gzip.open(self._caminho_bloco(hash_bloco), 'rb') as f:
+            return serializador.loads(f.read())
+
+    def iniciar(self, tabela, criado_em=None):
+        """Começa um snapshot que recebe as linhas uma a uma (ver GravacaoSnapshot)"""
+        gravacao = GravacaoSnapshot(self, tabela, criado_em)
+        with self._bloqueio():
+            self._gravacoes.add(gravacao)
+        return gravacao
+
+    def concluir(self, gravacao):
+        """Grava o manifesto do snapshot e aplica a retenção padrão; retorna a versão"""
+        with self._bloqueio():
+            versao = gravacao.concluir()
+            if self.aplicar_retencao(gravacao.tabela):
+                self.coletar_lixo()
+        return versao
+
+    def salvar(self, tabela, linhas, criado_em=None):
+        """Cria um snapshot da tabela (linhas em ordem de id) e retorna a versão"""
+        gravacao = self.iniciar(tabela, criado_em)
+        for linha in linhas:
+            gravacao.adicionar(linha)
+        return gravacao.concluir()
+
+    def adicionar(self, tabela, linhas):
+        """Salva um snapshot e aplica a retenção padrão (usado pelos exportadores)"""
+        gravacao = self.iniciar(tabela)
+        for linha in linhas:
+            gravacao.adicionar(linha)
+        return self.concluir(gravacao)
+
+    def versoes(self, tabela):
+        """Versões da tabela, da mais antiga para a mais recente"""
+        arquivos = glob.glob(os.path.join(self.dir_manifestos, tabela, '*.json'))
+        return sorted(os.path.basename(arquivo)[:-5] for arquivo in arquivos)
+
+    def tabelas(self):
+        """Tabelas que têm snapshots"""
+        return sorted(nome for nome in os.listdir(self.dir_manifestos)
+                      if os.path.isdir(os.path.join(self.dir_manifestos, nome)))
+
+    def manifesto(self, tabela, versao):
+        with open(self._caminho_manifesto(tabela, versao), 'rb') as f:
+            return serializador.loads(f.read())
+
+    def resolver_versao(self, tabela, versao):
+        """Aceita a versão completa, um prefixo único ou 'ultima'"""
+        versoes = self.versoes(tabela)
+        if versao == 'ultima':
+            candidatas = versoes[-1:]
+        else:
+            candidatas = [v for v in versoes if v.startswith(versao)]
+        if len(candidatas) != 1:
+            raise ValueError(f"Versão '{versao}' de {tabela} não encontrada "
+                             f"ou ambígua ({len(candidatas)} correspondências)")
+        return candidatas[0]
+
+    def iterar(self, tabela, versao='ultima'):
+        """Linhas da tabela na versão informada, lendo um bloco por vez"""
+        manifesto = self.manifesto(tabela, self.resolver_versao(tabela, versao))
+        for hash_bloco in manifesto['blocos']:
+            yield from self._ler_bloco(hash_bloco)
+
+    def carregar(self, tabela, versao='ultima'):
+        """Reconstrói as linhas da tabela na versão informada"""
+        return list(self.iterar(tabela, versao))
+
+    def restaurar(self, tabela, versao, destino, compacto=False):
+        """Grava a versão da tabela em um arquivo JSON"""
+        return salvar_json_stream(destino, self.iterar(tabela, versao), compacto)
+
+    def aplicar_retencao(self, tabela, ultimos=None, horarios=None, diarios=None):
+        """Remove os snapshots fora da política de retenção; retorna as versões removidas
+
+        Mantém as `ultimos` versões mais recentes, a mais recente de cada uma
+        das últimas `horarios` horas e de cada um dos últimos `diarios` dias.
+        """
+        ultimos = RETENCAO_PADRAO['ultimos'] if ultimos is None else ultimos
+        horarios = RETENCAO_PADRAO['horarios'] if horarios is None else horarios
+        diarios = RETENCAO_PADRAO['diarios'] if diarios is None else diarios
+
+        with self._bloqueio():
+            versoes = self.versoes(tabela)[::-1]  # mais recente primeiro
+            manter = set(versoes[:ultimos])
+            for prefixo, quantidade in ((11, horarios), (8, diarios)):  # YYYYmmddTHH / YYYYmmdd
+                periodos = []
+                for versao in versoes:
+                    if versao[:prefixo] not in periodos:
+                        periodos.append(versao[:prefixo])
+                        if len(periodos) > quantidade:
+                            break
+                        manter.add(versao)
+
+            removidas = [versao for versao in versoes if versao not in manter]
+            for versao in removidas:
+                os.remove(self._caminho_manifesto(tabela, versao))
+        return removidas
+
+    def coletar_lixo(self):
+        """Apaga os blocos que nenhum manifesto nem gravação em andamento referencia"""
+        with self._bloqueio():
+            referenciados = set()
+            for gravacao in list(self._gravacoes):
+                referenciados.update(gravacao.hashes)
+            for tabela in self.tabelas():
+                for versao in self.versoes(tabela):
+                    referenciados.update(self.manifesto(tabela, versao)['blocos'])
+
+            removidos = 0
+            limite = time.time() - IDADE_MINIMA_GC
+            for caminho in glob.glob(os.path.join(self.dir_blocos, '*', '*.json.gz')):
+                if os.path.basename(caminho)[:-len('.json.gz')] in referenciados:
+                    continue
+                try:
+                    if os.path.getmtime(caminho) < limite:
+                        os.remove(caminho)
+                        removidos += 1
+                except FileNotFoundError:
+                    pass
+        return removidos
+
+    def podar(self, **retencao):
+        """Aplica a retenção em todas as tabelas e remove os blocos órfãos"""
+        with self._bloqueio():
+            removidas = {tabela: self.aplicar_retencao(tabela, **retencao)
+                         for tabela in self.tabelas()}
+            return removidas, self.coletar_lixo()
+
+    def uso_disco(self):
+        """Bytes ocupados pelos blocos e quantidade de blocos"""
+        blocos = glob.glob(os.path.join(self.dir_blocos, '*', '*.json.gz'))
+        return sum(os.path.getsize(b) for b in blocos), len(blocos)
+
+    def importar_historico(self, json_dir, remover=False):
+        """Importa os arquivos <tabela>_history_<timestamp>.json antigos para o store"""
+        padrao = re.compile(r'^(?P<tabela>\w+?)_history_(?P<ts>\d{8}_\d{6})\.json$')
+        importados = 0
+        for nome in sorted(os.listdir(json_dir)):
+            encontrado = padrao.match(nome)
+            if not encontrado:
+                continue
+            caminho = os.path.join(json_dir, nome)
+            with open(caminho, 'rb') as f:
+                conteudo = serializador.loads(f.read())
+            criado_em = datetime.strptime(encontrado['ts'], '%Y%m%d_%H%M%S')
+            self.salvar(encontrado['tabela'], conteudo['data'], criado_em)
+            importados += 1
+            if remover:
+                os.remove(caminho)
+        return importados
+
+class GravacaoSnapshot:
+    """Snapshot em construção: recebe as linhas em streaming
+
+    As linhas devem chegar em ordem de id (SELECT ... ORDER BY id); cada
+    bloco é gravado assim que a faixa de ids termina, então só um bloco
+    fica na memória. Tabelas sem coluna id inteira (ex.: sqlite_sequence)
+    são divididas pela posição das linhas.
+    """
+
+    def __init__(self, store, tabela, criado_em=None):
+        self.store = store
+        self.tabela = tabela
+        self.criado_em = criado_em or datetime.now()
+        self.hashes = []
+        self.total = 0
+        self._bloco = []
+        self._faixa = None
+        self._por_id = None
+
+    def adicionar(self, linha):
+        if self._por_id is None:
+            self._por_id = isinstance(linha.get('id'), int)
+        if self._por_id:
+            faixa = linha['id'] // self.store.tamanho_bloco
+        else:
+            faixa = self.total // self.store.tamanho_bloco
+        if faixa != self._faixa:
+            self._fechar_bloco()
+            self._faixa = faixa
+        self._bloco.append(linha)
+        self.total += 1
+
+    def acompanhar(self, linhas):
+        """Repassa as linhas adiante guardando-as no snapshot (uma só leitura da tabela)"""
+        for linha in linhas:
+            self.adicionar(linha)
+            yield linha
+
+    def _fechar_bloco(self):
+        if self._bloco:
+            self.store._gravar_bloco(self._bloco, self.hashes)
+            self._bloco = []
+
+    def concluir(self):
+        """Grava o último bloco e o manifesto; retorna a versão"""
+        self._fechar_bloco()
+        versao = self.criado_em.strftime(FORMATO_VERSAO)
+        with self.store._bloqueio():
+            os.makedirs(os.path.join(self.store.dir_manifestos, self.tabela), exist_ok=True)
+            salvar_json(self.store._caminho_manifesto(self.tabela, versao), {
+                'tabela': self.tabela,
+                'versao': versao,
+                'criado_em': self.criado_em.isoformat(),
+                'total_registros': self.total,
+                'tamanho_bloco': self.store.tamanho_bloco,
+                'blocos': self.hashes,
+            })
+            self.store._gravacoes.discard(self)
+        return versao
+
+def main():
+    argumentos = [a for a in sys.argv[1:] if not a.startswith('--')]
+    opcoes = dict(a[2:].split('=', 1) for a in sys.argv[1:] if a.startswith('--') and '=' in a)
+    comando = argumentos[0] if argumentos else None
+    store = SnapshotStore(opcoes.get('dir', 'dados_json_auto/_snapshots'))
+
+    if comando == 'listar':
+        tabelas = argumentos[1:2] or store.tabelas()
+        for tabela in tabelas:
+            print(f"\n📚 {tabela}")
+            for versao in store.versoes(tabela):
+                manifesto = store.manifesto(tabela, versao)
+                print(f"   {versao}  {manifesto['total_registros']:>7} registros  "
+                      f"{len(manifesto['blocos'])} blocos")
+        tamanho, blocos = store.uso_disco()
+        print(f"\n💾 {blocos} blocos, {tamanho:,} bytes")
+
+    elif comando == 'restaurar' and len(argumentos) >= 2:
+        tabela = argumentos[1]
+        versao = argumentos[2] if len(argumentos) > 2 else 'ultima'
+        destino = argumentos[3] if len(argumentos) > 3 else f"{tabela}_{versao}.json"
+        total = store.restaurar(tabela, versao, destino)
+        print(f"✅ {tabela} ({store.resolver_versao(tabela, versao)}): {total} registros em {destino}")
+
+    elif comando == 'podar':
+        retencao = {chave: int(opcoes[chave]) for chave in RETENCAO_PADRAO if chave in opcoes}
+        removidas, blocos = store.podar(**retencao)
+        for tabela, versoes in removidas.items():
+            print(f"🗑️ {tabela}: {len(versoes)} versões removidas")
+        print(f"🧹 {blocos} blocos sem referência removidos")
+
+    elif comando == 'importar':
+        json_dir = argumentos[1] if len(argumentos) > 1 else 'dados_json_auto'
+        total = store.importar_historico(json_dir, remover='--remover' in sys.argv)
+        print(f"✅ {total} arquivos de histórico importados")
+
+    else:
+        print("Uso: python snapshots.py listar [tabela]")
+        print("     python snapshots.py restaurar <tabela> [versao|ultima] [arquivo]")
+        print("     python snapshots.py podar [--ultimos=N] [--horarios=N] [--diarios=N]")
+        print("     python snapshots.py importar [json_dir] [--remover]")
+        print("     (todas aceitam --dir=<diretório do store>)")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
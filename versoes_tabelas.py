@@ -0,0 +1,130 @@
+import hashlib
+import sqlite3
+from datetime import datetime, timedelta, timezone
+from functools import wraps
+from flask import request, make_response
+from compressao import codificacao_negociada, etag_codificada
+
+# Tabelas de dados cuja versão é controlada pelos triggers
+TABELAS_VERSIONADAS = ('funcionarios', 'produtos', 'clientes', 'vendas')
+
+def _sql_trigger_versao(tabela, evento):
+    return f'''
+        CREATE TRIGGER IF NOT EXISTS trg_versao_{tabela}_{evento.lower()}
+        AFTER {evento} ON {tabela}
+        BEGIN
+            INSERT INTO versoes_tabelas (tabela, versao, atualizado_em)
+            VALUES ('{tabela}', 1, strftime('%Y-%m-%d %H:%M:%S', 'now'))
+            ON CONFLICT (tabela) DO UPDATE SET
+                versao = versao + 1,
+                atualizado_em = excluded.atualizado_em;
+        END
+    '''
+
+def criar_versoes_tabelas(conn):
+    """Cria a tabela de versões, os triggers e a versão inicial de cada tabela"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS versoes_tabelas (
+            tabela TEXT NOT NULL PRIMARY KEY,
+            versao INTEGER NOT NULL,
+            atualizado_em DATETIME NOT NULL
+        )
+    ''')
+    for tabela in TABELAS_VERSIONADAS:
+        for evento in ('INSERT', 'UPDATE', 'DELETE'):
+            conn.execute(_sql_trigger_versao(tabela, evento))
+        conn.execute('''
+            INSERT OR IGNORE INTO versoes_tabelas (tabela, versao, atualizado_em)
+            VALUES (?, 1, strftime('%Y-%m-%d %H:%M:%S', 'now'))
+        ''', (tabela,))
+
+def ler_versoes(conn, tabelas):
+    """Retorna {tabela: (versao, atualizado_em)} ou None se a tabela de versões não existir"""
+    marcadores = ', '.join('?' for _ in tabelas)
+    try:
+        rows = conn.execute(
+            f"SELECT tabela, versao, atualizado_em FROM versoes_tabelas WHERE tabela IN ({marcadores})",
+            tuple(tabelas)
+        ).fetchall()
+    except sqlite3.Error:
+        return None
+    return {row[0]: (row[1], row[2]) for row in rows}
+
+def calcular_etag(chave, versoes):
+    """ETag forte derivada da URL e das versões das tabelas consultadas"""
+    base = chave + '|' + ','.join(f"{t}:{versoes.get(t, (0,))[0]}" for t in sorted(versoes))
+    return hashlib.sha1(base.encode('utf-8')).hexdigest()
+
+def etag_corresponde(if_none_match, etag, codificacao=None):
+    """ETag da representação que o cliente já tem, ou None se não corresponder
+
+    A compressão acrescenta a codificação à ETag (ex.: "abc-gzip"). Sem
+    executar a rota não se sabe se a resposta seria comprimida (respostas
+    pequenas não são), então valem a ETag sem codificação e a da
+    codificação negociada nesta requisição, nunca a de outra codificação.
+    """
+    candidatas = [etag_codificada(etag, codificacao), etag] if codificacao else [etag]
+    if if_none_match.star_tag:
+        return candidatas[0]
+    return next((tag for tag in candidatas if if_none_match.contains(tag)), None)
+
+def ultima_modificacao(versoes, agora=None):
+    """Last-Modified das tabelas (UTC) ou None se ainda não for confiável
+
+    atualizado_em tem resolução de segundos, então a data é arredondada
+    para o fim do segundo da última escrita. Enquanto esse segundo não
+    terminou, outra escrita ainda pode receber a mesma data: nesse caso
+    não há Last-Modified e só a ETag (versão) vale.
+    """
+    datas = [atualizado_em for _, atualizado_em in versoes.values() if atualizado_em]
+    if not datas:
+        return None
+    fim_do_segundo = (datetime.strptime(max(datas), '%Y-%m-%d %H:%M:%S')
+                      .replace(tzinfo=timezone.utc) + timedelta(seconds=1))
+    if fim_do_segundo > (agora or datetime.now(timezone.utc)):
+        return None
+    return fim_do_segundo
+
+def condicional(conexao_func, *tabelas):
+    """Decorator de GET condicional (ETag/Last-Modified) para rotas que leem `tabelas`
+
+    A versão das tabelas é lida antes de executar a rota; se o cliente já
+    tem a mesma versão (If-None-Match / If-Modified-Since) a resposta é um
+    304 sem executar a consulta.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            versoes = ler_versoes(conexao_func(), tabelas)
+            if not versoes:
+                return view(*args, **kwargs)
+
+            etag = calcular_etag(request.full_path, versoes)
+            modificado_em = ultima_modificacao(versoes)
+
+            etag_cliente = None
+            if request.if_none_match:
+                etag_cliente = etag_corresponde(request.if_none_match, etag,
+                                                codificacao_negociada())
+            elif request.if_modified_since and modificado_em:
+                if modificado_em <= request.if_modified_since:
+                    etag_cliente = etag
+
+            if etag_cliente:
+                # O 304 repete a ETag da representação que o cliente tem
+                # (a compressão não altera respostas 304)
+                resposta = make_response('', 304)
+                resposta.set_etag(etag_cliente)
+            else:
+                resposta = make_response(view(*args, **kwargs))
+                if resposta.status_code != 200:
+                    return resposta
+                resposta.set_etag(etag)
+
+            if modificado_em:
+                resposta.last_modified = modificado_em
+            # O navegador pode guardar, mas deve revalidar a cada uso
+            resposta.headers['Cache-Control'] = 'no-cache'
+            return resposta
+        return wrapper
+    return decorator
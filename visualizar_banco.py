@@ -1,4 +1,5 @@
 import sqlite3
+from busca import expressao_busca, tabela_busca
 
 def visualizar_dados():
     """Script para visualizar os dados do banco criado"""
@@ -108,11 +109,25 @@ def visualizar_dados():
         
         elif opcao == "6":
             nome_busca = input("Digite o nome do funcionário: ")
-            cursor.execute('''
-                SELECT id, nome, email, departamento, cargo, salario
-                FROM funcionarios 
-                WHERE nome LIKE ?
-            ''', (f"%{nome_busca}%",))
+            expressao = expressao_busca(nome_busca, 'nome')
+            indexado = cursor.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = ?", (tabela_busca('funcionarios'),)
+            ).fetchone()
+            if indexado and expressao:
+                # Índice FTS5 (migração 5): sem acentos, por prefixo e por relevância
+                cursor.execute('''
+                    SELECT f.id, f.nome, f.email, f.departamento, f.cargo, f.salario
+                    FROM busca_funcionarios
+                    JOIN funcionarios f ON f.id = busca_funcionarios.rowid
+                    WHERE busca_funcionarios MATCH ?
+                    ORDER BY busca_funcionarios.rank
+                ''', (expressao,))
+            else:
+                cursor.execute('''
+                    SELECT id, nome, email, departamento, cargo, salario
+                    FROM funcionarios 
+                    WHERE nome LIKE ?
+                ''', (f"%{nome_busca}%",))
             resultados = cursor.fetchall()
             if resultados:
                 print(f"\n🔍 Resultados para '{nome_busca}':")
@@ -124,9 +139,9 @@ def visualizar_dados():
         elif opcao == "7":
             print("\n📅 VENDAS POR PERÍODO:")
             cursor.execute('''
-                SELECT DATE(data_venda) as data, COUNT(*) as vendas, SUM(total) as receita
+                SELECT dia_venda as data, COUNT(*) as vendas, SUM(total) as receita
                 FROM vendas
-                GROUP BY DATE(data_venda)
+                GROUP BY dia_venda
                 ORDER BY data DESC
                 LIMIT 10
             ''')